@@ -0,0 +1,355 @@
+import asyncio
+import os
+import time
+
+from drive import DriveDownloadError, confirm_url, describe_refusal, is_html
+from stream_writer import BlockWriter, KeyedLock, claim
+from throttle import RETRY_STATUSES, parse_retry_after
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp is only required for the async backend
+    aiohttp = None
+
+
+class AsyncBackend:
+    """
+    asyncio/aiohttp implementation of the crawl loop of `PhDExamDownloader`.
+
+    Page fetches and file downloads are multiplexed over one pooled set of
+    keep-alive connections, so a large PDF no longer blocks the other
+    transfers. Only the I/O lives here: tier choice, page processing, skip and
+    revalidation, resume, PDF checks and image-set bookkeeping are the owning
+    downloader's shared helpers, so both backends produce the same files.
+    """
+
+    def __init__(self, downloader, max_connections=32, max_per_host=None, chunk_size=64 * 1024):
+        """
+        Args:
+            downloader (PhDExamDownloader): Downloader providing configuration and parsing helpers
+            max_connections (int): Total size of the connection pool
+            max_per_host (int): Maximum number of open connections per host
+                                (defaults to the downloader's `max_per_host`)
+            chunk_size (int): Size of the chunks read from response bodies
+        """
+        if aiohttp is None:
+            raise ImportError("The async backend requires aiohttp (pip install aiohttp)")
+        self.downloader = downloader
+        self.max_connections = max_connections
+        self.max_per_host = max_per_host or downloader.throttle.max_concurrent
+        self.chunk_size = chunk_size
+        self.session = None
+        # Downloads of the same URL or to the same file wait for each other
+        self._file_locks = KeyedLock(asyncio.Lock)
+
+    def _create_session(self):
+        connect_timeout, read_timeout = self.downloader.timeout
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_per_host,
+            keepalive_timeout=30,
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            headers=dict(self.downloader.session.headers),
+            timeout=aiohttp.ClientTimeout(total=None, sock_connect=connect_timeout, sock_read=read_timeout),
+        )
+
+    async def _get(self, url, **kwargs):
+        """
+        Async counterpart of `PhDExamDownloader._get`; the caller releases the response,
+        e.g. with `async with await self._get(url) as response`
+        """
+        downloader = self.downloader
+        policy = downloader.retry_policy
+        attempt = 0
+        while True:
+            await downloader.throttle.async_wait(url)
+            try:
+                start = time.perf_counter()
+                response = await self.session.get(url, **kwargs)
+                downloader.metrics.observe('http_request_seconds', time.perf_counter() - start)
+                downloader.metrics.inc('http_requests_total', status=response.status)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                downloader.metrics.inc('http_requests_total', status=type(e).__name__)
+                if not policy.should_retry(attempt):
+                    raise
+                delay = policy.delay(attempt)
+                print(f"Request to {url} failed ({e!r}), retrying in {delay:.1f}s")
+            else:
+                if response.status not in RETRY_STATUSES:
+                    downloader.throttle.recover(url)
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if not policy.should_retry(attempt, retry_after):
+                    return response
+                response.release()
+                if response.status in (429, 503):
+                    downloader.throttle.backoff(url, retry_after)
+                delay = policy.delay(attempt, retry_after)
+                print(f"{url} answered {response.status}, retrying in {delay:.1f}s")
+            downloader.metrics.inc('http_retries_total')
+            if delay > 0:
+                await asyncio.sleep(delay)
+            attempt += 1
+
+    async def fetch_page(self, page_url):
+        """
+        Async counterpart of `PhDExamDownloader.fetch_page`
+        """
+        downloader = self.downloader
+        headers = downloader.http_cache.conditional_headers(page_url) if downloader.http_cache else {}
+        async with await self._get(page_url, headers=headers) as response:
+            if response.status == 304:
+                page = downloader._not_modified_page(page_url, response.status, response.headers)
+                if page is not None:
+                    return page
+            else:
+                return await self._fetched_page(page_url, response)
+
+        # The cached copy vanished since the request was sent; fetch it in full
+        async with await self._get(page_url) as response:
+            return await self._fetched_page(page_url, response)
+
+    async def _fetched_page(self, page_url, response):
+        response.raise_for_status()
+        body = await response.read()
+        encoding = response.get_encoding()
+        return self.downloader._fetched_page(page_url, response.status, response.headers,
+                                             body.decode(encoding, errors='replace'), body, encoding)
+
+    async def _stream_to_file(self, response, filepath, offset=0):
+        downloader = self.downloader
+        expected = downloader._expected_length(response.status, response.headers, offset)
+        with BlockWriter(filepath, offset, expected, reserve=downloader.preallocate) as writer:
+            async for chunk in response.content.iter_chunked(self.chunk_size):
+                writer.write(chunk)
+            return writer.result()
+
+    async def get_exam_page_links(self):
+        """
+        Async counterpart of `PhDExamDownloader.get_exam_page_links`
+
+        Discovery is a handful of requests made once per crawl; it runs on the
+        sync session off the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.downloader.get_exam_page_links)
+
+    async def _open_download(self, pdf_url, max_confirmations=2):
+        """
+        Async counterpart of `drive.open_download`; the caller releases the response
+        """
+        response = await self._get(pdf_url)
+        confirmations = 0
+        while response.status == 200 and is_html(response.headers):
+            html = await response.text(errors='replace')
+            response.release()
+            cookies = {name: morsel.value for name, morsel in response.cookies.items()}
+            next_url = confirm_url(html, str(response.url), cookies)
+            if next_url is None or confirmations == max_confirmations:
+                raise DriveDownloadError(describe_refusal(html, pdf_url))
+            confirmations += 1
+            print(f"Following Google Drive download confirmation for {pdf_url}")
+            response = await self._get(next_url)
+        return response
+
+    async def _completed_download(self, url):
+        """
+        Async counterpart of `PhDExamDownloader._completed_download`
+        """
+        downloader = self.downloader
+        entry = downloader._recorded_download(url)
+        request = entry and downloader._revalidation(entry)
+        if not request:
+            return entry
+        revalidation_url, headers = request
+        try:
+            async with await self._get(revalidation_url, headers=headers) as response:
+                return downloader._revalidated(entry, response.status, response.headers)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"Could not revalidate {url}, keeping {entry['path']}: {e!r}")
+            return entry
+
+    async def download_pdf(self, pdf_url, page_url):
+        """
+        Async counterpart of `PhDExamDownloader.download_pdf`
+        """
+        try:
+            async with self._file_locks.hold_async(('url', pdf_url)):
+                entry = await self._completed_download(pdf_url)
+                if entry:
+                    print(f"Already downloaded {pdf_url} to {entry['path']}, skipping")
+                    return True
+
+                print(f"Downloading {pdf_url}")
+                response = await self._open_download(pdf_url)
+                try:
+                    response.raise_for_status()
+                    filename = self.downloader._pdf_filename(pdf_url, page_url, response.headers)
+                    filepath = os.path.join(self.downloader.destination_folder, filename)
+                    async with self._file_locks.hold_async(('path', os.path.abspath(filepath))):
+                        with claim(f"{filepath}.part"):
+                            await self._save_pdf(response, pdf_url, page_url, filepath)
+                finally:
+                    response.release()
+
+            print(f"Successfully downloaded {filename}")
+            return True
+
+        except Exception as e:
+            print(f"Error downloading PDF from {pdf_url}: {e}")
+            return False
+
+    async def _save_pdf(self, response, pdf_url, page_url, filepath):
+        """
+        Async counterpart of `PhDExamDownloader._save_pdf`; the caller releases the response
+        """
+        downloader = self.downloader
+        download_url = str(response.url)
+        print(f"Saving to {filepath}")
+        downloader._warn_if_not_pdf(pdf_url, response.headers)
+
+        part_path = f"{filepath}.part"
+        offset, range_headers = downloader._range_request(part_path, response.headers)
+        if not offset:
+            size, sha256 = await self._stream_to_file(response, part_path)
+            status, headers = response.status, response.headers
+        else:
+            response.release()
+            print(f"Resuming {os.path.basename(filepath)} from byte {offset}")
+            resumed = await self._get(download_url, headers=range_headers)
+            if resumed.status == 416:
+                # The partial file does not match the remote one any more
+                resumed.release()
+                resumed = await self._get(download_url)
+            async with resumed:
+                resumed.raise_for_status()
+                offset = downloader._kept_offset(offset, resumed.status)
+                size, sha256 = await self._stream_to_file(resumed, part_path, offset)
+                status, headers = resumed.status, resumed.headers
+
+        downloader._finish_pdf(pdf_url, page_url, filepath, size, sha256, offset, status, headers, download_url)
+
+    async def _download_image(self, index, total, img_url, filepath, page_url, slots):
+        retries = self.downloader.image_retries
+        async with slots:
+            for attempt in range(retries + 1):
+                try:
+                    print(f"Downloading image {index+1}/{total}: {img_url} to {filepath}")
+                    async with await self._get(img_url) as response:
+                        response.raise_for_status()
+                        with self.downloader._discard_on_error(filepath):
+                            size, sha256 = await self._stream_to_file(response, filepath)
+                            self.downloader.metrics.inc('bytes_total', size, stage='download_images')
+                            self.downloader._check_image(filepath, size, response.status, response.headers)
+                        self.downloader._record_download(img_url, page_url, filepath, size, sha256, response.headers)
+                    print(f"Successfully downloaded image {index+1}/{total}")
+                    return size
+                except Exception as e:
+                    print(f"Error downloading image {index+1}/{total} from {img_url} (attempt {attempt + 1}): {e}")
+                    if attempt < retries:
+                        await asyncio.sleep(self.downloader.retry_policy.delay(attempt))
+        return None
+
+    async def download_images(self, image_urls, page_url):
+        """
+        Async counterpart of `PhDExamDownloader.download_images`
+        """
+        try:
+            downloader = self.downloader
+            entries = [await self._completed_download(img_url) for img_url in image_urls]
+            folder_path, done, paths = downloader._plan_image_set(image_urls, page_url, entries)
+
+            slots = asyncio.Semaphore(downloader.image_workers)
+            start = time.monotonic()
+            sizes = await asyncio.gather(*[
+                self._download_image(i, len(image_urls), image_urls[i], paths[i], page_url, slots)
+                for i in paths
+            ])
+            return downloader._finish_image_set(image_urls, page_url, folder_path, done, paths, sizes,
+                                                time.monotonic() - start)
+
+        except Exception as e:
+            print(f"Error downloading images for {page_url}: {e}")
+            return False
+
+    async def extract_content_with_selenium(self, page_url):
+        """
+        Render a page with the downloader's browser pool off the event loop
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.downloader.extract_content_with_selenium, page_url)
+
+    async def extract_content(self, page_url):
+        """
+        Async counterpart of `PhDExamDownloader.extract_content`
+
+        Returns:
+            tuple: (content info dict or None, the statically fetched Page or None)
+        """
+        return await self._run_steps(self.downloader._extract_steps(page_url))
+
+    async def process_page(self, page_url):
+        """
+        Async counterpart of `PhDExamDownloader.process_page`
+        """
+        return await self._run_steps(self.downloader._page_steps(page_url))
+
+    async def _run_steps(self, steps):
+        """
+        Async counterpart of `PhDExamDownloader._run_steps`: each step is awaited on this backend
+        """
+        result, error = None, None
+        while True:
+            try:
+                step = steps.throw(error) if error else steps.send(result)
+            except StopIteration as done:
+                return done.value
+            result, error = None, None
+            try:
+                result = await getattr(self, step[0])(*step[1:])
+            except Exception as e:
+                error = e
+
+    async def crawl(self):
+        """
+        Crawl the site with up to `downloader.workers` pages in flight
+
+        Returns:
+            tuple: (set of processed page URLs, number of successful downloads),
+                   or None if no exam page links were found
+        """
+        self.session = self._create_session()
+        try:
+            resumed = self.downloader._resumed_crawl()
+            if resumed is None:
+                with self.downloader.metrics.stage('discover'):
+                    initial_links = await self.get_exam_page_links()
+                if not initial_links:
+                    return None
+                resumed = (self.downloader._new_frontier(initial_links), 0)
+
+            frontier, successful_downloads = resumed
+            in_flight = {}
+
+            while frontier or in_flight:
+                while frontier and len(in_flight) < self.downloader.workers:
+                    page_url, depth = frontier.pop()
+                    in_flight[asyncio.ensure_future(self.process_page(page_url))] = (page_url, depth)
+
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                successful_downloads = self.downloader._collect_pages(done, in_flight, frontier,
+                                                                      successful_downloads)
+
+            self.downloader._end_crawl(frontier, successful_downloads)
+            return frontier.visited, successful_downloads
+        finally:
+            await self.session.close()
+            self.session = None
+
+    def run(self):
+        """
+        Run the async crawl to completion from synchronous code
+        """
+        return asyncio.run(self.crawl())
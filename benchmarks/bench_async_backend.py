@@ -0,0 +1,68 @@
+"""
+Compare the throughput of the sync (requests) and async (aiohttp) backends.
+
+The backends crawl the same local stand-in site: the serial sync crawl (the
+default), the threaded sync crawl and the async crawl, the last two with the
+same number of pages in flight. Run from the repository root:
+
+    python benchmarks/bench_async_backend.py --pages 40 --workers 8
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from download_exams import PhDExamDownloader  # noqa: E402
+from local_site import LocalSite  # noqa: E402
+
+
+def crawl(site, backend, workers, max_per_host):
+    with tempfile.TemporaryDirectory() as folder:
+        downloader = PhDExamDownloader(site.listing_url, folder, use_selenium=False,
+                                       workers=workers, politeness_delay=0,
+                                       max_per_host=max_per_host, backend=backend)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            downloader.run()
+        elapsed = time.perf_counter() - start
+        files = [f for f in os.listdir(folder) if f.endswith('.pdf')]
+        size = sum(os.path.getsize(os.path.join(folder, f)) for f in files)
+    return elapsed, len(files), size
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the sync and async download backends')
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--pdf-size', type=int, default=2 * 1024 * 1024)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--bandwidth', type=int, default=8 * 1024 * 1024,
+                        help='Bytes per second per connection')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--max-per-host', type=int, default=16)
+    args = parser.parse_args()
+
+    with LocalSite(args.pages, args.pdf_size, args.latency, args.bandwidth) as site:
+        modes = [
+            ('sync-serial', 'sync', 1),
+            (f'sync-x{args.workers}', 'sync', args.workers),
+            (f'async-x{args.workers}', 'async', args.workers),
+        ]
+        print(f"{'mode':<12} {'seconds':>8} {'files':>6} {'pages/s':>8} {'MB/s':>8}")
+        results = {}
+        for name, backend, workers in modes:
+            elapsed, files, size = crawl(site, backend, workers, args.max_per_host)
+            results[name] = elapsed
+            print(f"{name:<12} {elapsed:>8.2f} {files:>6} {args.pages / elapsed:>8.2f} "
+                  f"{size / elapsed / 1e6:>8.2f}")
+        baseline = results['sync-serial']
+        for name, elapsed in results.items():
+            print(f"{name}: {baseline / elapsed:.2f}x vs sync-serial")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+End-to-end crawl benchmark: `PhDExamDownloader.run` against a local site.
+
+A local stand-in of the sahla-dz site (listing page, hub pages with nested
+exam pages, gview-embedded PDFs and scanned image galleries) is served with
+the given latency and bandwidth. Each mode crawls it from scratch in its own
+process, so the peak RSS reported is that of the mode alone. Pages/s counts
+every page processed; MB/s counts the bytes of every file saved. Run from
+the repository root:
+
+    python benchmarks/bench_e2e.py
+    python benchmarks/bench_e2e.py --pages 40 --hubs 4 --galleries 4 --pdf-size 8000000 --modes sync-serial,async-x8
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_site import LocalSite  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Mode name -> (backend, workers); 'xN' modes take their worker count from --workers
+MODES = {
+    'sync-serial': ('sync', 1),
+    'sync-xN': ('sync', None),
+    'async-xN': ('async', None),
+}
+
+
+def peak_rss():
+    """
+    Returns:
+        int: Peak resident set size of this process in bytes, or None if it cannot be read
+    """
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Kilobytes on Linux, bytes on macOS
+        return peak if sys.platform == 'darwin' else peak * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return getattr(psutil.Process().memory_info(), 'peak_wset', None)
+
+
+def crawl(listing_url, backend, workers, max_per_host):
+    """
+    Crawl the site once into a fresh folder; runs in the child process
+
+    Returns:
+        dict: Seconds, pages processed, files and bytes saved, peak RSS
+    """
+    from download_exams import PhDExamDownloader
+
+    with tempfile.TemporaryDirectory() as folder:
+        downloader = PhDExamDownloader(listing_url, folder, use_selenium=False, workers=workers,
+                                       politeness_delay=0, max_per_host=max_per_host, backend=backend)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            downloader.run()
+        elapsed = time.perf_counter() - start
+        files = size = 0
+        for root, dirs, names in os.walk(folder):
+            dirs[:] = [name for name in dirs if not name.startswith('.')]
+            for name in names:
+                if name.endswith(('.pdf', '.jpg')):
+                    files += 1
+                    size += os.path.getsize(os.path.join(root, name))
+        pages = sum(downloader.tiers.served.values())
+    return {'seconds': elapsed, 'pages': pages, 'files': files, 'bytes': size, 'peak_rss': peak_rss()}
+
+
+def run_mode(listing_url, backend, workers, max_per_host):
+    command = [sys.executable, os.path.abspath(__file__), '--child', listing_url, backend, str(workers), str(max_per_host)]
+    output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        listing_url, backend, workers, max_per_host = sys.argv[2:6]
+        print(json.dumps(crawl(listing_url, backend, int(workers), int(max_per_host))))
+        return
+
+    parser = argparse.ArgumentParser(description='Benchmark complete crawls against a local copy of the site')
+    parser.add_argument('--pages', type=int, default=20, help='Exam pages with an embedded PDF')
+    parser.add_argument('--hubs', type=int, default=3, help='Hub pages linking to nested exam pages')
+    parser.add_argument('--children', type=int, default=5, help='Nested exam pages per hub')
+    parser.add_argument('--galleries', type=int, default=3, help='Exam pages published as scanned images')
+    parser.add_argument('--gallery-images', type=int, default=10)
+    parser.add_argument('--pdf-size', type=int, default=4 * 1024 * 1024)
+    parser.add_argument('--image-size', type=int, default=300 * 1024)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--bandwidth', type=int, default=16 * 1024 * 1024,
+                        help='Bytes per second per connection (0 for unlimited)')
+    parser.add_argument('--minimal-pages', action='store_true',
+                        help='Serve bare pages instead of full WordPress posts')
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--max-per-host', type=int, default=16)
+    parser.add_argument('--modes', type=str, default=','.join(MODES),
+                        help=f"Comma-separated modes among {', '.join(MODES)}")
+    args = parser.parse_args()
+
+    site = LocalSite(args.pages, args.pdf_size, args.latency, args.bandwidth or None, hubs=args.hubs,
+                     children=args.children, galleries=args.galleries, gallery_images=args.gallery_images,
+                     image_size=args.image_size, full_pages=not args.minimal_pages)
+    with site:
+        print(f"{site.page_count} pages, {site.file_count} files, latency {args.latency * 1000:.0f} ms")
+        print(f"{'mode':<12} {'seconds':>8} {'pages':>6} {'files':>6} {'pages/s':>8} {'MB/s':>8} {'peak RSS MB':>12}")
+        for mode in args.modes.split(','):
+            backend, workers = MODES[mode]
+            workers = workers or args.workers
+            result = run_mode(site.listing_url, backend, workers, args.max_per_host)
+            seconds = result['seconds']
+            rss = f"{result['peak_rss'] / 1e6:.1f}" if result['peak_rss'] else 'n/a'
+            name = mode.replace('xN', f'x{workers}')
+            print(f"{name:<12} {seconds:>8.2f} {result['pages']:>6} {result['files']:>6} "
+                  f"{result['pages'] / seconds:>8.2f} {result['bytes'] / seconds / 1e6:>8.2f} {rss:>12}")
+            if result['pages'] != site.page_count or result['files'] != site.file_count:
+                print(f"  incomplete crawl: expected {site.page_count} pages and {site.file_count} files")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+"""
+Micro-benchmark of content extraction over a corpus of scanned pages.
+
+Pages are scanned once up front, so only extraction is timed. 'rules' is the
+precompiled rule engine shared by both tiers; 'legacy' reproduces the
+previous per-tier code (a regex compiled per iframe, list-based
+de-duplication) for comparison. Run from the repository root:
+
+    python benchmarks/bench_extraction.py --rounds 200
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import urllib.parse
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extraction_rules import RuleEngine  # noqa: E402
+from fixtures import LAYOUTS, load_fixtures, wordpress_page  # noqa: E402
+from page_scan import scan_html  # noqa: E402
+
+
+def legacy_extract(scan, page_url):
+    result = {'type': None, 'urls': []}
+    is_viewer = lambda s: s and ('docs.google.com/gview' in s or 'docs.google.com/viewer' in s or 'drive.google.com' in s)
+    iframe_srcs = [iframe['src'] for iframe in scan.iframes if is_viewer(iframe.get('src'))]
+    if not iframe_srcs:
+        iframe_srcs = [iframe['data-src'] for iframe in scan.iframes if is_viewer(iframe.get('data-src'))]
+    for iframe_src in iframe_srcs:
+        url_param = re.search(r'url=([^&]+)', iframe_src)
+        if url_param:
+            pdf_url = urllib.parse.unquote(url_param.group(1))
+            if pdf_url not in result['urls']:
+                result['type'] = 'pdf'
+                result['urls'].append(pdf_url)
+            continue
+        if 'docs.google.com/viewer' in iframe_src and 'srcid=' in iframe_src:
+            pdf_url = f"https://drive.google.com/uc?export=download&id={iframe_src.split('srcid=')[1].split('&')[0]}"
+            if pdf_url not in result['urls']:
+                result['type'] = 'pdf'
+                result['urls'].append(pdf_url)
+            continue
+        drive_match = re.search(r'drive\.google\.com/file/d/([a-zA-Z0-9_-]+)', iframe_src)
+        if drive_match:
+            pdf_url = f'https://drive.google.com/uc?export=download&id={drive_match.group(1)}'
+            if pdf_url not in result['urls']:
+                result['type'] = 'pdf'
+                result['urls'].append(pdf_url)
+    if result['urls']:
+        return result
+    if scan.has_viewer or scan.images:
+        result['type'] = 'images'
+        for img in scan.viewer_images:
+            img_url = urljoin(page_url, img['src'])
+            if img_url not in result['urls']:
+                result['urls'].append(img_url)
+        for img in scan.images:
+            try:
+                large = (img.get('width') and int(img['width']) > 200) or (img.get('height') and int(img['height']) > 200)
+            except (ValueError, TypeError):
+                large = True
+            if large:
+                img_url = urljoin(page_url, img['src'])
+                if img_url not in result['urls']:
+                    result['urls'].append(img_url)
+    if result['urls']:
+        return result
+    if scan.download_links:
+        return {'type': 'pdf', 'urls': [urljoin(page_url, scan.download_links[0])]}
+    pdf_links = [href for href in scan.links if href.lower().endswith('.pdf')]
+    if pdf_links:
+        return {'type': 'pdf', 'urls': [urljoin(page_url, pdf_links[0])]}
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark content extraction over scanned pages')
+    parser.add_argument('--fixtures', type=str, default=None,
+                        help='Folder of saved .html pages or recorded .warc.gz archive (default: synthetic WordPress pages)')
+    parser.add_argument('--per-layout', type=int, default=4)
+    parser.add_argument('--image-pages', type=int, default=300,
+                        help='Scanned pages of the extra large image set in the corpus')
+    parser.add_argument('--rounds', type=int, default=200)
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures, args.per_layout)
+    if not args.fixtures:
+        pages.append(("https://lmd.sahla-dz.com/sujets-doctorat-long-scan/",
+                      wordpress_page('images', len(LAYOUTS), image_pages=args.image_pages)))
+    corpus = [(url, scan_html(html)) for url, html in pages]
+    engine = RuleEngine()
+    extractors = {'legacy': legacy_extract, 'rules': engine.extract}
+
+    print(f"{len(corpus)} pages, {args.rounds} rounds")
+    print(f"{'extractor':<10} {'us/page':>8} {'speedup':>8}  found")
+    timings = {}
+    for name, extract in extractors.items():
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            results = [extract(scan, url) for url, scan in corpus]
+        elapsed = (time.perf_counter() - start) / args.rounds
+        timings[name] = elapsed
+        found = sum(1 for result in results if result)
+        print(f"{name:<10} {elapsed / len(corpus) * 1e6:>8.1f} {timings['legacy'] / elapsed:>7.2f}x  {found}/{len(corpus)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare the HTML parsers behind content extraction.
+
+Each parser parses every fixture page and runs content extraction and
+sub-link discovery on it, as the static tier does. 'html.parser' is the
+full BeautifulSoup tree the extractor used to build; 'fast' is the streaming
+scan; 'lxml' is only measured when lxml is installed. Run from the
+repository root:
+
+    python benchmarks/bench_parsers.py --rounds 5
+    python benchmarks/bench_parsers.py --fixtures saved_pages/
+    python benchmarks/bench_parsers.py --fixtures crawl.warc.gz
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from download_exams import PhDExamDownloader  # noqa: E402
+from fixtures import load_fixtures  # noqa: E402
+from page import Page  # noqa: E402
+from page_scan import PARSERS, etree  # noqa: E402
+
+
+def extract_all(downloader, pages, parser):
+    results = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for url, html in pages:
+            page = Page(url, html, parser=parser)
+            results.append((downloader.extract_content_from_page(page), downloader._find_sub_pages(page)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the HTML parsers used for content extraction')
+    parser.add_argument('--fixtures', type=str, default=None,
+                        help='Folder of saved .html pages or recorded .warc.gz archive (default: synthetic WordPress pages)')
+    parser.add_argument('--per-layout', type=int, default=4,
+                        help='Synthetic pages per layout')
+    parser.add_argument('--rounds', type=int, default=5)
+    args = parser.parse_args()
+
+    pages = load_fixtures(args.fixtures, args.per_layout)
+    megabytes = sum(len(html.encode('utf-8')) for _, html in pages) / 1e6
+    parsers = [name for name in PARSERS if name != 'lxml' or etree is not None]
+    print(f"{len(pages)} pages, {megabytes:.1f} MB, {args.rounds} rounds")
+
+    with tempfile.TemporaryDirectory() as folder:
+        downloader = PhDExamDownloader('https://lmd.sahla-dz.com/', folder, use_selenium=False,
+                                       use_manifest=False, use_cache=False)
+        reference = extract_all(downloader, pages, 'html.parser')
+        print(f"{'parser':<12} {'ms/page':>8} {'MB/s':>8} {'speedup':>8}  same results")
+        timings = {}
+        for name in ['html.parser'] + [name for name in parsers if name != 'html.parser']:
+            start = time.perf_counter()
+            for _ in range(args.rounds):
+                results = extract_all(downloader, pages, name)
+            elapsed = (time.perf_counter() - start) / args.rounds
+            timings[name] = elapsed
+            print(f"{name:<12} {elapsed / len(pages) * 1000:>8.2f} {megabytes / elapsed:>8.2f} "
+                  f"{timings['html.parser'] / elapsed:>7.2f}x  {results == reference}")
+
+
+if __name__ == '__main__':
+    main()
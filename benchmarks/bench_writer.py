@@ -0,0 +1,85 @@
+"""
+CPU cost of saving downloads to disk, per gigabyte.
+
+A local server streams a large file; each writer saves it `--rounds` times
+to a temporary folder while the CPU time of the downloading thread is
+measured, so the server's own work is not counted. 'legacy' reproduces the
+previous writer (iter_content in 8 KB chunks, one write and hash update per
+chunk); 'block' is `stream_writer.write_response`. Run from the repository
+root:
+
+    python benchmarks/bench_writer.py --size-mb 512 --rounds 3
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from local_site import LocalSite  # noqa: E402
+from stream_writer import write_response  # noqa: E402
+
+
+def legacy_write(response, filepath, offset=0, expected_size=None, reserve=False):
+    digest = hashlib.sha256()
+    size = 0
+    with open(filepath, 'wb') as f:
+        for chunk in response.iter_content(chunk_size=8192):
+            if chunk:
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+    return size, digest.hexdigest()
+
+
+WRITERS = {
+    'legacy': legacy_write,
+    'block': write_response,
+    'block+reserve': lambda response, filepath, offset=0, expected_size=None: write_response(
+        response, filepath, offset, expected_size, reserve=True),
+}
+
+
+def save(session, url, writer, folder):
+    response = session.get(url, stream=True)
+    response.raise_for_status()
+    expected = int(response.headers['Content-Length'])
+    cpu = time.thread_time()
+    wall = time.perf_counter()
+    size, sha256 = writer(response, os.path.join(folder, 'exam.pdf'), 0, expected)
+    return time.thread_time() - cpu, time.perf_counter() - wall, size, sha256
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the CPU cost of writing downloads to disk')
+    parser.add_argument('--size-mb', type=int, default=256)
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    with LocalSite(pages=1, pdf_size=size, latency=0) as site, tempfile.TemporaryDirectory() as folder:
+        url = f"{site.base_url}/files/exam-0.pdf"
+        session = requests.Session()
+        print(f"{args.size_mb} MB file, {args.rounds} rounds")
+        print(f"{'writer':<14} {'CPU s/GB':>9} {'MB/s':>8} {'CPU vs legacy':>14}  sha256")
+        baseline = None
+        for name, writer in WRITERS.items():
+            cpu = wall = 0.0
+            for _ in range(args.rounds):
+                round_cpu, round_wall, written, sha256 = save(session, url, writer, folder)
+                assert written == size, f"{name} wrote {written} of {size} bytes"
+                cpu += round_cpu
+                wall += round_wall
+            gigabytes = size * args.rounds / 1024 ** 3
+            baseline = baseline or cpu
+            print(f"{name:<14} {cpu / gigabytes:>9.2f} {size * args.rounds / wall / 1e6:>8.1f} "
+                  f"{cpu / baseline:>13.2f}x  {sha256[:12]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+Synthetic copies of sahla-dz WordPress pages, used by the parsing benchmarks.
+
+Each page carries the bulk of a real post (theme scripts and styles, menus,
+sidebar widgets, related posts, comments) around a content area in one of
+the layouts the extractor handles. Saved pages can be benchmarked too, see
+`load_fixtures`.
+"""
+import glob
+import os
+
+LAYOUTS = ('gview', 'gview-data-src', 'drive', 'viewer-srcid', 'images', 'download-button', 'pdf-link', 'hub')
+
+
+def _content(layout, index, image_pages):
+    if layout == 'gview':
+        return (f'<iframe src="https://docs.google.com/gview?embedded=true&amp;url='
+                f'https://lmd.sahla-dz.com/wp-content/uploads/2023/05/exam-{index}.pdf" width="100%" height="800"></iframe>')
+    if layout == 'gview-data-src':
+        return (f'<iframe class="lazyload" data-src="//docs.google.com/gview?embedded=true&amp;url='
+                f'https://lmd.sahla-dz.com/wp-content/uploads/2023/05/exam-{index}.pdf"></iframe>')
+    if layout == 'drive':
+        return f'<iframe src="https://drive.google.com/file/d/1AbC{index:06d}xyz_-Q/preview" width="640"></iframe>'
+    if layout == 'viewer-srcid':
+        return f'<iframe src="https://docs.google.com/viewer?srcid=1XyZ{index:06d}&amp;pid=explorer&amp;embedded=true"></iframe>'
+    if layout == 'images':
+        pages = ''.join(f'<img src="/wp-content/uploads/2023/05/exam-{index}-page-{page}.jpg" width="900" height="1270">'
+                        for page in range(1, image_pages + 1))
+        return f'<div class="ndfHFb-c4YZDc-cYSp0e-DARUcf-PLDbbf">{pages}</div>'
+    if layout == 'download-button':
+        return (f'<p>Téléchargez le sujet :</p><a href="/telechargement/exam-{index}.pdf?dl=1">'
+                f'<button class="btn">Download</button></a>')
+    if layout == 'pdf-link':
+        return f'<p>Le sujet en PDF : <a href="/wp-content/uploads/2023/05/Sujet-{index}.PDF">ici</a></p>'
+    return ''.join(f'<li><a href="https://lmd.sahla-dz.com/sujets-doctorat-{index}-{sub}/">Sujet doctorat {sub}</a></li>'
+                   for sub in range(30))
+
+
+def wordpress_page(layout, index=0, related=24, comments=30, image_pages=8, content=None):
+    """
+    Build the HTML of an exam post
+
+    Args:
+        layout (str): One of LAYOUTS
+        index (int): Number making the page's URLs unique
+        related (int): Related posts listed under the article
+        comments (int): Comments under the article
+        image_pages (int): Scanned pages of the 'images' layout
+        content (str): HTML of the content area, replacing the one of `layout`
+
+    Returns:
+        str: Page HTML (about 40 KB with the defaults)
+    """
+    scripts = ''.join(f'<script src="/wp-includes/js/script-{i}.js?ver=6.2"></script>'
+                      f'<link rel="stylesheet" href="/wp-content/themes/Newspaper/style-{i}.css">' for i in range(25))
+    inline = '<script>var tdBlocksArray = [];' + 'tdLocalCache.data["td_%d"] = {"id": %d};' % (index, index) * 60 + '</script>'
+    menu = ''.join(f'<li class="menu-item menu-item-{i}"><a href="https://lmd.sahla-dz.com/category/section-{i}/">'
+                   f'<span>Section {i}</span></a></li>' for i in range(80))
+    sidebar = ''.join(f'<div class="td_module_6 td_module_wrap"><div class="td-module-thumb">'
+                      f'<a href="https://lmd.sahla-dz.com/article-{i}/"><img width="100" height="70" '
+                      f'src="/wp-content/uploads/thumb-{i}-100x70.jpg" alt=""></a></div>'
+                      f'<h3 class="entry-title"><a href="https://lmd.sahla-dz.com/article-{i}/">Article {i}</a></h3></div>'
+                      for i in range(related))
+    comment_list = ''.join(f'<li class="comment"><div class="comment-meta"><img src="/avatar-{i}.png" width="50" height="50">'
+                           f'<cite>Visiteur {i}</cite></div><p>Merci beaucoup pour ce sujet &amp; la correction ! '
+                           f'<a href="#comment-{i}" rel="nofollow">Répondre</a></p></li>' for i in range(comments))
+    return (
+        f'<!DOCTYPE html><html lang="fr"><head><meta charset="UTF-8"><title>Sujet {index}</title>{scripts}{inline}</head>'
+        f'<body class="post-template-default single single-post"><div id="td-outer-wrap">'
+        f'<div class="td-header-wrap"><ul class="sf-menu">{menu}</ul></div>'
+        f'<div class="td-main-content-wrap"><article><h1 class="entry-title">Sujets des concours doctorat {index}</h1>'
+        f'<div class="td-post-content tagdiv-type"><p>Sujets du concours d\'accès au doctorat, session {2000 + index % 24}.<br>'
+        f'Bonne chance à tous.</p>{content or _content(layout, index, image_pages)}</div></article>'
+        f'<div class="td-related-row">{sidebar}</div><ol class="comment-list">{comment_list}</ol></div>'
+        f'<div class="td-sidebar">{sidebar}</div><footer><p>&copy; sahla-dz.com</p></footer></div></body></html>'
+    )
+
+
+def load_fixtures(folder=None, per_layout=4):
+    """
+    Collect the pages to benchmark
+
+    Args:
+        folder (str): Folder of saved `.html` pages, or archive recorded with `--record`,
+                      to use instead of the synthetic pages
+        per_layout (int): Synthetic pages generated per layout
+
+    Returns:
+        list: (url, html) pairs
+    """
+    if folder and os.path.isfile(folder):
+        from capture import CaptureReader
+
+        reader = CaptureReader(folder)
+        pages = []
+        for url in reader.urls():
+            response = reader.response(url)
+            if response.status_code == 200 and 'text/html' in response.headers.get('Content-Type', ''):
+                pages.append((url, response.text))
+        return pages
+    if folder:
+        pages = []
+        for path in sorted(glob.glob(os.path.join(folder, '*.html'))):
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                pages.append((f"https://lmd.sahla-dz.com/{os.path.basename(path)[:-5]}/", f.read()))
+        return pages
+    return [(f"https://lmd.sahla-dz.com/sujets-doctorat-{layout}-{i}/", wordpress_page(layout, i))
+            for layout in LAYOUTS for i in range(per_layout)]
@@ -0,0 +1,178 @@
+"""
+Local HTTP stand-in for a sahla-dz exam listing, used by the benchmarks.
+
+The site has one listing page linking to `pages` exam pages. Each exam page
+embeds a Google Docs viewer iframe pointing at a PDF served by the same
+server. The listing can also link to `hubs` hub pages, whose content area
+only links to `children` nested exam pages, and to `galleries` exam pages
+published as `gallery_images` scanned JPEG pages. With `full_pages`, every
+page carries the bulk of a real WordPress post around its content. Every
+response is delayed by `latency` seconds and bodies are sent at most at
+`bandwidth` bytes per second per connection.
+"""
+import re
+import threading
+import time
+
+from fixtures import wordpress_page
+from local_server import LocalServer, QuietHandler
+from page_scan import VIEWER_CLASS
+
+LISTING_PATH = '/sujets-concours-doctorat-informatique/'
+ROUTES = (
+    ('exam', re.compile(r'/sujets-doctorat-exam-(\d+)/$')),
+    ('hub', re.compile(r'/sujets-doctorat-hub-(\d+)/$')),
+    ('nested', re.compile(r'/sujets-doctorat-hub-(\d+)-exam-(\d+)/$')),
+    ('gallery', re.compile(r'/sujets-doctorat-scans-(\d+)/$')),
+    ('pdf', re.compile(r'/files/(exam-\d+|hub-\d+-exam-\d+)\.pdf$')),
+    ('image', re.compile(r'/files/scans-(\d+)/page-(\d+)\.jpg$')),
+)
+
+
+class LocalSite:
+    def __init__(self, pages=20, pdf_size=256 * 1024, latency=0.05, bandwidth=None, hubs=0, children=5,
+                 galleries=0, gallery_images=8, image_size=200 * 1024, full_pages=False):
+        """
+        Args:
+            pages (int): Number of exam pages on the listing
+            pdf_size (int): Size in bytes of each PDF
+            latency (float): Delay in seconds before each response
+            bandwidth (int): Maximum bytes per second per connection (None for unlimited)
+            hubs (int): Number of hub pages on the listing
+            children (int): Nested exam pages linked from each hub
+            galleries (int): Number of scanned exam pages on the listing
+            gallery_images (int): Scanned pages of each gallery
+            image_size (int): Size in bytes of each scanned page
+            full_pages (bool): Whether pages carry WordPress chrome (menus, sidebar, comments) around the content
+        """
+        self.pages = pages
+        self.pdf_size = pdf_size
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.hubs = hubs
+        self.children = children
+        self.galleries = galleries
+        self.gallery_images = gallery_images
+        self.image_size = image_size
+        self.full_pages = full_pages
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = LocalServer(self._handler())
+
+    @property
+    def base_url(self):
+        return self._server.base_url
+
+    @property
+    def listing_url(self):
+        return self.base_url + LISTING_PATH
+
+    @property
+    def page_count(self):
+        """Exam, hub and gallery pages a complete crawl processes"""
+        return self.pages + self.hubs * (1 + self.children) + self.galleries
+
+    @property
+    def file_count(self):
+        """PDFs and images a complete crawl downloads"""
+        return self.pages + self.hubs * self.children + self.galleries * self.gallery_images
+
+    def _listing(self):
+        paths = [f"/sujets-doctorat-exam-{i}/" for i in range(self.pages)]
+        paths += [f"/sujets-doctorat-hub-{i}/" for i in range(self.hubs)]
+        paths += [f"/sujets-doctorat-scans-{i}/" for i in range(self.galleries)]
+        links = "\n".join(f'<a href="{path}">Sujets doctorat {path.strip("/")}</a>' for path in paths)
+        return f"<html><body>{links}</body></html>".encode()
+
+    def _page(self, index, content):
+        if self.full_pages:
+            return wordpress_page(None, index, content=content).encode()
+        return f'<html><body><div class="td-post-content">{content}</div></body></html>'.encode()
+
+    def _gview(self, name):
+        pdf_url = f"{self.base_url}/files/{name}.pdf"
+        return f'<iframe data-src="//docs.google.com/gview?embedded=true&amp;url={pdf_url}"></iframe>'
+
+    def _pdf(self, name):
+        header = f"%PDF-1.4\n% {name}\n".encode()
+        return header + b"0" * max(0, self.pdf_size - len(header))
+
+    def _jpeg(self, gallery, page):
+        # SOI and a JFIF APP0 segment, padding, EOI: enough to pass for a JPEG
+        header = b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+        marker = f"scan {gallery}-{page}".encode()
+        return header + marker + b"\x00" * max(0, self.image_size - len(header) - len(marker) - 2) + b'\xff\xd9'
+
+    def route(self, path):
+        """
+        Return (status, content type, body) for a request path
+        """
+        if path == LISTING_PATH:
+            return 200, 'text/html; charset=utf-8', self._listing()
+        for kind, pattern in ROUTES:
+            match = pattern.match(path)
+            if match:
+                break
+        else:
+            return 404, 'text/plain', b'not found'
+        if kind == 'exam':
+            index = int(match.group(1))
+            return 200, 'text/html; charset=utf-8', self._page(index, self._gview(f"exam-{index}"))
+        if kind == 'hub':
+            hub = int(match.group(1))
+            links = ''.join(f'<li><a href="{self.base_url}/sujets-doctorat-hub-{hub}-exam-{child}/">Sujet {child}</a></li>'
+                            for child in range(self.children))
+            return 200, 'text/html; charset=utf-8', self._page(hub, f'<ul>{links}</ul>')
+        if kind == 'nested':
+            hub, child = int(match.group(1)), int(match.group(2))
+            return 200, 'text/html; charset=utf-8', self._page(child, self._gview(f"hub-{hub}-exam-{child}"))
+        if kind == 'gallery':
+            gallery = int(match.group(1))
+            images = ''.join(f'<img src="/files/scans-{gallery}/page-{page}.jpg" width="900" height="1270">'
+                             for page in range(self.gallery_images))
+            return 200, 'text/html; charset=utf-8', self._page(gallery, f'<div class="{VIEWER_CLASS}">{images}</div>')
+        if kind == 'pdf':
+            return 200, 'application/pdf', self._pdf(match.group(1))
+        return 200, 'image/jpeg', self._jpeg(int(match.group(1)), int(match.group(2)))
+
+    def _handler(self):
+        site = self
+
+        class Handler(QuietHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                if site.latency:
+                    time.sleep(site.latency)
+                status, content_type, body = site.route(self.path.split('?', 1)[0])
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self._send_body(body)
+
+            def _send_body(self, body):
+                if not site.bandwidth:
+                    self.wfile.write(body)
+                    return
+                chunk = max(1024, site.bandwidth // 20)
+                for start in range(0, len(body), chunk):
+                    self.wfile.write(body[start:start + chunk])
+                    time.sleep(chunk / site.bandwidth)
+
+        return Handler
+
+    def start(self):
+        self._server.start()
+        return self
+
+    def stop(self):
+        self._server.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
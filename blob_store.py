@@ -0,0 +1,122 @@
+import os
+import shutil
+import threading
+
+
+class BlobStore:
+    """
+    Content-addressed store that keeps each unique downloaded file once.
+
+    Blobs live under `folder/<first two hex digits>/<sha256>`. The
+    human-readable files in the destination folder are hard links to their
+    blob, so identical exams found under several pages or Drive IDs share one
+    copy on disk. On filesystems without hard links the blob is copied
+    instead, which still avoids repeat transfers but not disk use.
+    """
+
+    def __init__(self, folder):
+        """
+        Args:
+            folder (str): Directory holding the blobs
+        """
+        self.folder = folder
+        self.stats = {'duplicates': 0, 'disk_bytes_saved': 0, 'restored': 0, 'transfer_bytes_saved': 0}
+        self._lock = threading.Lock()
+        os.makedirs(self.folder, exist_ok=True)
+
+    def blob_path(self, sha256):
+        return os.path.join(self.folder, sha256[:2], sha256)
+
+    def has(self, sha256):
+        return bool(sha256) and os.path.exists(self.blob_path(sha256))
+
+    def _link(self, source, target):
+        """
+        Atomically make `target` a hard link to (or, failing that, a copy of) `source`
+        """
+        os.makedirs(os.path.dirname(target) or '.', exist_ok=True)
+        # Named after the process and thread: crawler processes sharing a work queue may share the folder
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.link"
+        try:
+            os.link(source, tmp_path)
+            linked = True
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+            linked = False
+        os.replace(tmp_path, target)
+        return linked
+
+    def add(self, path, sha256, size):
+        """
+        Put a freshly downloaded file in the store
+
+        If a blob with the same hash exists the file is replaced by a link to
+        it, otherwise the file becomes the blob.
+
+        Args:
+            path (str): Downloaded file
+            sha256 (str): Hex SHA-256 of the file
+            size (int): File size in bytes
+
+        Returns:
+            bool: True if the file was a duplicate of a stored blob
+        """
+        blob = self.blob_path(sha256)
+        with self._lock:
+            duplicate = os.path.exists(blob)
+            if not duplicate:
+                self._link(path, blob)
+        if not duplicate:
+            return False
+        if os.path.exists(path) and os.path.samefile(path, blob):
+            return True
+        linked = self._link(blob, path)
+        with self._lock:
+            self.stats['duplicates'] += 1
+            if linked:
+                self.stats['disk_bytes_saved'] += size
+        return True
+
+    def restore(self, sha256, path, size):
+        """
+        Recreate a file from its blob instead of downloading it again
+
+        Args:
+            sha256 (str): Hex SHA-256 of the wanted content
+            path (str): Where the file should appear
+            size (int): File size in bytes
+
+        Returns:
+            bool: True if the file was restored
+        """
+        if not self.has(sha256):
+            return False
+        self._link(self.blob_path(sha256), path)
+        with self._lock:
+            self.stats['restored'] += 1
+            self.stats['transfer_bytes_saved'] += size
+        return True
+
+    def discard(self, sha256):
+        """
+        Delete a blob whose content was found corrupt, so it is not restored again
+
+        Args:
+            sha256 (str): Hex SHA-256 the blob was stored under
+        """
+        try:
+            os.remove(self.blob_path(sha256))
+        except FileNotFoundError:
+            pass
+
+    def summary(self):
+        """
+        Returns:
+            str: Human readable deduplication report
+        """
+        with self._lock:
+            stats = dict(self.stats)
+        return (f"{stats['duplicates']} duplicate file(s), "
+                f"{stats['disk_bytes_saved'] / 1024 / 1024:.1f} MB of disk saved; "
+                f"{stats['restored']} file(s) restored from the store, "
+                f"{stats['transfer_bytes_saved'] / 1024 / 1024:.1f} MB of transfers avoided")
@@ -0,0 +1,274 @@
+import json
+import threading
+import time
+from urllib.parse import urlparse
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from extraction_rules import VIEWER_EMBED
+
+
+# Installs a MutationObserver on first use and reports what the page is doing.
+# Times are milliseconds relative to performance.now() in the page.
+READINESS_PROBE = """
+if (!window.__phdReadiness) {
+    window.__phdReadiness = {lastMutation: performance.now()};
+    new MutationObserver(function () {
+        window.__phdReadiness.lastMutation = performance.now();
+    }).observe(document, {subtree: true, childList: true, attributes: true});
+    window.scrollTo(0, document.body ? document.body.scrollHeight : 0);
+}
+var now = performance.now();
+var lastResource = 0;
+performance.getEntriesByType('resource').forEach(function (entry) {
+    lastResource = Math.max(lastResource, entry.responseEnd);
+});
+var viewer = Array.prototype.some.call(document.getElementsByTagName('iframe'), function (iframe) {
+    var src = (iframe.getAttribute('src') || '') + ' ' + (iframe.getAttribute('data-src') || '');
+    return new RegExp(VIEWER_EMBED).test(src);
+});
+return {
+    readyState: document.readyState,
+    sinceMutation: now - window.__phdReadiness.lastMutation,
+    sinceResource: now - lastResource,
+    viewer: viewer
+};
+""".replace('VIEWER_EMBED', json.dumps(VIEWER_EMBED))
+
+
+class AdaptiveTimeout:
+    """
+    Per-host render timeout that follows the latencies actually observed.
+
+    The timeout starts at `max_timeout` and then tracks an exponentially
+    weighted moving average of render latencies, scaled by `multiplier` and
+    clamped to [`min_timeout`, `max_timeout`].
+    """
+
+    def __init__(self, min_timeout=2.0, max_timeout=20.0, multiplier=3.0, smoothing=0.3):
+        self.min_timeout = min_timeout
+        self.max_timeout = max_timeout
+        self.multiplier = multiplier
+        self.smoothing = smoothing
+        self._averages = {}
+        self._lock = threading.Lock()
+
+    def timeout_for(self, url):
+        with self._lock:
+            average = self._averages.get(urlparse(url).netloc.lower())
+        if average is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, average * self.multiplier))
+
+    def observe(self, url, latency):
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            average = self._averages.get(host)
+            if average is None:
+                self._averages[host] = latency
+            else:
+                self._averages[host] = (1 - self.smoothing) * average + self.smoothing * latency
+
+
+class ReadinessLoader:
+    """
+    Page loader that waits for conditions instead of fixed sleeps.
+
+    After navigation the page is polled until one of these holds:
+      - 'viewer': a Google Docs/Drive viewer iframe has a `src` or `data-src`
+      - 'quiescent': the document is complete, and neither the DOM nor the
+        network (resource timing entries) changed for `quiet_period` seconds
+    If neither happens within the adaptive per-host timeout the page is
+    returned as-is with reason 'timeout'. Every render latency is recorded.
+    """
+
+    def __init__(self, quiet_period=0.5, poll_interval=0.1, timeout=None):
+        """
+        Args:
+            quiet_period (float): Seconds without DOM mutations or network activity that count as idle
+            poll_interval (float): Seconds between two readiness probes
+            timeout (AdaptiveTimeout): Timeout policy (a default one is created if omitted)
+        """
+        self.quiet_period = quiet_period
+        self.poll_interval = poll_interval
+        self.timeout = timeout or AdaptiveTimeout()
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    def _probe(self, driver):
+        state = driver.execute_script(READINESS_PROBE) or {}
+        quiet_ms = self.quiet_period * 1000
+        if state.get('viewer'):
+            return 'viewer'
+        if (state.get('readyState') == 'complete'
+                and state.get('sinceMutation', 0) >= quiet_ms
+                and state.get('sinceResource', 0) >= quiet_ms):
+            return 'quiescent'
+        return None
+
+    def __call__(self, driver, url):
+        start = time.monotonic()
+        timeout = self.timeout.timeout_for(url)
+        driver.get(url)
+
+        reason = 'timeout'
+        while True:
+            ready = self._probe(driver)
+            if ready:
+                reason = ready
+                break
+            if time.monotonic() - start >= timeout:
+                break
+            time.sleep(self.poll_interval)
+
+        latency = time.monotonic() - start
+        self.timeout.observe(url, latency)
+        with self._lock:
+            self.latencies.append((url, latency, reason))
+        print(f"Rendered {url} in {latency:.2f}s ({reason})")
+        return reason
+
+    def summary(self):
+        """
+        Summarize the recorded render latencies
+
+        Returns:
+            dict: Page count, total/mean/median/p95 latency in seconds and counts per ready reason,
+                  or None if nothing was rendered
+        """
+        with self._lock:
+            records = list(self.latencies)
+        if not records:
+            return None
+        latencies = sorted(latency for _, latency, _ in records)
+        reasons = {}
+        for _, _, reason in records:
+            reasons[reason] = reasons.get(reason, 0) + 1
+        return {
+            'pages': len(latencies),
+            'total': sum(latencies),
+            'mean': sum(latencies) / len(latencies),
+            'median': latencies[len(latencies) // 2],
+            'p95': latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))],
+            'reasons': reasons,
+        }
+
+
+class BrowserPool:
+    """
+    Pool of reusable headless browsers that render pages in parallel.
+
+    Drivers are created lazily up to `size`. A driver is recycled (quit and
+    replaced on next use) after `max_pages_per_driver` pages, or as soon as it
+    raises a WebDriverException, so a leaking or crashed Chrome does not stall
+    the crawl. `render` is safe to call from several threads at once.
+    """
+
+    def __init__(self, driver_factory, size=1, max_pages_per_driver=50, page_loader=None):
+        """
+        Args:
+            driver_factory (callable): Returns a new WebDriver instance
+            size (int): Maximum number of live drivers
+            max_pages_per_driver (int): Pages rendered by a driver before it is recycled
+            page_loader (callable): Called as page_loader(driver, url) to load a page
+                                    (defaults to a ReadinessLoader)
+        """
+        self.driver_factory = driver_factory
+        self.size = max(1, int(size))
+        self.max_pages_per_driver = max(1, int(max_pages_per_driver))
+        self.page_loader = page_loader or ReadinessLoader()
+        self._idle = []
+        self._available = threading.Condition()
+        self._live = 0
+        self._closed = False
+
+    def _acquire(self):
+        with self._available:
+            while not self._idle and self._live >= self.size:
+                self._available.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._live += 1
+        try:
+            return {'driver': self.driver_factory(), 'pages': 0}
+        except Exception:
+            with self._available:
+                self._live -= 1
+                self._available.notify()
+            raise
+
+    def _discard(self, entry):
+        with self._available:
+            self._live -= 1
+            self._available.notify()
+        try:
+            entry['driver'].quit()
+        except Exception as e:
+            print(f"Error closing Selenium WebDriver: {e}")
+
+    def _release(self, entry):
+        if self._closed:
+            self._discard(entry)
+        elif entry['pages'] >= self.max_pages_per_driver:
+            print(f"Recycling WebDriver after {entry['pages']} pages")
+            self._discard(entry)
+        else:
+            with self._available:
+                self._idle.append(entry)
+                self._available.notify()
+
+    def warm_up(self):
+        """
+        Start one driver now so configuration errors surface before the crawl
+        """
+        self._release(self._acquire())
+
+    def render(self, url, retries=1):
+        """
+        Load a page in one of the pooled browsers and return the rendered HTML
+
+        Args:
+            url (str): URL of the page
+            retries (int): How many times to retry on a fresh driver after a crash
+
+        Returns:
+            str: HTML of the page after JavaScript execution
+        """
+        for attempt in range(retries + 1):
+            entry = self._acquire()
+            try:
+                self.page_loader(entry['driver'], url)
+                html = entry['driver'].page_source
+            except TimeoutException:
+                self._release(entry)
+                raise
+            except WebDriverException as e:
+                print(f"WebDriver crashed on {url}, recycling it: {e}")
+                self._discard(entry)
+                if attempt == retries:
+                    raise
+                continue
+            except Exception:
+                self._release(entry)
+                raise
+            entry['pages'] += 1
+            self._release(entry)
+            return html
+
+    def render_summary(self):
+        """
+        Render latency summary of the page loader, if it records one
+        """
+        summary = getattr(self.page_loader, 'summary', None)
+        return summary() if summary else None
+
+    def close(self):
+        """
+        Quit every idle driver; drivers still in use are quit when released
+        """
+        with self._available:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for entry in idle:
+            self._discard(entry)
+        return len(idle)
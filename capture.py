@@ -0,0 +1,335 @@
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+import zlib
+from datetime import datetime, timezone
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+# Headers describing how the body travelled, not the body stored in the archive
+TRANSFER_HEADERS = ('content-encoding', 'transfer-encoding', 'content-length')
+# Streamed bodies are spooled to a temporary file past this size while they are recorded
+SPOOL_LIMIT = 1024 * 1024
+BLOCK_SIZE = 64 * 1024
+
+
+class _RecordedBody(io.RawIOBase):
+    """
+    Decoded body of a streamed response, copied to a spool file as the caller reads it.
+
+    `on_end(spool, size)` is called once the body has been read to its end. A
+    body closed before its end, such as a full answer dropped to resume a
+    download with a Range request, is discarded without being read further.
+    """
+
+    def __init__(self, response, on_end):
+        raw = self._raw = response.raw
+        # Read the connection itself: iter_content would read this object once it replaces `response.raw`
+        if hasattr(raw, 'stream'):
+            self._chunks = raw.stream(BLOCK_SIZE, decode_content=True)
+        else:
+            self._chunks = iter(lambda: raw.read(BLOCK_SIZE), b'')
+        self._pending = memoryview(b'')
+        self._spool = tempfile.SpooledTemporaryFile(SPOOL_LIMIT)
+        self._on_end = on_end
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._pending:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                self._end()
+                return 0
+            if self._spool:
+                self._spool.write(chunk)
+            self._pending = memoryview(chunk)
+        read = min(len(buffer), len(self._pending))
+        buffer[:read] = self._pending[:read]
+        self._pending = self._pending[read:]
+        return read
+
+    def _end(self):
+        if self._spool:
+            spool, self._spool = self._spool, None
+            with spool:
+                size = spool.tell()
+                spool.seek(0)
+                self._on_end(spool, size)
+
+    def release_conn(self):
+        release = getattr(self._raw, 'release_conn', None)
+        if release:
+            release()
+
+    def close(self):
+        if not self.closed:
+            if self._spool:
+                self._spool.close()
+                self._spool = None
+            self._raw.close()
+        super().close()
+
+
+class ReplayMiss(requests.RequestException):
+    """
+    Raised in replay mode for a URL the archive does not hold; never retried
+    """
+
+
+class CaptureWriter:
+    """
+    Records HTTP exchanges and rendered DOMs of a crawl into a WARC file.
+
+    The archive follows the WARC 1.1 layout, one gzip member per record, so
+    standard WARC tools can read it: HTTP answers are `response` records and
+    rendered DOMs are `resource` records of type text/html. An index of the
+    records (`<archive>.idx`, one JSON line per record) is written alongside
+    so replay can seek straight to a record. Bodies are stored decoded, with
+    a Content-Length matching them. A streamed body is spooled to a temporary
+    file as the caller reads it rather than held in memory, and compressed
+    into the archive block by block once read to its end.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Archive file, conventionally ending in `.warc.gz`; records are appended
+        """
+        self.path = path
+        self.records = 0
+        self._lock = threading.Lock()
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self._file = open(path, 'ab')
+        self._index = open(f"{path}.idx", 'a', encoding='utf-8')
+
+    def _add(self, record_type, uri, content_type, head, body=b'', extra=None):
+        """
+        Append one record whose block is `head` followed by `body`
+
+        Args:
+            head (bytes): Start of the block, such as the HTTP status line and headers
+            body (bytes or file): Rest of the block; a file is read from its current position to its end
+        """
+        if isinstance(body, bytes):
+            body = io.BytesIO(body)
+        start = body.tell()
+        body.seek(0, io.SEEK_END)
+        length = len(head) + body.tell() - start
+        body.seek(start)
+        fields = [
+            ('WARC-Type', record_type),
+            ('WARC-Record-ID', f"<urn:uuid:{uuid.uuid4()}>"),
+            ('WARC-Date', datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')),
+            ('WARC-Target-URI', uri),
+        ]
+        fields.extend(extra or [])
+        fields.extend([('Content-Type', content_type), ('Content-Length', str(length))])
+        header = 'WARC/1.1\r\n' + ''.join(f"{name}: {value}\r\n" for name, value in fields) + '\r\n'
+        # One gzip member per record, as gzip.compress would write it
+        compressor = zlib.compressobj(9, zlib.DEFLATED, 31)
+        with self._lock:
+            offset = self._file.tell()
+            self._file.write(compressor.compress(header.encode('utf-8') + head))
+            for block in iter(lambda: body.read(BLOCK_SIZE), b''):
+                self._file.write(compressor.compress(block))
+            self._file.write(compressor.compress(b'\r\n\r\n') + compressor.flush())
+            self._file.flush()
+            self._index.write(json.dumps({'type': record_type, 'uri': uri, 'offset': offset,
+                                          'length': self._file.tell() - offset}) + '\n')
+            self._index.flush()
+            self.records += 1
+
+    def add_response(self, url, response):
+        """
+        Record the answer to a GET request
+
+        The streamed body of a successful answer is recorded as the caller
+        reads it, through a temporary file (in memory up to `SPOOL_LIMIT`),
+        once it has been read to its end; a response the caller closes before
+        that is not recorded. Other bodies are loaded and recorded at once.
+
+        Args:
+            url (str): URL that was requested
+            response (requests.Response): Its answer
+        """
+        if response._content is False and 200 <= response.status_code < 300:
+            response.raw = _RecordedBody(response, lambda body, size: self._add_response(url, response, body, size))
+            return
+        # Error pages and empty answers are small
+        body = response.content
+        self._add_response(url, response, body, len(body))
+
+    def _add_response(self, url, response, body, size):
+        headers = [(name, value) for name, value in response.headers.items() if name.lower() not in TRANSFER_HEADERS]
+        headers.append(('Content-Length', str(size)))
+        http = f"HTTP/1.1 {response.status_code} {response.reason or ''}\r\n"
+        http += ''.join(f"{name}: {value}\r\n" for name, value in headers) + '\r\n'
+        extra = [('WARC-X-Final-URI', response.url)] if response.url and response.url != url else None
+        self._add('response', url, 'application/http; msgtype=response', http.encode('latin-1'), body, extra)
+
+    def add_rendered(self, url, html):
+        """
+        Record the DOM of a page rendered by the browser tier
+
+        Args:
+            url (str): URL of the page
+            html (str): Rendered HTML
+        """
+        self._add('resource', url, 'text/html; charset=utf-8', html.encode('utf-8'))
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+            self._index.close()
+
+
+def _parse_record(data):
+    """
+    Split a decompressed WARC record into its header fields and block
+    """
+    head, _, rest = data.partition(b'\r\n\r\n')
+    fields = {}
+    for line in head.decode('utf-8').split('\r\n')[1:]:
+        name, _, value = line.partition(':')
+        fields[name.strip()] = value.strip()
+    return fields, rest[:int(fields['Content-Length'])]
+
+
+class CaptureReader:
+    """
+    Serves a crawl from a WARC file written by `CaptureWriter`, without network.
+
+    Only the positions of the records are loaded; bodies are read from the
+    archive when requested. When a URL was recorded several times the last
+    record wins.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Archive file
+        """
+        self.path = path
+        self.stats = {'responses': 0, 'rendered': 0, 'misses': 0}
+        self._lock = threading.Lock()
+        self._positions = {}
+        if os.path.exists(f"{path}.idx"):
+            self._load_index(f"{path}.idx")
+        else:
+            self._scan()
+
+    def _load_index(self, index_path):
+        with open(index_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue  # A line cut short by an interrupted recording
+                self._positions[(entry['type'], entry['uri'])] = (entry['offset'], entry['length'])
+
+    def _scan(self):
+        """
+        Locate the records of an archive without index by walking its gzip members
+        """
+        offset = 0
+        with open(self.path, 'rb') as f:
+            while True:
+                f.seek(offset)
+                decompressor = zlib.decompressobj(31)
+                parts = []
+                read = 0
+                while not decompressor.eof:
+                    chunk = f.read(64 * 1024)
+                    if not chunk:
+                        break
+                    read += len(chunk)
+                    parts.append(decompressor.decompress(chunk))
+                if not decompressor.eof:
+                    return  # End of the archive, or a record cut short by an interrupted recording
+                length = read - len(decompressor.unused_data)
+                fields, _ = _parse_record(b''.join(parts))
+                self._positions[(fields['WARC-Type'], fields['WARC-Target-URI'])] = (offset, length)
+                offset += length
+
+    def _read(self, record_type, uri):
+        position = self._positions.get((record_type, uri))
+        if position is None:
+            return None
+        with open(self.path, 'rb') as f:
+            f.seek(position[0])
+            return _parse_record(gzip.decompress(f.read(position[1])))
+
+    def __len__(self):
+        return len(self._positions)
+
+    def urls(self, record_type='response'):
+        """
+        Returns:
+            list: URLs holding a record of the given type, in archive order
+        """
+        return [uri for kind, uri in self._positions if kind == record_type]
+
+    def response(self, url):
+        """
+        Rebuild the recorded answer to a GET request
+
+        Args:
+            url (str): Requested URL
+
+        Returns:
+            requests.Response: The recorded response, body already loaded
+
+        Raises:
+            ReplayMiss: If the archive holds no answer for `url`
+        """
+        record = self._read('response', url)
+        if record is None:
+            with self._lock:
+                self.stats['misses'] += 1
+            raise ReplayMiss(f"{url} is not in the replay archive")
+        fields, block = record
+        head, _, body = block.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        _, status, reason = (lines[0].split(' ', 2) + [''])[:3]
+        response = requests.Response()
+        response.status_code = int(status)
+        response.reason = reason
+        response.headers = CaseInsensitiveDict(line.split(': ', 1) for line in lines[1:] if ': ' in line)
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = fields.get('WARC-X-Final-URI', url)
+        response.raw = io.BytesIO(body)
+        response._content = body
+        response._content_consumed = True
+        with self._lock:
+            self.stats['responses'] += 1
+        return response
+
+    def rendered(self, url):
+        """
+        Args:
+            url (str): URL of the page
+
+        Returns:
+            str: The recorded rendered DOM of the page, or None if it was not rendered
+        """
+        record = self._read('resource', url)
+        if record is None:
+            return None
+        with self._lock:
+            self.stats['rendered'] += 1
+        return record[1].decode('utf-8')
+
+    def summary(self):
+        with self._lock:
+            stats = dict(self.stats)
+        return (f"{stats['responses']} responses and {stats['rendered']} rendered pages replayed, "
+                f"{stats['misses']} request(s) not in the archive")
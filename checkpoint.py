@@ -0,0 +1,102 @@
+import json
+import os
+import threading
+import time
+
+from frontier import Frontier
+
+
+class CrawlCheckpoint:
+    """
+    Crash-safe snapshot of a crawl, written periodically to a JSON file.
+
+    The snapshot holds the frontier (queued and visited pages) and the number
+    of successful downloads. It is written to a temporary file and renamed
+    over the previous one, so a crash while saving leaves the last complete
+    snapshot in place. Pages being processed when the snapshot is taken are
+    saved as queued, so a resumed crawl processes them again.
+    """
+
+    def __init__(self, path, every_pages=10, every_seconds=60):
+        """
+        Args:
+            path (str): Path of the checkpoint file
+            every_pages (int): Pages finished between two snapshots
+            every_seconds (float): Longest time between two snapshots while pages finish
+        """
+        self.path = path
+        self.every_pages = every_pages
+        self.every_seconds = every_seconds
+        self._pages_since_save = 0
+        self._last_save = time.monotonic()
+
+    def load(self, base_url, max_depth=None, max_pages=None):
+        """
+        Load the unfinished crawl of `base_url`, if any
+
+        Args:
+            base_url (str): Listing page of the crawl to resume
+            max_depth (int): Depth limit of the resumed crawl
+            max_pages (int): Page limit of the resumed crawl
+
+        Returns:
+            tuple: (Frontier, number of successful downloads), or None if there is nothing to resume
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable crawl checkpoint {self.path}: {e}")
+            return None
+        if state.get('finished'):
+            return None
+        if state.get('base_url') != base_url:
+            print(f"Crawl checkpoint is for {state.get('base_url')}, not {base_url}; starting over")
+            return None
+        frontier = Frontier.from_state(state['frontier'], max_depth, max_pages)
+        return frontier, state['successful_downloads']
+
+    def save(self, base_url, frontier, successful_downloads, in_flight=(), finished=False):
+        """
+        Write a snapshot of the crawl
+
+        Args:
+            base_url (str): Listing page of the crawl
+            frontier (Frontier): Crawl frontier
+            successful_downloads (int): Successful downloads so far
+            in_flight (iterable): (url, depth) of pages being processed
+            finished (bool): Whether the crawl ran to completion
+        """
+        state = {
+            'base_url': base_url,
+            'saved_at': time.time(),
+            'finished': finished,
+            'successful_downloads': successful_downloads,
+            'frontier': frontier.to_state(in_flight),
+        }
+        # Unique per process and thread: thread ids repeat across the processes of a shared crawl
+        tmp_path = f"{self.path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self._pages_since_save = 0
+        self._last_save = time.monotonic()
+
+    def page_done(self, base_url, frontier, successful_downloads, in_flight=()):
+        """
+        Count a finished page and save a snapshot when one is due
+
+        Args:
+            base_url (str): Listing page of the crawl
+            frontier (Frontier): Crawl frontier
+            successful_downloads (int): Successful downloads so far
+            in_flight (iterable): (url, depth) of pages being processed
+        """
+        self._pages_since_save += 1
+        if (self._pages_since_save >= self.every_pages
+                or time.monotonic() - self._last_save >= self.every_seconds):
+            self.save(base_url, frontier, successful_downloads, in_flight)
@@ -1,15 +1,16 @@
 import os
 import argparse
 from download_exams import PhDExamDownloader
+from work_queue import WorkQueue, coordinate
 
 def main():
     # Create argument parser
     parser = argparse.ArgumentParser(description='Download PhD exam content (PDFs and images) from sahla-dz.com')
     
     # Add arguments
-    parser.add_argument('--url', type=str, 
-                        default="https://lmd.sahla-dz.com/sujets-concours-doctorat-informatique/",
-                        help='Base URL containing links to exam pages')
+    parser.add_argument('--url', type=str, nargs='+',
+                        default=["https://lmd.sahla-dz.com/sujets-concours-doctorat-informatique/"],
+                        help='Base URL containing links to exam pages (several listing pages need --role coordinator)')
     
     parser.add_argument('--output', type=str,
                         default="d:/Developpement/Projets/Side_Projects/download_phd_exam_sahla_mahla/exams/",
@@ -18,18 +19,168 @@ def main():
     parser.add_argument('--no-selenium', action='store_true',
                         help='Disable Selenium WebDriver (use only requests for static content)')
     
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Number of exam pages to process concurrently (default: 1, serial crawl)')
+    
+    parser.add_argument('--politeness-delay', type=float, default=0.5,
+                        help='Delay in seconds between two requests to the same host, raised automatically when the host '
+                             'answers 429 or 503 (default: 0.5)')
+    
+    parser.add_argument('--max-per-host', type=int, default=2,
+                        help='Maximum number of simultaneous requests to the same host (default: 2)')
+    
+    parser.add_argument('--burst', type=int, default=1,
+                        help='Requests to the same host allowed back to back before the politeness delay applies (default: 1)')
+    
+    parser.add_argument('--retries', type=int, default=3,
+                        help='Extra attempts for requests failing with a connection error, 429 or 5xx (default: 3)')
+    
+    parser.add_argument('--backend', choices=['sync', 'async'], default='sync',
+                        help='HTTP backend: blocking requests (sync) or pooled aiohttp connections (async)')
+    
+    parser.add_argument('--browsers', type=int, default=1,
+                        help='Number of headless browsers rendering pages in parallel (default: 1)')
+    
+    parser.add_argument('--browser-recycle', type=int, default=50,
+                        help='Restart a browser after rendering this many pages (default: 50)')
+    
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Disable the on-disk HTTP cache of crawled pages')
+    
+    parser.add_argument('--cache-max-mb', type=float, default=200,
+                        help='Maximum size of the HTTP cache in megabytes (default: 200)')
+    
+    parser.add_argument('--cache-max-age-days', type=float, default=30,
+                        help='Maximum age of an HTTP cache entry in days (default: 30)')
+    
+    parser.add_argument('--no-manifest', action='store_true',
+                        help='Do not record completed downloads in the manifest')
+    
+    parser.add_argument('--force', action='store_true',
+                        help='Download again files that the manifest marks as complete')
+    
+    parser.add_argument('--no-dedup', action='store_true',
+                        help='Do not deduplicate identical files through the content-addressed store')
+    
+    parser.add_argument('--image-workers', type=int, default=4,
+                        help='Number of images of one set downloaded in parallel')
+    
+    parser.add_argument('--image-retries', type=int, default=2,
+                        help='Extra attempts for an image that failed to download')
+    
+    parser.add_argument('--assemble-pdf', action='store_true',
+                        help='Assemble each downloaded image set into a single PDF')
+    
+    parser.add_argument('--assembly-workers', type=int, default=None,
+                        help='Number of processes assembling PDFs (default: CPU count)')
+    
+    parser.add_argument('--max-depth', type=int, default=None,
+                        help='Deepest sub-link depth followed; links of the listing page are depth 0 (default: no limit)')
+    
+    parser.add_argument('--max-pages', type=int, default=None,
+                        help='Maximum number of pages processed (default: no limit)')
+    
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue the interrupted crawl saved in the output folder')
+    
+    parser.add_argument('--checkpoint-every', type=int, default=10,
+                        help='Pages processed between two saves of the crawl state (0 disables them)')
+    
+    parser.add_argument('--discovery', choices=['html', 'rest', 'sitemap', 'auto'], default='html',
+                        help='Find exam pages by scraping the listing page (html) or through the '
+                             'WordPress REST API / XML sitemaps (rest, sitemap, auto tries both)')
+    
+    parser.add_argument('--parser', choices=['fast', 'html.parser', 'lxml'], default='fast',
+                        help='HTML parser: fast scans only the tags extraction needs; html.parser and lxml '
+                             'build a full BeautifulSoup tree (default: fast)')
+    
+    parser.add_argument('--report', type=str, default=None,
+                        help='Where to write the JSON run report (default: .run_report.json in the output folder)')
+    
+    parser.add_argument('--prometheus', type=str, default=None,
+                        help='Also write the run metrics to this file in Prometheus text format')
+    
+    parser.add_argument('--preallocate', action='store_true',
+                        help='Reserve the disk space of each file from its Content-Length before writing it (Linux)')
+    
+    parser.add_argument('--verify', action='store_true',
+                        help='Check the downloaded files instead of crawling, and download only the broken or missing ones again')
+    
+    parser.add_argument('--queue', type=str, default=None, metavar='DATABASE',
+                        help='SQLite work queue shared by several crawler processes, on this host or on a network filesystem '
+                             'with reliable locks')
+    
+    parser.add_argument('--role', choices=['worker', 'coordinator'], default='worker',
+                        help='With --queue: the coordinator queues the --url listing pages and watches the crawl, '
+                             'workers lease pages from the queue and download them (default: worker)')
+    
+    parser.add_argument('--lease-seconds', type=float, default=300,
+                        help='How long a leased page stays reserved for a worker that stops responding (default: 300)')
+    
+    capture = parser.add_mutually_exclusive_group()
+    capture.add_argument('--record', type=str, default=None, metavar='ARCHIVE',
+                         help='Record every HTTP exchange and rendered page of the run into a WARC archive')
+    capture.add_argument('--replay', type=str, default=None, metavar='ARCHIVE',
+                         help='Re-run the crawl from a recorded WARC archive, without network or browsers')
+    
     # Parse arguments
     args = parser.parse_args()
+    if args.role == 'coordinator' and not args.queue:
+        parser.error('--role coordinator needs --queue')
+    if len(args.url) > 1 and args.role != 'coordinator':
+        parser.error('several --url listing pages are crawled through a shared queue: use --queue with --role coordinator')
+    
+    if args.role == 'coordinator':
+        queue = WorkQueue(args.queue, args.lease_seconds)
+        coordinate(queue, args.url, args.max_depth, args.max_pages)
+        queue.close()
+        return
     
     use_selenium = not args.no_selenium
     
-    print(f"Base URL: {args.url}")
+    print(f"Base URL: {args.url[0]}")
     print(f"Output folder: {args.output}")
     print(f"Using Selenium for lazy-loaded content: {use_selenium}")
+    print(f"Concurrent workers: {args.workers}")
+    print(f"HTTP backend: {args.backend}")
     
     # Create and run the downloader
-    downloader = PhDExamDownloader(args.url, args.output, use_selenium=use_selenium)
-    downloader.run()
+    downloader = PhDExamDownloader(args.url[0], args.output, use_selenium=use_selenium,
+                                   workers=args.workers,
+                                   politeness_delay=args.politeness_delay,
+                                   max_per_host=args.max_per_host,
+                                   burst=args.burst,
+                                   retries=args.retries,
+                                   backend=args.backend,
+                                   browsers=args.browsers,
+                                   browser_recycle=args.browser_recycle,
+                                   use_cache=not args.no_cache,
+                                   cache_max_mb=args.cache_max_mb,
+                                   cache_max_age_days=args.cache_max_age_days,
+                                   use_manifest=not args.no_manifest,
+                                   skip_completed=not args.force,
+                                   use_blob_store=not args.no_dedup,
+                                   image_workers=args.image_workers,
+                                   image_retries=args.image_retries,
+                                   assemble_pdf=args.assemble_pdf,
+                                   assembly_workers=args.assembly_workers,
+                                   max_depth=args.max_depth,
+                                   max_pages=args.max_pages,
+                                   resume=args.resume,
+                                   checkpoint_every=args.checkpoint_every,
+                                   discovery=args.discovery,
+                                   parser=args.parser,
+                                   report_path=args.report,
+                                   prometheus_path=args.prometheus,
+                                   record=args.record,
+                                   replay=args.replay,
+                                   preallocate=args.preallocate,
+                                   work_queue=args.queue,
+                                   lease_seconds=args.lease_seconds)
+    if args.verify:
+        downloader.repair()
+    else:
+        downloader.run()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
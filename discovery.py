@@ -0,0 +1,228 @@
+import re
+import xml.etree.ElementTree as ET
+from urllib.parse import quote, urljoin, urlsplit
+
+from frontier import EXAM_KEYWORDS, keyword_score
+
+# Child sitemaps that list archives rather than posts or pages
+ARCHIVE_SITEMAPS = re.compile(r'taxonomies|category|post_tag|tag-sitemap|users|author', re.IGNORECASE)
+SITEMAP_PATHS = ('wp-sitemap.xml', 'sitemap_index.xml', 'sitemap.xml')
+REST_TYPES = ('posts', 'pages')
+MODES = ('html', 'rest', 'sitemap', 'auto')
+
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def category_slug(url):
+    """
+    Args:
+        url (str): Listing page of a category, such as https://lmd.sahla-dz.com/sujets-concours-doctorat-informatique/
+
+    Returns:
+        str: Last segment of the URL's path, or None for the root of the site
+    """
+    segments = [segment for segment in urlsplit(url).path.split('/') if segment]
+    return segments[-1].lower() if segments else None
+
+
+def category_terms(slug):
+    """
+    Words of a category slug that set it apart from the other exam categories
+
+    Args:
+        slug (str): Category slug, such as 'sujets-concours-doctorat-informatique'
+
+    Returns:
+        list: The words holding no exam keyword, e.g. ['informatique']
+    """
+    return [word for word in re.split(r'[-_]+', slug or '')
+            if word and not any(keyword in word for keyword in EXAM_KEYWORDS)]
+
+
+class WordPressDiscovery:
+    """
+    Enumerates the exam pages of a WordPress site in bulk.
+
+    The REST API (`/wp-json/wp/v2/posts`) returns up to 100 posts per request
+    together with their `modified_gmt` timestamp; the XML sitemaps
+    (`wp-sitemap.xml` in WordPress 5.5+, `sitemap_index.xml` from SEO plugins)
+    list every URL with its `lastmod`. Either way a few requests replace one
+    page fetch per link hop. Only URLs on the site's host whose path holds an
+    exam keyword are kept.
+
+    When the base URL is a category listing, discovery is scoped to it. The
+    REST API resolves the category slug to its id and lists only the posts
+    filed under it. Sitemaps say nothing about categories, so their entries
+    (and the REST listing of a slug WordPress does not know as a category)
+    are kept only when their path holds the words of the slug that are not
+    exam keywords, e.g. 'informatique' for sujets-concours-doctorat-informatique.
+    """
+
+    def __init__(self, get, base_url, per_page=100):
+        """
+        Args:
+            get (callable): Function fetching a URL, returning a `requests.Response`
+            base_url (str): Root of the site, or the listing page of the category to discover
+            per_page (int): Posts requested per REST page (WordPress allows at most 100)
+        """
+        self.get = get
+        parts = urlsplit(base_url)
+        self.host = parts.netloc.lower()
+        self.root = f"{parts.scheme}://{parts.netloc}/"
+        self.category = category_slug(base_url)
+        self.category_terms = category_terms(self.category)
+        self.per_page = per_page
+        self.requests = 0
+
+    def _fetch(self, url):
+        self.requests += 1
+        return self.get(url)
+
+    def _keep(self, url, in_category=False):
+        """
+        Args:
+            url (str): Discovered URL
+            in_category (bool): Whether the URL is known to be filed under the category being discovered
+        """
+        if urlsplit(url).netloc.lower() != self.host or keyword_score(url) == 0:
+            return False
+        path = urlsplit(url).path.lower()
+        return in_category or all(term in path for term in self.category_terms)
+
+    def _rest_listing(self, endpoint):
+        """
+        Collect the items of every page of a REST listing
+
+        Returns:
+            list: JSON items, or None if the endpoint does not answer with a listing
+        """
+        items = []
+        page, total_pages = 1, 1
+        while page <= total_pages:
+            response = self._fetch(f"{endpoint}per_page={self.per_page}&page={page}&_fields=link,modified_gmt")
+            try:
+                batch = response.json() if response.status_code == 200 else None
+            except ValueError:
+                batch = None
+            if not isinstance(batch, list):
+                # WordPress answers 400 past the last page
+                return items if page > 1 else None
+            items.extend(batch)
+            total_pages = int(response.headers.get('X-WP-TotalPages') or 1)
+            page += 1
+        return items
+
+    def _rest_endpoints(self, kind):
+        return f"{self.root}wp-json/wp/v2/{kind}?", f"{self.root}?rest_route=/wp/v2/{kind}&"
+
+    def _rest_pages(self, kind, query=''):
+        """
+        List every item of a post type, through pretty REST URLs or the `rest_route` fallback
+
+        Args:
+            kind (str): 'posts' or 'pages'
+            query (str): Extra query parameters, each followed by '&'
+        """
+        for endpoint in self._rest_endpoints(kind):
+            items = self._rest_listing(endpoint + query)
+            if items is not None:
+                return items
+        return None
+
+    def _category_id(self):
+        """
+        Resolve the category slug of the base URL through the REST API
+
+        Returns:
+            int: Id of the category, or None if the API is not available or knows no such category
+        """
+        for endpoint in self._rest_endpoints('categories'):
+            response = self._fetch(f"{endpoint}slug={quote(self.category)}&_fields=id")
+            try:
+                items = response.json() if response.status_code == 200 else None
+            except ValueError:
+                items = None
+            if isinstance(items, list):
+                return items[0].get('id') if items else None
+        return None
+
+    def from_rest(self):
+        """
+        List exam pages through the WordPress REST API
+
+        Returns:
+            list: (url, modified) tuples, or None if the API is not available
+        """
+        category_id = self._category_id() if self.category else None
+        if category_id is not None:
+            # Pages are not filed under categories
+            sources = [('posts', f"categories={category_id}&")]
+        else:
+            sources = [(kind, '') for kind in REST_TYPES]
+        found = None
+        for kind, query in sources:
+            items = self._rest_pages(kind, query)
+            if items is None:
+                continue
+            found = found or []
+            found.extend((item['link'], item.get('modified_gmt')) for item in items
+                         if item.get('link') and self._keep(item['link'], category_id is not None))
+        return found
+
+    def _parse_sitemap(self, url, depth=0):
+        response = self._fetch(url)
+        if response.status_code != 200:
+            return None
+        try:
+            root = ET.fromstring(response.content)
+        except ET.ParseError:
+            return None
+        entries = []
+        if _local_name(root.tag) == 'sitemapindex':
+            if depth > 1:
+                return entries
+            for sitemap in root:
+                loc = next((child.text for child in sitemap if _local_name(child.tag) == 'loc'), None)
+                if loc and not ARCHIVE_SITEMAPS.search(urlsplit(loc).path):
+                    entries.extend(self._parse_sitemap(urljoin(url, loc.strip()), depth + 1) or [])
+            return entries
+        for item in root:
+            fields = {_local_name(child.tag): (child.text or '').strip() for child in item}
+            if fields.get('loc') and self._keep(fields['loc']):
+                entries.append((fields['loc'], fields.get('lastmod') or None))
+        return entries
+
+    def from_sitemap(self):
+        """
+        List exam pages through the XML sitemaps, keeping those of the category by the words of its slug
+
+        Returns:
+            list: (url, modified) tuples, or None if no sitemap was found
+        """
+        for path in SITEMAP_PATHS:
+            entries = self._parse_sitemap(self.root + path)
+            if entries is not None:
+                return entries
+        return None
+
+    def discover(self, mode='auto'):
+        """
+        Args:
+            mode (str): 'rest', 'sitemap', or 'auto' to try the REST API then the sitemaps
+
+        Returns:
+            list: (url, modified) tuples without duplicates, or None if the site offers no bulk listing
+        """
+        sources = {'rest': (self.from_rest,), 'sitemap': (self.from_sitemap,),
+                   'auto': (self.from_rest, self.from_sitemap)}[mode]
+        for source in sources:
+            try:
+                entries = source()
+            except Exception as e:
+                print(f"Discovery through {source.__name__} failed: {e}")
+                entries = None
+            if entries is not None:
+                return list(dict(entries).items())
+        return None
@@ -1,22 +1,47 @@
+import contextlib
 import os
 import re
+import threading
 import requests
 import urllib.parse
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 from selenium.webdriver.chrome.service import Service
+from throttle import HostThrottle, RetryPolicy, RETRY_STATUSES, parse_retry_after
+from browser_pool import BrowserPool
+from page import Page
+from page_scan import PARSERS, scan_page, etree as lxml_etree
+from extraction_rules import RuleEngine
+from http_cache import HttpCache
+from manifest import DownloadManifest
+from blob_store import BlobStore
+from pdf_assembly import PdfAssembler
+from extraction_tiers import TierPlanner, has_lazy_load_markers
+from async_backend import AsyncBackend
+from frontier import Frontier, canonicalize
+from discovery import WordPressDiscovery, MODES as DISCOVERY_MODES
+from checkpoint import CrawlCheckpoint
+from metrics import Metrics
+from capture import CaptureReader, CaptureWriter
+from stream_writer import KeyedLock, claim, write_response
+from drive import open_download, has_pdf_magic
+from work_queue import WorkQueue, default_worker_id
+from verify import scan_downloads, check_file, file_kind, file_sha256, is_html_file
 
 class PhDExamDownloader:
-    def __init__(self, base_url, destination_folder, use_selenium=True):
+    def __init__(self, base_url, destination_folder, use_selenium=True, workers=1,
+                 politeness_delay=0.5, max_per_host=2, backend='sync', browsers=1,
+                 browser_recycle=50, use_cache=True, cache_max_mb=200, cache_max_age_days=30,
+                 use_manifest=True, skip_completed=True, use_blob_store=True, image_workers=4,
+                 image_retries=2, assemble_pdf=False, assembly_workers=None, max_depth=None,
+                 max_pages=None, resume=False, checkpoint_every=10, discovery='html', parser='fast',
+                 burst=1, retries=3, report_path=None, prometheus_path=None, record=None, replay=None,
+                 preallocate=False, work_queue=None, lease_seconds=300, timeout=(30, 60)):
         """
         Initialize the downloader with base URL and destination folder
         
@@ -24,11 +49,106 @@ class PhDExamDownloader:
             base_url (str): The main URL containing links to exam pages
             destination_folder (str): Path to save downloaded PDFs
             use_selenium (bool): Whether to use Selenium for handling lazy-loaded content
+            workers (int): Number of pages processed concurrently (1 keeps the serial crawl)
+            politeness_delay (float): Delay in seconds between two requests to the same host, raised
+                                      automatically while the host answers 429 or 503
+            max_per_host (int): Maximum number of simultaneous requests to the same host
+            backend (str): 'sync' for the requests-based crawl, 'async' for the aiohttp-based one
+            browsers (int): Number of headless browsers rendering pages in parallel
+            browser_recycle (int): Pages rendered by a browser before it is restarted
+            use_cache (bool): Whether to keep an on-disk HTTP cache of crawled pages
+            cache_max_mb (float): Maximum size of the HTTP cache in megabytes
+            cache_max_age_days (float): Maximum age of an HTTP cache entry in days
+            use_manifest (bool): Whether to record completed downloads in a persistent manifest
+            skip_completed (bool): Whether to skip URLs the manifest marks as complete
+            use_blob_store (bool): Whether to store identical files once in a content-addressed store
+            image_workers (int): Number of images of one set downloaded in parallel
+            image_retries (int): Extra attempts for an image that failed to download
+            assemble_pdf (bool): Whether to assemble each complete image set into a single PDF
+            assembly_workers (int): Number of processes assembling PDFs (defaults to the CPU count)
+            max_depth (int): Deepest sub-link depth followed (links of the listing page are depth 0), None for no limit
+            max_pages (int): Maximum number of pages processed, None for no limit
+            resume (bool): Whether to continue the unfinished crawl saved in the checkpoint file
+            checkpoint_every (int): Pages processed between two checkpoints of the crawl state (0 disables them)
+            discovery (str): How exam pages are found: 'html' scrapes the listing page, 'rest' and 'sitemap'
+                             enumerate them through the WordPress REST API or XML sitemaps, 'auto' tries both
+            parser (str): HTML parser: 'fast' scans only the tags extraction needs in one streaming pass,
+                          'html.parser' and 'lxml' build a full BeautifulSoup tree
+            burst (int): Requests to the same host allowed back to back before the politeness delay applies
+            retries (int): Extra attempts for a request that failed with a connection error, 429 or 5xx
+            report_path (str): Where to write the JSON run report (defaults to `.run_report.json` in the destination folder)
+            prometheus_path (str): Where to also write the metrics in Prometheus text format, None to skip it
+            record (str): WARC archive to record every HTTP exchange and rendered DOM of the run into
+            replay (str): WARC archive to serve the run from instead of the network and the browsers
+            preallocate (bool): Whether to reserve the disk space of each file from its Content-Length
+                                before writing it (Linux only)
+            work_queue (str): SQLite work queue shared with other crawler processes; pages are leased from it
+                              instead of crawled from `base_url`, which the coordinator seeds (see `work_queue.py`)
+            lease_seconds (float): How long a page leased from the work queue stays reserved if this
+                                   process stops renewing its leases
+            timeout (tuple): Default (connect, read) timeouts in seconds of every HTTP request; a request
+                             passing its own `timeout` overrides them
         """
+        if backend not in ('sync', 'async'):
+            raise ValueError(f"Unknown backend: {backend}")
+        if discovery not in DISCOVERY_MODES:
+            raise ValueError(f"Unknown discovery mode: {discovery}")
+        if parser not in PARSERS:
+            raise ValueError(f"Unknown parser: {parser}")
+        if parser == 'lxml' and lxml_etree is None:
+            raise ImportError("The lxml parser requires lxml (pip install lxml)")
+        if record and replay:
+            raise ValueError("A run cannot both record and replay an archive")
+        
+        # A recorded or replayed run goes through `_get`, so it uses the sync backend and skips
+        # conditional requests: every recorded exchange is complete and replay needs no cache
+        self.recorder = CaptureWriter(record) if record else None
+        self.replay = CaptureReader(replay) if replay else None
+        if self.recorder or self.replay:
+            if backend != 'sync':
+                print("Recording and replaying use the sync backend")
+            backend = 'sync'
+            use_cache = False
+        # Pages come from a queue shared with other processes; its worker loop runs on the sync backend
+        self.work_queue = WorkQueue(work_queue, lease_seconds) if work_queue else None
+        self.worker_id = default_worker_id()
+        self.queue_poll = 1.0
+        if self.work_queue and backend != 'sync':
+            print("The shared work queue uses the sync backend")
+            backend = 'sync'
+        if self.replay:
+            print(f"Replaying {len(self.replay)} records from {replay}")
+            self._replay_has_renders = bool(self.replay.urls('resource'))
+            # Rendered DOMs come from the archive
+            use_selenium = False
         self.base_url = base_url
         self.destination_folder = destination_folder
         self.use_selenium = use_selenium
-        self.driver = None
+        self.workers = max(1, int(workers))
+        self.backend = backend
+        self.browsers = max(1, int(browsers))
+        self.browser_recycle = browser_recycle
+        self.browser_pool = None
+        self._chromedriver_path = None
+        self.throttle = HostThrottle(politeness_delay, max_per_host, burst)
+        self.retry_policy = RetryPolicy(retries)
+        self.timeout = timeout
+        self.tiers = TierPlanner()
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.discovery = discovery
+        self.parser = parser
+        # Content extraction rules shared by the static and browser tiers
+        self.extractor = RuleEngine()
+        # Modification timestamps of the pages listed by bulk discovery, by canonical URL
+        self._page_modified = {}
+        self.image_workers = max(1, int(image_workers))
+        self.image_retries = max(0, int(image_retries))
+        self.image_set_stats = []
+        self._stats_lock = threading.Lock()
+        # Downloads of the same URL or to the same file wait for each other
+        self._file_locks = KeyedLock()
+        self.preallocate = preallocate
         
         self.session = requests.Session()
         self.session.headers.update({
@@ -42,41 +162,153 @@ class PhDExamDownloader:
         # Create destination folder if it doesn't exist
         os.makedirs(self.destination_folder, exist_ok=True)
         
+        # Pages are revalidated against an on-disk cache shared by all fetch paths
+        self.http_cache = None
+        if use_cache:
+            self.http_cache = HttpCache(os.path.join(self.destination_folder, '.http_cache'),
+                                        max_bytes=int(cache_max_mb * 1024 * 1024),
+                                        max_age=cache_max_age_days * 24 * 3600)
+        
+        # Completed downloads are recorded so later runs can skip them
+        self.skip_completed = skip_completed
+        self.manifest = None
+        if use_manifest:
+            self.manifest = DownloadManifest(os.path.join(self.destination_folder, '.manifest.sqlite'))
+        
+        # Identical files are kept once and linked under their readable names
+        self.blob_store = None
+        if use_blob_store:
+            self.blob_store = BlobStore(os.path.join(self.destination_folder, '.blobs'))
+        
+        # The crawl state is saved periodically so an interrupted crawl can be resumed (a shared
+        # work queue holds its own state)
+        self.resume = resume
+        self.checkpoint = None
+        if checkpoint_every and not self.work_queue:
+            self.checkpoint = CrawlCheckpoint(os.path.join(self.destination_folder, '.crawl_state.json'),
+                                              every_pages=checkpoint_every)
+        
+        # Image sets are turned into PDFs in worker processes while the crawl goes on
+        self.assembler = PdfAssembler(assembly_workers) if assemble_pdf else None
+        
+        # Per-stage timings, transfer volumes and error counts, written out at the end of the run
+        self.metrics = Metrics()
+        self.report_path = report_path or os.path.join(self.destination_folder, '.run_report.json')
+        self.prometheus_path = prometheus_path
+        
+    def _create_chrome_driver(self):
+        """
+        Start a new headless Chrome WebDriver
+        
+        Returns:
+            WebDriver: The new driver
+        """
+        chrome_options = Options()
+        chrome_options.add_argument('--headless')  # Run in background
+        chrome_options.add_argument('--no-sandbox')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument('--disable-gpu')
+        chrome_options.add_argument('--window-size=1920,1080')
+        chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
+        
+        # Use ChromeDriverManager to automatically download and manage ChromeDriver
+        if self._chromedriver_path is None:
+            self._chromedriver_path = ChromeDriverManager().install()
+        service = Service(self._chromedriver_path)
+        driver = webdriver.Chrome(service=service, options=chrome_options)
+        driver.implicitly_wait(10)  # Wait up to 10 seconds for elements to appear
+        return driver
+    
     def _init_selenium_driver(self):
         """
-        Initialize Selenium WebDriver with Chrome options
+        Initialize the pool of Selenium WebDrivers
         """
         try:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')  # Run in background
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36')
-            
-            # Use ChromeDriverManager to automatically download and manage ChromeDriver
-            service = Service(ChromeDriverManager().install())
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.driver.implicitly_wait(10)  # Wait up to 10 seconds for elements to appear
-            print("Selenium WebDriver initialized successfully")
+            self.browser_pool = BrowserPool(self._create_chrome_driver, size=self.browsers,
+                                            max_pages_per_driver=self.browser_recycle)
+            # Start the first browser now so a broken setup falls back before the crawl
+            self.browser_pool.warm_up()
+            print(f"Selenium WebDriver pool initialized successfully ({self.browsers} browser(s))")
             
         except Exception as e:
             print(f"Warning: Could not initialize Selenium WebDriver: {e}")
             print("Falling back to requests-only mode")
             self.use_selenium = False
-            self.driver = None
+            self.browser_pool = None
     
     def _close_selenium_driver(self):
         """
-        Close Selenium WebDriver
+        Close all Selenium WebDrivers
         """
-        if self.driver:
+        if self.browser_pool:
             try:
-                self.driver.quit()
-                print("Selenium WebDriver closed")
+                closed = self.browser_pool.close()
+                print(f"Selenium WebDriver pool closed ({closed} browser(s))")
             except Exception as e:
                 print(f"Error closing Selenium WebDriver: {e}")
+            self.browser_pool = None
+    
+    def _get(self, url, **kwargs):
+        """
+        Issue a GET request through the shared session, respecting per-host rate limits
+        
+        Connection errors, timeouts and 429/5xx answers are retried with
+        exponential backoff and jitter, or after the server's Retry-After.
+        In record mode the exchange is also written to the archive; in
+        replay mode it is served from the archive without network.
+        
+        Args:
+            url (str): URL to fetch
+            **kwargs: Extra arguments passed to `requests.Session.get`
+            
+        Returns:
+            requests.Response: The response object
+        """
+        if self.replay:
+            return self.replay.response(url)
+        response = self._fetch(url, **kwargs)
+        if self.recorder:
+            self.recorder.add_response(url, response)
+        return response
+    
+    def _fetch(self, url, **kwargs):
+        """
+        Send a GET request over the network, retrying transient failures
+        
+        Without a `timeout` argument the request uses the downloader's default
+        (connect, read) timeouts, so a stalled server cannot block a worker forever.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        attempt = 0
+        while True:
+            try:
+                with self.throttle.slot(url):
+                    start = time.perf_counter()
+                    response = self.session.get(url, **kwargs)
+                self.metrics.observe('http_request_seconds', time.perf_counter() - start)
+                self.metrics.inc('http_requests_total', status=response.status_code)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.metrics.inc('http_requests_total', status=type(e).__name__)
+                if not self.retry_policy.should_retry(attempt):
+                    raise
+                delay = self.retry_policy.delay(attempt)
+                print(f"Request to {url} failed ({e}), retrying in {delay:.1f}s")
+            else:
+                if response.status_code not in RETRY_STATUSES:
+                    self.throttle.recover(url)
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if not self.retry_policy.should_retry(attempt, retry_after):
+                    return response
+                response.close()
+                if response.status_code in (429, 503):
+                    self.throttle.backoff(url, retry_after)
+                delay = self.retry_policy.delay(attempt, retry_after)
+                print(f"{url} answered {response.status_code}, retrying in {delay:.1f}s")
+            self.metrics.inc('http_retries_total')
+            if delay > 0:
+                time.sleep(delay)
+            attempt += 1
     
     def extract_content_with_selenium(self, page_url):
         """
@@ -88,118 +320,32 @@ class PhDExamDownloader:
         Returns:
             dict: Dictionary with 'type' (pdf or images) and 'urls' (list of URLs)
         """
-        if not self.driver:
+        if not self.browser_pool and not self.replay:
             return None
             
         try:
-            print(f"Loading page with Selenium: {page_url}")
-            self.driver.get(page_url)
-            
-            # Wait for the page to load and scroll to trigger lazy loading
-            time.sleep(3)
-            
-            # Scroll down to trigger lazy loading
-            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
-            
-            # Scroll back up
-            self.driver.execute_script("window.scrollTo(0, 0);")
-            time.sleep(2)
-            
-            # Wait for iframes to load
-            try:
-                WebDriverWait(self.driver, 10).until(
-                    EC.presence_of_element_located((By.TAG_NAME, "iframe"))
-                )
-                print("Iframes detected, waiting for content to load...")
-                time.sleep(3)
-            except TimeoutException:
-                print("No iframes found or timeout waiting for iframes")
-            
-            # Get the page source after JavaScript execution
-            page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
-            
-            result = {'type': None, 'urls': []}
-            
-            # Find iframe with Google Docs viewer (PDF) - updated to include 'viewer'
-            iframes = soup.find_all('iframe', src=lambda s: s and ('docs.google.com/gview' in s or 'docs.google.com/viewer' in s or 'drive.google.com' in s))
-            if not iframes:
-                iframes = soup.find_all('iframe', attrs={'data-src': lambda s: s and ('docs.google.com/gview' in s or 'docs.google.com/viewer' in s or 'drive.google.com' in s)})
-            
-            # Process PDF iframes
-            for iframe in iframes:
-                iframe_src = iframe.get('src') or iframe.get('data-src')
-                
-                # Handle gview links
-                url_param = re.search(r'url=([^&]+)', iframe_src)
-                if url_param:
-                    pdf_url = urllib.parse.unquote(url_param.group(1))
-                    if pdf_url not in result['urls']:
-                        result['type'] = 'pdf'
-                        result['urls'].append(pdf_url)
-                    continue
-
-                # Handle Google Docs viewer with srcid parameter
-                if 'docs.google.com/viewer' in iframe_src and 'srcid=' in iframe_src:
-                    file_id = iframe_src.split('srcid=')[1].split('&')[0]
-                    pdf_url = f'https://drive.google.com/uc?export=download&id={file_id}'
-                    if pdf_url not in result['urls']:
-                        result['type'] = 'pdf'
-                        result['urls'].append(pdf_url)
-                    continue
-
-                # Handle drive.google.com links
-                drive_match = re.search(r'drive\.google\.com/file/d/([a-zA-Z0-9_-]+)', iframe_src)
-                if drive_match:
-                    file_id = drive_match.group(1)
-                    pdf_url = f'https://drive.google.com/uc?export=download&id={file_id}'
-                    if pdf_url not in result['urls']:
-                        result['type'] = 'pdf'
-                        result['urls'].append(pdf_url)
-            
-            # If PDF iframes found, return them
-            if result['urls']:
-                print(f"Found {len(result['urls'])} PDF(s) using Selenium")
-                return result
-                
-            # Check for embedded images in iframes or divs
-            image_containers = soup.find_all(['iframe', 'div'], class_=lambda c: c and ('ndfHFb-c4YZDc-cYSp0e-DARUcf-PLDbbf' in c))
-            
-            # Also look for images directly
-            images = soup.find_all('img', src=True)
+            page_source = self.http_cache.rendered(page_url) if self.http_cache else None
+            if page_source is not None:
+                print(f"Page unchanged since last render, reusing cached DOM: {page_url}")
+            elif self.replay:
+                page_source = self.replay.rendered(page_url)
+                if page_source is None:
+                    print(f"No rendered DOM of {page_url} in the replay archive")
+                    return None
+            else:
+                print(f"Loading page with Selenium: {page_url}")
+                with self.metrics.stage('render'):
+                    page_source = self.browser_pool.render(page_url)
+                if self.http_cache:
+                    self.http_cache.store_rendered(page_url, page_source)
+                if self.recorder:
+                    self.recorder.add_rendered(page_url, page_source)
             
-            if image_containers or images:
-                result['type'] = 'images'
-                
-                # Extract images from containers
-                for container in image_containers:
-                    container_images = container.find_all('img', src=True)
-                    for img in container_images:
-                        img_url = urljoin(page_url, img['src'])
-                        if img_url not in result['urls']:
-                            result['urls'].append(img_url)
-                
-                # Add direct images
-                for img in images:
-                    # Only include images that might be exam content (filter out small icons, etc.)
-                    width = img.get('width')
-                    height = img.get('height')
-                    try:
-                        if (width and int(width) > 200) or (height and int(height) > 200):
-                            img_url = urljoin(page_url, img['src'])
-                            if img_url not in result['urls']:
-                                result['urls'].append(img_url)
-                    except (ValueError, TypeError):
-                        # If width/height can't be converted to int, include the image anyway
-                        img_url = urljoin(page_url, img['src'])
-                        if img_url not in result['urls']:
-                            result['urls'].append(img_url)
-            
-            # If we found images, return them
-            if result['urls']:
-                print(f"Found {len(result['urls'])} image(s) using Selenium")
-                return result
+            with self.metrics.stage('parse', tier='browser'):
+                content_info = self.extractor.extract(scan_page(page_source, self.parser), page_url)
+            if content_info:
+                print(f"Found {len(content_info['urls'])} {content_info['type']} URL(s) using Selenium")
+                return content_info
             
             print("No content found using Selenium")
             return None
@@ -208,40 +354,174 @@ class PhDExamDownloader:
             print(f"Error extracting content with Selenium from {page_url}: {e}")
             return None
         
-    def get_exam_page_links(self):
+    def _parse_exam_page_links(self, html, listing_url=None):
         """
-        Scrape the main page to find links to individual exam pages
+        Find links to individual exam pages in the HTML of the main page
+        
+        Args:
+            html (str): HTML of the main page
+            listing_url (str): URL of the main page (defaults to `base_url`)
         
         Returns:
             list: List of URLs to individual exam pages
         """
+        listing_url = listing_url or self.base_url
+        links = []
+        
+        # Find all links that might lead to exam pages
+        for href in scan_page(html, self.parser).links:
+            # Check if the link might be an exam page
+            if 'sujets' in href.lower() or 'doctorat' in href.lower() or 'concours' in href.lower():
+                full_url = urljoin(listing_url, href)
+                links.append(full_url)
+        
+        # If no exam page links found, treat the base URL itself as an exam page
+        if not links:
+            print("No exam page links found. Treating base URL as exam page.")
+            links.append(listing_url)
+        
+        return links
+    
+    def discover_exam_page_links(self, listing_url=None):
+        """
+        Enumerate exam pages through the site's WordPress REST API or sitemaps
+        
+        Pages whose modification timestamp matches the one recorded in the
+        manifest when they were last crawled are left out.
+        
+        Args:
+            listing_url (str): Any URL of the site (defaults to `base_url`)
+        
+        Returns:
+            list: List of URLs to individual exam pages, or None if the site offers no bulk listing
+        """
+        discovery = WordPressDiscovery(self._get, listing_url or self.base_url)
+        entries = discovery.discover(self.discovery)
+        if entries is None:
+            print(f"No WordPress REST API or sitemap found after {discovery.requests} requests")
+            return None
+        
+        links = []
+        unchanged = 0
+        for url, modified in entries:
+            if (modified and self.manifest and self.skip_completed
+                    and self.manifest.page_modified(canonicalize(url)) == modified):
+                unchanged += 1
+                continue
+            if modified:
+                self._page_modified[canonicalize(url)] = modified
+            links.append(url)
+        print(f"Discovered {len(entries)} exam pages in {discovery.requests} requests; "
+              f"{unchanged} unchanged since the last crawl")
+        return links
+    
+    def _record_page(self, page_url, successful_downloads):
+        """
+        Remember the modification timestamp of a discovered page once its content is downloaded
+        """
+        modified = self._page_modified.get(page_url)
+        if modified and successful_downloads and self.manifest:
+            self.manifest.record_page(page_url, modified)
+    
+    def get_exam_page_links(self, listing_url=None, strict=False):
+        """
+        Find links to individual exam pages, by bulk discovery or by scraping the main page
+        
+        Args:
+            listing_url (str): Main page to start from (defaults to `base_url`)
+            strict (bool): Raise when the main page cannot be fetched instead of returning no links
+        
+        Returns:
+            list: List of URLs to individual exam pages
+        """
+        if self.discovery != 'html':
+            try:
+                links = self.discover_exam_page_links(listing_url)
+                if links is not None:
+                    return links
+            except Exception as e:
+                print(f"Error discovering exam pages: {e}")
+            print("Falling back to scraping the listing page")
+        
         try:
-            response = self.session.get(self.base_url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            links = []
-            
-            # Find all links that might lead to exam pages
-            for a_tag in soup.find_all('a', href=True):
-                href = a_tag['href']
-                # Check if the link might be an exam page
-                if 'sujets' in href.lower() or 'doctorat' in href.lower() or 'concours' in href.lower():
-                    full_url = urljoin(self.base_url, href)
-                    links.append(full_url)
-            
-            # If no exam page links found, treat the base URL itself as an exam page
-            if not links:
-                print("No exam page links found. Treating base URL as exam page.")
-                links.append(self.base_url)
-            
+            listing_url = listing_url or self.base_url
+            links = self._parse_exam_page_links(self.fetch_page(listing_url).html, listing_url)
             print(f"Found {len(links)} potential exam page links")
             return links
             
         except Exception as e:
+            if strict:
+                raise
             print(f"Error getting exam page links: {e}")
             return []
     
+    def fetch_page(self, page_url):
+        """
+        Fetch an exam page once so every pass over it can share the same parse
+        
+        Args:
+            page_url (str): URL of the exam page
+            
+        Returns:
+            Page: The fetched page
+        """
+        headers = self.http_cache.conditional_headers(page_url) if self.http_cache else {}
+        response = self._get(page_url, headers=headers) if headers else self._get(page_url)
+        
+        if response.status_code == 304:
+            page = self._not_modified_page(page_url, response.status_code, response.headers)
+            if page is not None:
+                return page
+            # The cached copy vanished since the request was sent; fetch it in full
+            response = self._get(page_url)
+        
+        response.raise_for_status()
+        return self._fetched_page(page_url, response.status_code, response.headers, response.text,
+                                  response.content, response.encoding)
+    
+    def _not_modified_page(self, page_url, status_code, headers):
+        """
+        Page served from the HTTP cache for a 304 answer; shared by both backends
+        
+        Returns:
+            Page: The cached page, or None if the cached copy vanished since the request was sent
+        """
+        html = self.http_cache.not_modified(page_url)
+        if html is None:
+            return None
+        return Page(page_url, html, status_code, headers, self.parser)
+    
+    def _fetched_page(self, page_url, status_code, headers, html, body, encoding):
+        """
+        Cache a freshly fetched page and wrap it in a Page; shared by both backends
+        
+        Args:
+            page_url (str): URL of the page
+            status_code (int): HTTP status of the response
+            headers (Mapping): Response headers
+            html (str): Decoded response body
+            body (bytes): Raw response body, for the HTTP cache
+            encoding (str): Text encoding of the body
+            
+        Returns:
+            Page: The fetched page
+        """
+        if self.http_cache:
+            self.http_cache.store(page_url, headers, body, encoding)
+        return Page(page_url, html, status_code, headers, self.parser)
+    
+    def extract_content_from_page(self, page):
+        """
+        Extract PDF or image URLs from the static HTML of an exam page
+        
+        Args:
+            page (Page): The fetched exam page
+        
+        Returns:
+            dict: Dictionary with 'type' (pdf or images) and 'urls' (list of URLs), or None
+        """
+        return self.extractor.extract(page.scan, page.url)
+    
     def extract_pdf_url_from_iframe(self, page_url):
         """
         Extract PDF URL from iframe on the exam page
@@ -253,98 +533,220 @@ class PhDExamDownloader:
             dict: Dictionary with 'type' (pdf or images) and 'urls' (list of URLs)
         """
         try:
-            response = self.session.get(page_url)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'html.parser')
-            result = {'type': None, 'urls': []}
-            
-            # Find iframe with Google Docs viewer (PDF)
-            iframes = soup.find_all('iframe', src=lambda s: s and ('docs.google.com/gview' in s or 'drive.google.com' in s))
-            if not iframes:
-                iframes = soup.find_all('iframe', attrs={'data-src': lambda s: s and ('docs.google.com/gview' in s or 'drive.google.com' in s)})
+            return self.extract_content_from_page(self.fetch_page(page_url))
+        except Exception as e:
+            print(f"Error extracting content from {page_url}: {e}")
+            return None
+    
+    def _pdf_filename(self, pdf_url, page_url, headers):
+        """
+        Choose a safe local filename for a PDF download
+        
+        Args:
+            pdf_url (str): URL of the PDF
+            page_url (str): Original page URL (used as a fallback name)
+            headers (Mapping): Response headers of the PDF request
             
-            # Process PDF iframes
-            for iframe in iframes:
-                iframe_src = iframe.get('src') or iframe.get('data-src')
-                
-                # Handle gview links
-                url_param = re.search(r'url=([^&]+)', iframe_src)
-                if url_param:
-                    pdf_url = urllib.parse.unquote(url_param.group(1))
-                    if pdf_url not in result['urls']:
-                        result['type'] = 'pdf'
-                        result['urls'].append(pdf_url)
-                    continue
+        Returns:
+            str: Sanitized filename ending in .pdf
+        """
+        filename = None
+        # 1. Try to get filename from Content-Disposition header
+        content_disposition = headers.get('Content-Disposition')
+        if content_disposition:
+            fname_match = re.search(r'filename\*?=([^;]+)', content_disposition)
+            if fname_match:
+                try:
+                    # Decode filename according to RFC 5987
+                    header_filename = urllib.parse.unquote(fname_match.group(1).strip().strip("'\""))
+                    if header_filename.lower().endswith('.pdf'):
+                        filename = header_filename
+                except Exception as e:
+                    print(f"Warning: Could not decode Content-Disposition filename: {e}")
 
-                # Handle drive.google.com links
-                drive_match = re.search(r'drive\.google\.com/file/d/([a-zA-Z0-9_-]+)', iframe_src)
-                if drive_match:
-                    file_id = drive_match.group(1)
-                    pdf_url = f'https://drive.google.com/uc?export=download&id={file_id}'
-                    if pdf_url not in result['urls']:
-                        result['type'] = 'pdf'
-                        result['urls'].append(pdf_url)
-            
-            # If PDF iframes found, return them
-            if result['urls']:
-                return result
-                
-            # Check for embedded images in iframes or divs
-            image_containers = soup.find_all(['iframe', 'div'], class_=lambda c: c and ('ndfHFb-c4YZDc-cYSp0e-DARUcf-PLDbbf' in c))
-            
-            # Also look for images directly
-            images = soup.find_all('img', src=True)
+        # 2. If not found in header, try to extract from PDF URL
+        if not filename:
+            url_path = urllib.parse.urlparse(pdf_url).path
+            url_filename = os.path.basename(url_path)
+            if url_filename and url_filename.lower().endswith('.pdf'):
+                filename = url_filename
             
-            if image_containers or images:
-                result['type'] = 'images'
-                
-                # Extract images from containers
-                for container in image_containers:
-                    container_images = container.find_all('img', src=True)
-                    for img in container_images:
-                        img_url = urljoin(page_url, img['src'])
-                        if img_url not in result['urls']:
-                            result['urls'].append(img_url)
-                
-                # Add direct images
-                for img in images:
-                    # Only include images that might be exam content (filter out small icons, etc.)
-                    if img.get('width') and int(img['width']) > 200 or img.get('height') and int(img['height']) > 200:
-                        img_url = urljoin(page_url, img['src'])
-                        if img_url not in result['urls']:
-                            result['urls'].append(img_url)
-            
-            # If we found images, return them
-            if result['urls']:
-                return result
-            
-            # If no iframes with images, try looking for direct download buttons
-            download_btn = soup.find('button', string=re.compile(r'Download', re.IGNORECASE))
-            if download_btn and download_btn.parent and download_btn.parent.name == 'a' and download_btn.parent.has_attr('href'):
-                pdf_url = urljoin(page_url, download_btn.parent['href'])
-                result['type'] = 'pdf'
-                result['urls'].append(pdf_url)
-                return result
-            
-            # Try to find any link that might be a PDF
-            pdf_links = soup.find_all('a', href=lambda href: href and href.lower().endswith('.pdf'))
-            if pdf_links:
-                pdf_url = urljoin(page_url, pdf_links[0]['href'])
-                result['type'] = 'pdf'
-                result['urls'].append(pdf_url)
-                return result
-                
+        # 3. Fallback to generating from page URL
+        if not filename:
+            page_name = os.path.basename(page_url).replace('.html', '').replace('/', '-')
+            filename = f"{page_name}.pdf"
+        
+        # 4. Sanitize filename
+        # Remove invalid characters for Windows filenames
+        filename = re.sub(r'[\\/:*?"<>|]', '-', filename)
+        # Replace multiple dashes with a single one
+        filename = re.sub(r'-+', '-', filename)
+        # Remove leading/trailing dashes
+        filename = filename.strip('-')
+        # Ensure it ends with .pdf
+        if not filename.lower().endswith('.pdf'):
+            filename = f"{filename}.pdf"
+
+        # 5. Ensure filename is not empty or just ".pdf"
+        if not filename or filename.lower() == '.pdf':
+            filename = f"{str(uuid.uuid4())}.pdf" # Use UUID as a fallback
+
+        return filename
+    
+    def _completed_download(self, url):
+        """
+        Return the manifest entry of a URL that is already downloaded and intact, if skipping is enabled
+        
+        A file that went missing is restored from the content-addressed store
+        when its hash is known, without downloading it again. A file recorded
+        with an ETag or Last-Modified is then revalidated with a conditional
+        request, and downloaded again if the server has a new version.
+        
+        Args:
+            url (str): Source URL
+        """
+        entry = self._recorded_download(url)
+        request = entry and self._revalidation(entry)
+        if not request:
+            return entry
+        revalidation_url, headers = request
+        try:
+            response = self._get(revalidation_url, headers=headers, stream=True)
+        except requests.RequestException as e:
+            print(f"Could not revalidate {url}, keeping {entry['path']}: {e}")
+            return entry
+        response.close()
+        return self._revalidated(entry, response.status_code, response.headers)
+    
+    def _recorded_download(self, url):
+        """
+        Manifest entry of a downloaded URL whose file is intact, restoring it from the store if needed
+        
+        Nothing is requested; the caller revalidates the entry (see `_revalidation`).
+        
+        Returns:
+            dict: Manifest entry, or None if the URL must be downloaded
+        """
+        if not self.manifest or not self.skip_completed:
             return None
-            
-        except Exception as e:
-            print(f"Error extracting content from {page_url}: {e}")
+        entry = self.manifest.complete_entry(url)
+        if not entry:
+            entry = self.manifest.get(url)
+            if not (entry and entry['sha256'] and self.blob_store
+                    and self.blob_store.restore(entry['sha256'], entry['path'], entry['size'])):
+                return None
+            print(f"Restored {entry['path']} from the content store")
+        return entry
+    
+    def _revalidation(self, entry):
+        """
+        Conditional request confirming a completed download; shared by both backends
+        
+        A confirmed Google Drive download is revalidated against the URL that
+        served it, which is where its validators come from.
+        
+        Returns:
+            tuple: (URL, request headers), or None if the entry cannot be revalidated
+        """
+        headers = self.manifest.conditional_headers(entry)
+        # A replayed archive holds no answers to conditional requests
+        if not headers or self.replay:
             return None
+        return entry['download_url'] or entry['url'], headers
+    
+    def _revalidated(self, entry, status_code, headers):
+        """
+        Interpret the answer to the conditional request of `_revalidation`
+        
+        Returns:
+            dict: `entry` if the file is still current, None if the server has a new version
+        """
+        if self.manifest.changed(entry, status_code, headers):
+            print(f"{entry['url']} changed on the server since it was downloaded")
+            return None
+        return entry
+    
+    def _record_download(self, url, page_url, filepath, size, sha256, headers, download_url=None):
+        """
+        Record a finished download in the manifest and the content-addressed store
+        
+        `download_url` is the URL that served the file, kept when it differs
+        from `url` so that revalidation asks the URL the validators came from.
+        """
+        if self.manifest:
+            self.manifest.record(url, page_url, filepath, size, sha256, headers.get('ETag'),
+                                 headers.get('Last-Modified'), download_url if download_url != url else None)
+        if self.blob_store and sha256:
+            if self.blob_store.add(filepath, sha256, size):
+                print(f"{filepath} is a duplicate of an already downloaded file; linked to the stored copy")
+    
+    def _write_response(self, response, filepath, offset=0):
+        """
+        Stream a response body to `filepath`, hashing it on the way
+        
+        Args:
+            response (requests.Response): Streamed response
+            filepath (str): Destination path
+            offset (int): Size of the partial file the body continues (0 to start a new file)
+            
+        Returns:
+            tuple: (size of the file in bytes, hex SHA-256 of the file)
+        """
+        expected = self._expected_length(response.status_code, response.headers, offset)
+        return write_response(response, filepath, offset, expected, reserve=self.preallocate)
+    
+    def _resume_offset(self, part_path, headers):
+        """
+        Number of bytes of a partial download that can be kept
+        
+        A `.part` file is only resumed when the server advertises byte ranges
+        and sends the body without content encoding.
+        
+        Args:
+            part_path (str): Path of the partial file
+            headers (Mapping): Headers of a fresh response for the full file
+            
+        Returns:
+            int: Resume offset, 0 to start over
+        """
+        if not os.path.exists(part_path):
+            return 0
+        if headers.get('Accept-Ranges', '').lower() != 'bytes':
+            return 0
+        if headers.get('Content-Encoding', 'identity').lower() != 'identity':
+            return 0
+        return os.path.getsize(part_path)
+    
+    def _expected_length(self, status_code, headers, offset):
+        """
+        Total size the downloaded file should have, or None if the server did not say
+        
+        Args:
+            status_code (int): HTTP status of the response being saved
+            headers (Mapping): Headers of the response being saved
+            offset (int): Bytes already on disk before this response
+        """
+        content_range = headers.get('Content-Range')
+        if status_code == 206 and content_range:
+            total = re.match(r'bytes\s+\d+-\d+/(\d+)', content_range)
+            if total:
+                return int(total.group(1))
+        content_length = headers.get('Content-Length')
+        if content_length and headers.get('Content-Encoding', 'identity').lower() == 'identity':
+            try:
+                return offset + int(content_length)
+            except ValueError:
+                return None
+        return None
     
     def download_pdf(self, pdf_url, page_url):
         """
         Download PDF from the given URL
         
+        Workers downloading the same URL, or saving to the same file, wait for
+        each other; the manifest is checked again once it is their turn, so a
+        PDF shared by several pages is downloaded once.
+        
         Args:
             pdf_url (str): URL of the PDF to download
             page_url (str): Original page URL (for generating filename)
@@ -353,67 +755,23 @@ class PhDExamDownloader:
             bool: True if download was successful, False otherwise
         """
         try:
-            # Download the file
-            print(f"Downloading {pdf_url}")
-            response = self.session.get(pdf_url, stream=True)
-            response.raise_for_status()
-
-            filename = None
-            # 1. Try to get filename from Content-Disposition header
-            content_disposition = response.headers.get('Content-Disposition')
-            if content_disposition:
-                fname_match = re.search(r'filename\*?=([^;]+)', content_disposition)
-                if fname_match:
-                    try:
-                        # Decode filename according to RFC 5987
-                        header_filename = urllib.parse.unquote(fname_match.group(1).strip().strip("'\""))
-                        if header_filename.lower().endswith('.pdf'):
-                            filename = header_filename
-                    except Exception as e:
-                        print(f"Warning: Could not decode Content-Disposition filename: {e}")
-
-            # 2. If not found in header, try to extract from PDF URL
-            if not filename:
-                url_path = urllib.parse.urlparse(pdf_url).path
-                url_filename = os.path.basename(url_path)
-                if url_filename and url_filename.lower().endswith('.pdf'):
-                    filename = url_filename
+            with self._file_locks.hold(('url', pdf_url)):
+                entry = self._completed_download(pdf_url)
+                if entry:
+                    print(f"Already downloaded {pdf_url} to {entry['path']}, skipping")
+                    return True
                 
-            # 3. Fallback to generating from page URL
-            if not filename:
-                page_name = os.path.basename(page_url).replace('.html', '').replace('/', '-')
-                filename = f"{page_name}.pdf"
-            
-            # 4. Sanitize filename
-            # Remove invalid characters for Windows filenames
-            filename = re.sub(r'[\\/:*?"<>|]', '-', filename)
-            # Replace multiple dashes with a single one
-            filename = re.sub(r'-+', '-', filename)
-            # Remove leading/trailing dashes
-            filename = filename.strip('-')
-            # Ensure it ends with .pdf
-            if not filename.lower().endswith('.pdf'):
-                filename = f"{filename}.pdf"
-
-            # 5. Ensure filename is not empty or just ".pdf"
-            if not filename or filename.lower() == '.pdf':
-                filename = f"{str(uuid.uuid4())}.pdf" # Use UUID as a fallback
-
-            # Full path to save the file
-            filepath = os.path.join(self.destination_folder, filename)
-            
-            print(f"Saving to {filepath}")
-            
-            # Check if it's actually a PDF
-            content_type = response.headers.get('Content-Type', '')
-            if 'application/pdf' not in content_type and not pdf_url.lower().endswith('.pdf'):
-                print(f"Warning: The URL might not be a PDF (Content-Type: {content_type})")
-            
-            # Save the file
-            with open(filepath, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    if chunk:
-                        f.write(chunk)
+                # Download the file
+                print(f"Downloading {pdf_url}")
+                response = open_download(self._get, pdf_url)
+                response.raise_for_status()
+                filename = self._pdf_filename(pdf_url, page_url, response.headers)
+                
+                # Full path to save the file
+                filepath = os.path.join(self.destination_folder, filename)
+                part_path = f"{filepath}.part"
+                with self._file_locks.hold(('path', os.path.abspath(filepath))), claim(part_path):
+                    self._save_pdf(response, pdf_url, page_url, filepath)
             
             print(f"Successfully downloaded {filename}")
             return True
@@ -421,7 +779,320 @@ class PhDExamDownloader:
         except Exception as e:
             print(f"Error downloading PDF from {pdf_url}: {e}")
             return False
+    
+    def _save_pdf(self, response, pdf_url, page_url, filepath):
+        """
+        Write a PDF response to `filepath` through its `.part` file, resuming the part when possible
+        
+        The caller holds the locks and the claim of the file.
+        
+        Args:
+            response (requests.Response): Streamed response for the full file
+            pdf_url (str): URL of the PDF
+            page_url (str): Original page URL
+            filepath (str): Final path of the PDF
+        """
+        # Google Drive serves the file from another URL once the download is confirmed
+        download_url = response.url or pdf_url
+        print(f"Saving to {filepath}")
+        self._warn_if_not_pdf(pdf_url, response.headers)
+        
+        # Resume an interrupted transfer of the same file when the server allows it
+        part_path = f"{filepath}.part"
+        offset, range_headers = self._range_request(part_path, response.headers)
+        if offset:
+            response.close()
+            print(f"Resuming {os.path.basename(filepath)} from byte {offset}")
+            response = self._get(download_url, stream=True, headers=range_headers)
+            if response.status_code == 416:
+                # The partial file does not match the remote one any more
+                response.close()
+                response = self._get(download_url, stream=True)
+            response.raise_for_status()
+            offset = self._kept_offset(offset, response.status_code)
+        
+        # Save the file under a temporary name and only rename it once complete
+        size, sha256 = self._write_response(response, part_path, offset)
+        self._finish_pdf(pdf_url, page_url, filepath, size, sha256, offset,
+                         response.status_code, response.headers, download_url)
+    
+    def _warn_if_not_pdf(self, pdf_url, headers):
+        """
+        Warn when neither the Content-Type nor the URL of a download says it is a PDF
+        """
+        content_type = headers.get('Content-Type', '')
+        if 'application/pdf' not in content_type and not pdf_url.lower().endswith('.pdf'):
+            print(f"Warning: The URL might not be a PDF (Content-Type: {content_type})")
+    
+    def _range_request(self, part_path, headers):
+        """
+        Decide whether to resume a `.part` file with a Range request; shared by both backends
+        
+        Args:
+            part_path (str): Path of the partial file
+            headers (Mapping): Headers of a fresh response for the full file
+        
+        Returns:
+            tuple: (resume offset, headers of the Range request), or (0, None) to save the fresh response
+        """
+        offset = self._resume_offset(part_path, headers)
+        if not offset:
+            return 0, None
+        range_headers = {'Range': f"bytes={offset}-"}
+        # If-Range makes the server send the whole file if it changed since the part was written
+        validator = headers.get('ETag') or headers.get('Last-Modified')
+        if validator:
+            range_headers['If-Range'] = validator
+        return offset, range_headers
+    
+    def _kept_offset(self, offset, status_code):
+        """
+        Bytes of the `.part` file that the answer to a Range request continues
+        
+        Only a 206 continues the part; any other success carries the whole file.
+        """
+        return offset if status_code == 206 else 0
+    
+    def _finish_pdf(self, pdf_url, page_url, filepath, size, sha256, offset, status_code, headers, download_url):
+        """
+        Check a PDF written to its `.part` file and move it in place; shared by both backends
+        
+        Args:
+            pdf_url (str): URL of the PDF
+            page_url (str): Original page URL
+            filepath (str): Final path of the PDF
+            size (int): Size of the `.part` file in bytes
+            sha256 (str): Hex SHA-256 of the `.part` file
+            offset (int): Bytes that were already on disk before the response
+            status_code (int): HTTP status of the response that was written
+            headers (Mapping): Headers of the response that was written
+            download_url (str): URL that served the file
+        
+        Raises:
+            IOError: If the file is incomplete (the part is kept to resume) or is not a PDF
+        """
+        part_path = f"{filepath}.part"
+        self.metrics.inc('bytes_total', size - offset, stage='download_pdf')
+        expected = self._expected_length(status_code, headers, offset)
+        if expected is not None and size != expected:
+            raise IOError(f"Incomplete download: received {size} of {expected} bytes "
+                          f"(kept {part_path} to resume)")
+        if not has_pdf_magic(part_path):
+            # An error or login page saved in place of the PDF must not pass for a download
+            os.remove(part_path)
+            raise IOError(f"Not a PDF (Content-Type: {headers.get('Content-Type', '')})")
+        os.replace(part_path, filepath)
+        self._record_download(pdf_url, page_url, filepath, size, sha256, headers, download_url)
+    
+    
+    def _image_folder(self, page_url):
+        """
+        Create the dedicated folder for the images of an exam page
+        
+        Args:
+            page_url (str): Original page URL (for generating folder name)
+            
+        Returns:
+            str: Path to the folder
+        """
+        # Generate folder name from the page URL
+        page_name = os.path.basename(page_url).replace('.html', '').replace('/', '-')
+        page_name = re.sub(r'[\\/:*?"<>|]', '-', page_name)  # Remove invalid folder name characters
+        
+        # Create a unique folder name if the page name is too generic
+        if len(page_name) < 5:  # If the page name is too short, add a unique identifier
+            page_name = f"{page_name}-{str(uuid.uuid4())[:8]}"
+            
+        # Full path to the folder
+        folder_path = os.path.join(self.destination_folder, page_name)
+        os.makedirs(folder_path, exist_ok=True)
+        return folder_path
+    
+    def _image_path(self, folder_path, index, img_url):
+        """
+        Choose the local path of the image at position `index` of an image set
+        
+        Args:
+            folder_path (str): Folder of the image set
+            index (int): Zero-based position of the image in the set
+            img_url (str): URL of the image (for its extension)
+            
+        Returns:
+            str: Path to save the image to
+        """
+        # Generate a unique filename for each image
+        extension = os.path.splitext(img_url)[1]
+        if not extension or len(extension) <= 1:
+            extension = '.jpg'  # Default extension
+        
+        filename = f"image_{index+1}{extension}"
+        filepath = os.path.join(folder_path, filename)
+        
+        # Check if file already exists, if so, add a unique identifier
+        if os.path.exists(filepath):
+            unique_id = str(uuid.uuid4())[:8]
+            filename = f"image_{index+1}_{unique_id}{extension}"
+            filepath = os.path.join(folder_path, filename)
+        return filepath
+    
+    def _download_image(self, index, image_urls, filepath, page_url):
+        """
+        Download one image of a set, retrying it on its own if it fails
+        
+        Args:
+            index (int): Zero-based position of the image in the set
+            image_urls (list): All image URLs of the set
+            filepath (str): Where to save the image
+            page_url (str): Original page URL
+            
+        Returns:
+            int: Size of the saved image in bytes, or None if every attempt failed
+        """
+        img_url = image_urls[index]
+        label = f"{index+1}/{len(image_urls)}"
+        for attempt in range(self.image_retries + 1):
+            try:
+                print(f"Downloading image {label}: {img_url} to {filepath}")
+                response = self._get(img_url, stream=True)
+                response.raise_for_status()
+                
+                # Save the image
+                with self._discard_on_error(filepath):
+                    size, sha256 = self._write_response(response, filepath)
+                    self.metrics.inc('bytes_total', size, stage='download_images')
+                    self._check_image(filepath, size, response.status_code, response.headers)
+                self._record_download(img_url, page_url, filepath, size, sha256, response.headers)
+                
+                print(f"Successfully downloaded image {label}")
+                return size
+                
+            except Exception as e:
+                print(f"Error downloading image {label} from {img_url} (attempt {attempt + 1}): {e}")
+                if attempt < self.image_retries:
+                    time.sleep(self.retry_policy.delay(attempt))
+        return None
+    
+    @contextlib.contextmanager
+    def _discard_on_error(self, filepath):
+        """
+        Delete `filepath` if saving or checking it fails, so a partial or rejected file is never kept
+        """
+        try:
+            yield
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(filepath)
+            raise
+    
+    def _check_image(self, filepath, size, status_code, headers):
+        """
+        Reject a saved image that is shorter than announced or is an HTML page; used by both backends
+        
+        Args:
+            filepath (str): Saved image
+            size (int): Bytes written
+            status_code (int): HTTP status of the response
+            headers (Mapping): Headers of the response
             
+        Raises:
+            IOError: If the image is incomplete or is not an image
+        """
+        expected = self._expected_length(status_code, headers, 0)
+        if expected is not None and size != expected:
+            raise IOError(f"Incomplete download: received {size} of {expected} bytes")
+        if is_html_file(filepath):
+            raise IOError(f"Not an image (Content-Type: {headers.get('Content-Type', '')})")
+    
+    def _record_image_set(self, page_url, total, sizes, seconds):
+        """
+        Keep the throughput of a downloaded image set for the run summary
+        
+        Args:
+            page_url (str): Original page URL
+            total (int): Number of images in the set
+            sizes (list): Size of each fetched image, None for failures
+            seconds (float): Wall-clock time spent fetching the set
+        """
+        with self._stats_lock:
+            self.image_set_stats.append({
+                'page_url': page_url,
+                'images': total,
+                'fetched': sum(1 for size in sizes if size is not None),
+                'bytes': sum(size for size in sizes if size is not None),
+                'seconds': seconds,
+            })
+    
+    def _queue_assembly(self, folder_path, image_paths):
+        """
+        Queue the assembly of a complete image set into `<folder>.pdf`
+        
+        Args:
+            folder_path (str): Folder of the image set
+            image_paths (list): Image files in set order
+        """
+        if self.assembler:
+            self.assembler.submit(image_paths, os.path.normpath(folder_path) + '.pdf')
+    
+    def _plan_image_set(self, image_urls, page_url, entries):
+        """
+        Split an image set into the images already downloaded and those to fetch; shared by both backends
+        
+        Args:
+            image_urls (list): All image URLs of the set
+            page_url (str): Original page URL (for generating folder name)
+            entries (list): Manifest entry of each image already downloaded, None for the others
+        
+        Returns:
+            tuple: (folder of the set, {index: path} of the downloaded images,
+                   {index: path} of the images to fetch, empty if none is left)
+        """
+        folder_path = None
+        done = {}
+        for i, entry in enumerate(entries):
+            if entry:
+                folder_path = folder_path or os.path.dirname(entry['path'])
+                done[i] = entry['path']
+        pending = [i for i in range(len(image_urls)) if i not in done]
+        if not pending:
+            return folder_path, done, {}
+        
+        # Keep the set in the folder of its already downloaded images
+        if folder_path:
+            os.makedirs(folder_path, exist_ok=True)
+        else:
+            folder_path = self._image_folder(page_url)
+        
+        # Paths are chosen up front so the numbering does not depend on completion order
+        return folder_path, done, {i: self._image_path(folder_path, i, image_urls[i]) for i in pending}
+    
+    def _finish_image_set(self, image_urls, page_url, folder_path, done, paths, sizes, seconds):
+        """
+        Account for a fetched image set and queue its assembly once complete; shared by both backends
+        
+        Args:
+            image_urls (list): All image URLs of the set
+            page_url (str): Original page URL
+            folder_path, done, paths: As returned by `_plan_image_set`
+            sizes (list): Size of each image of `paths`, in order, None for failures
+            seconds (float): Wall-clock time spent fetching the images
+        
+        Returns:
+            bool: True if at least one image of the set is downloaded
+        """
+        total = len(image_urls)
+        if not paths:
+            print(f"All {total} images from {page_url} already downloaded, skipping")
+            self._queue_assembly(folder_path, [done[i] for i in range(total)])
+            return True
+        
+        self._record_image_set(page_url, total, sizes, seconds)
+        successful_downloads = len(done) + sum(1 for size in sizes if size is not None)
+        print(f"Downloaded {successful_downloads} out of {total} images to {folder_path}")
+        if successful_downloads == total:
+            set_paths = {**done, **paths}
+            self._queue_assembly(folder_path, [set_paths[i] for i in range(total)])
+        return successful_downloads > 0
+    
     def download_images(self, image_urls, page_url):
         """
         Download images from the given URLs into a dedicated folder
@@ -434,145 +1105,650 @@ class PhDExamDownloader:
             bool: True if at least one image was downloaded successfully, False otherwise
         """
         try:
-            # Generate folder name from the page URL
-            page_name = os.path.basename(page_url).replace('.html', '').replace('/', '-')
-            page_name = re.sub(r'[\\/:*?"<>|]', '-', page_name)  # Remove invalid folder name characters
+            # Images recorded as complete in the manifest are not fetched again
+            entries = [self._completed_download(img_url) for img_url in image_urls]
+            folder_path, done, paths = self._plan_image_set(image_urls, page_url, entries)
             
-            # Create a unique folder name if the page name is too generic
-            if len(page_name) < 5:  # If the page name is too short, add a unique identifier
-                page_name = f"{page_name}-{str(uuid.uuid4())[:8]}"
-                
-            # Full path to the folder
-            folder_path = os.path.join(self.destination_folder, page_name)
-            os.makedirs(folder_path, exist_ok=True)
+            sizes = []
+            start = time.monotonic()
+            if paths:
+                with ThreadPoolExecutor(max_workers=min(self.image_workers, len(paths))) as executor:
+                    sizes = list(executor.map(
+                        lambda i: self._download_image(i, image_urls, paths[i], page_url), paths))
+            return self._finish_image_set(image_urls, page_url, folder_path, done, paths, sizes,
+                                          time.monotonic() - start)
+        
+        except Exception as e:
+            print(f"Error downloading images for {page_url}: {e}")
+            return False
+    
+    def _find_sub_pages(self, page):
+        """
+        Find links to other exam pages inside the main content area of a page
+        
+        Args:
+            page (Page): The fetched page
             
-            successful_downloads = 0
-            for i, img_url in enumerate(image_urls):
-                try:
-                    # Generate a unique filename for each image
-                    extension = os.path.splitext(img_url)[1]
-                    if not extension or len(extension) <= 1:
-                        extension = '.jpg'  # Default extension
-                    
-                    filename = f"image_{i+1}{extension}"
-                    filepath = os.path.join(folder_path, filename)
-                    
-                    # Check if file already exists, if so, add a unique identifier
-                    if os.path.exists(filepath):
-                        unique_id = str(uuid.uuid4())[:8]
-                        filename = f"image_{i+1}_{unique_id}{extension}"
-                        filepath = os.path.join(folder_path, filename)
-                    
-                    # Download the image
-                    print(f"Downloading image {i+1}/{len(image_urls)}: {img_url} to {filepath}")
-                    response = self.session.get(img_url, stream=True)
-                    response.raise_for_status()
-                    
-                    # Save the image
-                    with open(filepath, 'wb') as f:
-                        for chunk in response.iter_content(chunk_size=8192):
-                            if chunk:
-                                f.write(chunk)
-                    
-                    successful_downloads += 1
-                    print(f"Successfully downloaded image {i+1}/{len(image_urls)}")
-                    
-                    # Add a small delay to avoid overwhelming the server
-                    time.sleep(0.5)
-                    
-                except Exception as e:
-                    print(f"Error downloading image {i+1}/{len(image_urls)} from {img_url}: {e}")
+        Returns:
+            list: Candidate exam page URLs, or None if the page has no content area
+        """
+        page_url = page.url
+        
+        # Look for links within the main content area
+        if not page.scan.has_content_area:
+            print(f"Could not find content area on {page_url}")
+            return None
+        
+        sub_pages = []
+        site_host = urllib.parse.urlsplit(self.base_url).netloc
+        for href in page.scan.content_links:
+            full_url = urljoin(page_url, href)
+            # Check if it looks like an exam page on the site (or on the mirror being crawled)
+            if 'sahla-dz.com' in full_url or urllib.parse.urlsplit(full_url).netloc == site_host:
+                if 'sujet' in full_url.lower() or 'doctorat' in full_url.lower() or 'concour' in full_url.lower():
+                    sub_pages.append(full_url)
+        return sub_pages
+    
+    def _browser_available(self):
+        if self.replay:
+            return self._replay_has_renders
+        return bool(self.use_selenium and self.browser_pool)
+    
+    def _should_escalate(self, html):
+        """
+        Decide whether a page the static tier could not extract is worth rendering
+        
+        Args:
+            html (str): Static HTML of the page, or None if it could not be fetched
+        """
+        return self._browser_available() and (html is None or has_lazy_load_markers(html))
+    
+    def extract_content(self, page_url):
+        """
+        Extract content URLs from a page, trying the cheapest tier first
+        
+        The static tier (requests + HTML parsing) runs first. The page is only
+        rendered with Selenium when its static HTML shows lazy-load markers, or
+        when pages with the same URL pattern have needed the browser before
+        (one such page in `tiers.probe_every` still tries the static tier first).
+        
+        Args:
+            page_url (str): URL of the exam page
             
-            print(f"Downloaded {successful_downloads} out of {len(image_urls)} images to {folder_path}")
-            return successful_downloads > 0
+        Returns:
+            tuple: (dict with 'type' (pdf or images) and 'urls' (list of URLs) or None,
+                   the statically fetched Page or None if it was not fetched)
+        """
+        return self._run_steps(self._extract_steps(page_url))
+    
+    def process_page(self, page_url):
+        """
+        Extract and download the content of a single exam page
+        
+        Args:
+            page_url (str): URL of the exam page
             
+        Returns:
+            tuple: (number of successful downloads, list of candidate sub-page URLs,
+                   or None if the page was not searched for sub-links)
+        """
+        return self._run_steps(self._page_steps(page_url))
+    
+    def _run_steps(self, steps):
+        """
+        Drive a step generator (see `_extract_steps`) with blocking I/O
+        
+        Each step names a method of the backend: it is called with the step
+        arguments and its result, or the exception it raised, is sent back.
+        
+        Returns:
+            The value returned by the generator
+        """
+        result, error = None, None
+        while True:
+            try:
+                step = steps.throw(error) if error else steps.send(result)
+            except StopIteration as done:
+                return done.value
+            result, error = None, None
+            try:
+                result = getattr(self, step[0])(*step[1:])
+            except Exception as e:
+                error = e
+    
+    def _extract_steps(self, page_url):
+        """
+        Tier decisions of `extract_content`, shared by both backends
+        
+        Yields the I/O to perform as (method name, *args) tuples; the backend
+        runs them with its own methods of the same name (see `_run_steps`).
+        """
+        browser_first = self._browser_available() and self.tiers.prefers_browser(page_url)
+        tried_browser = False
+        # Now and then a browser-first page is tried statically, in case its pattern no longer needs the browser
+        if browser_first and not self.tiers.probe_static(page_url):
+            tried_browser = True
+            content_info = yield 'extract_content_with_selenium', page_url
+            if content_info:
+                self.tiers.record(page_url, 'browser')
+                return content_info, None
+        
+        page = None
+        content_info = None
+        try:
+            with self.metrics.stage('fetch_page'):
+                page = yield 'fetch_page', page_url
+            with self.metrics.stage('parse', tier='static'):
+                content_info = self.extract_content_from_page(page)
         except Exception as e:
-            print(f"Error downloading images for {page_url}: {e}")
-            return False
+            print(f"Error extracting content from {page_url}: {e}")
+        if content_info:
+            self.tiers.record(page_url, 'static')
+            return content_info, page
+        
+        if not tried_browser and (browser_first or self._should_escalate(page.html if page else None)):
+            print(f"Static extraction found nothing on {page_url}; rendering it with Selenium")
+            content_info = yield 'extract_content_with_selenium', page_url
+            if content_info:
+                self.tiers.record(page_url, 'browser')
+                return content_info, page
+        
+        self.tiers.record(page_url, 'none')
+        return None, page
     
-    def run(self):
+    def _page_steps(self, page_url):
         """
-        Main method to run the downloader
+        Decisions of `process_page`, shared by both backends; yields I/O steps like `_extract_steps`
         """
-        # Get initial links to exam pages
-        initial_links = self.get_exam_page_links()
+        print(f"\nProcessing page: {page_url}")
+        successful_downloads = 0
+        sub_pages = None
+        
+        # Extract content URLs from the page
+        content_info, page = yield 'extract_content', page_url
         
-        if not initial_links:
-            print("No exam page links found. Exiting.")
+        if content_info and content_info['urls']:
+            if content_info['type'] == 'pdf':
+                # Handle PDF downloads
+                for pdf_url in content_info['urls']:
+                    print(f"Found PDF URL: {pdf_url}")
+                    with self.metrics.stage('download_pdf'):
+                        downloaded = yield 'download_pdf', pdf_url, page_url
+                    successful_downloads += self._count_outcome('download_pdf', downloaded)
+            elif content_info['type'] == 'images':
+                # Handle image downloads
+                print(f"Found {len(content_info['urls'])} images")
+                with self.metrics.stage('download_images'):
+                    downloaded = yield 'download_images', content_info['urls'], page_url
+                successful_downloads += self._count_outcome('download_images', downloaded)
+        else:
+            print(f"No direct content found on {page_url}. Looking for sub-links.")
+            try:
+                # Reuse the page fetched for extraction instead of requesting it again
+                if page is None:
+                    page = yield 'fetch_page', page_url
+                sub_pages = self._find_sub_pages(page)
+            except Exception as e:
+                print(f"Error while looking for sub-links on {page_url}: {e}")
+        
+        self._record_page(page_url, successful_downloads)
+        return successful_downloads, sub_pages
+    
+    def _count_outcome(self, stage, succeeded):
+        """
+        Count a download that reported failure instead of raising as an error of its stage
+        
+        Returns:
+            int: 1 if the download succeeded, 0 otherwise
+        """
+        if not succeeded:
+            self.metrics.inc('errors_total', stage=stage)
+        return 1 if succeeded else 0
+    
+    def _new_frontier(self, initial_links):
+        """
+        Create the crawl frontier, seeded with the links of the listing page
+        
+        Returns:
+            Frontier: Frontier holding the initial links at depth 0
+        """
+        frontier = Frontier(self.max_depth, self.max_pages)
+        for link in initial_links:
+            frontier.add(link, 0)
+        return frontier
+    
+    def _queue_sub_pages(self, page_url, sub_pages, frontier, depth):
+        """
+        Add newly discovered sub-pages to the crawl frontier, skipping known pages
+        
+        Args:
+            page_url (str): Page the sub-pages were found on
+            sub_pages (list): Candidate sub-page URLs, or None
+            frontier (Frontier): Crawl frontier
+            depth (int): Depth of `page_url`
+        """
+        if sub_pages is None:
             return
+        new_links_found = sum(1 for full_url in sub_pages if frontier.add(full_url, depth + 1))
+        if new_links_found > 0:
+            print(f"Found {new_links_found} new links to process.")
+        else:
+            print(f"No new sub-links found on {page_url}")
+    
+    def _run_serial(self, initial_links, resumed=None):
+        """
+        Process pages one at a time
+        
+        Args:
+            initial_links (list): Links of the listing page
+            resumed (tuple): (Frontier, successful downloads) of a resumed crawl, used instead of `initial_links`
+            
+        Returns:
+            tuple: (set of processed page URLs, number of successful downloads)
+        """
+        frontier, successful_downloads = resumed or (self._new_frontier(initial_links), 0)
+        
+        while frontier:
+            page_url, depth = frontier.pop()
+            downloads, sub_pages = self.process_page(page_url)
+            successful_downloads += downloads
+            self._queue_sub_pages(page_url, sub_pages, frontier, depth)
+            self._checkpoint(frontier, successful_downloads)
+        
+        self._end_crawl(frontier, successful_downloads)
+        return frontier.visited, successful_downloads
+    
+    def _run_concurrent(self, initial_links, resumed=None):
+        """
+        Process pages with a bounded pool of worker threads
+        
+        All frontier bookkeeping happens on the calling thread, so the de-duplication
+        rules are the same as in the serial crawl. Per-host politeness is enforced
+        by `self.throttle` on every request made by the workers.
+        
+        Args:
+            initial_links (list): Links of the listing page
+            resumed (tuple): (Frontier, successful downloads) of a resumed crawl, used instead of `initial_links`
+            
+        Returns:
+            tuple: (set of processed page URLs, number of successful downloads)
+        """
+        frontier, successful_downloads = resumed or (self._new_frontier(initial_links), 0)
+        in_flight = {}
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while frontier or in_flight:
+                # Keep every worker busy without queueing the whole frontier at once
+                while frontier and len(in_flight) < self.workers:
+                    page_url, depth = frontier.pop()
+                    in_flight[executor.submit(self.process_page, page_url)] = (page_url, depth)
+                
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                successful_downloads = self._collect_pages(done, in_flight, frontier, successful_downloads)
+        
+        self._end_crawl(frontier, successful_downloads)
+        return frontier.visited, successful_downloads
+    
+    def _collect_pages(self, done, in_flight, frontier, successful_downloads):
+        """
+        Fold finished pages back into the frontier; shared by the thread pool and the async backend
+        
+        Args:
+            done (set): Finished futures (concurrent.futures or asyncio) of `process_page`
+            in_flight (dict): (page URL, depth) of each future still in flight, `done` included
+            frontier (Frontier): Crawl frontier
+            successful_downloads (int): Downloads counted so far
             
-        pages_to_process = list(initial_links)
+        Returns:
+            int: Downloads counted so far, including those of the finished pages
+        """
+        for future in done:
+            page_url, depth = in_flight.pop(future)
+            try:
+                downloads, sub_pages = future.result()
+            except Exception as e:
+                print(f"Error processing page {page_url}: {e}")
+                continue
+            successful_downloads += downloads
+            self._queue_sub_pages(page_url, sub_pages, frontier, depth)
+            self._checkpoint(frontier, successful_downloads, in_flight.values())
+        return successful_downloads
+    
+    def _process_listing(self, listing_url):
+        """
+        Find the exam pages of a listing page leased from the work queue
+        
+        A listing page that cannot be fetched raises, so its lease is released
+        and the page retried instead of being marked done without links.
+        
+        Returns:
+            tuple: (0 downloads, list of exam page URLs), like `process_page`
+        """
+        print(f"\nDiscovering exam pages of {listing_url}")
+        with self.metrics.stage('discover'):
+            return 0, self.get_exam_page_links(listing_url, strict=True)
+    
+    def _renew_leases(self, stop, in_flight):
+        """
+        Keep alive the leases of the pages still being processed until `stop` is set; runs on its own thread
+        
+        Args:
+            stop (threading.Event): Set when the worker exits
+            in_flight (dict): (kind, url, depth) of each leased page, by the future processing it
+        """
+        while not stop.wait(self.work_queue.lease_seconds / 3):
+            # The worker thread adds and removes futures meanwhile: work on a copy
+            pages = [(kind, page_url) for future, (kind, page_url, _) in dict(in_flight).items() if not future.done()]
+            try:
+                self.work_queue.renew(self.worker_id, pages)
+            except Exception as e:
+                print(f"Could not renew the leases of {self.worker_id}: {e}")
+    
+    def _run_worker(self):
+        """
+        Process pages leased from the shared work queue until the whole crawl is done
+        
+        Up to `workers` pages are leased at a time. Pages found on a page are
+        queued in the same transaction that marks it done, so they are
+        de-duplicated against every other process. While other processes
+        still hold leases the worker waits: they may queue more pages, or die
+        and have their pages re-queued.
+        
+        Returns:
+            tuple: (set of page URLs processed by this process, number of successful downloads)
+        """
+        queue = self.work_queue
         processed_pages = set()
         successful_downloads = 0
+        in_flight = {}
+        if not queue.seeded():
+            print(f"Waiting for the coordinator to seed {queue.path}")
+        print(f"Worker {self.worker_id} leasing pages from {queue.path}")
         
-        while pages_to_process:
-            page_url = pages_to_process.pop(0)
-            if page_url in processed_pages:
-                continue
-            
-            processed_pages.add(page_url)
-            
-            print(f"\nProcessing page: {page_url}")
-            
-            # Extract content URLs from the page
-            # Try Selenium first for lazy-loaded content, then fall back to requests
-            content_info = None
-            if self.use_selenium and self.driver:
-                content_info = self.extract_content_with_selenium(page_url)
-            
-            # If Selenium didn't find content or isn't available, try the traditional method
-            if not content_info:
-                content_info = self.extract_pdf_url_from_iframe(page_url)
-            
-            if content_info and content_info['urls']:
-                if content_info['type'] == 'pdf':
-                    # Handle PDF downloads
-                    for pdf_url in content_info['urls']:
-                        print(f"Found PDF URL: {pdf_url}")
-                        if self.download_pdf(pdf_url, page_url):
-                            successful_downloads += 1
-                elif content_info['type'] == 'images':
-                    # Handle image downloads
-                    print(f"Found {len(content_info['urls'])} images")
-                    if self.download_images(content_info['urls'], page_url):
-                        successful_downloads += 1
-            else:
-                print(f"No direct content found on {page_url}. Looking for sub-links.")
-                try:
-                    response = self.session.get(page_url)
-                    response.raise_for_status()
-                    soup = BeautifulSoup(response.text, 'html.parser')
+        stop = threading.Event()
+        heartbeat = threading.Thread(target=self._renew_leases, args=(stop, in_flight), daemon=True)
+        heartbeat.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                while True:
+                    if len(in_flight) < self.workers:
+                        for kind, page_url, depth in queue.lease(self.worker_id, self.workers - len(in_flight)):
+                            task = self._process_listing if kind == 'listing' else self.process_page
+                            in_flight[executor.submit(task, page_url)] = (kind, page_url, depth)
+                    if not in_flight:
+                        if queue.finished():
+                            break
+                        time.sleep(self.queue_poll)
+                        continue
                     
-                    # Look for links within the main content area
-                    content_area = soup.find('div', class_='td-post-content')
-                    if content_area:
-                        sub_links = content_area.find_all('a', href=True)
-                        new_links_found = 0
-                        for link in sub_links:
-                            full_url = urljoin(page_url, link['href'])
-                            # Check if it's a valid, new link
-                            if 'sahla-dz.com' in full_url and full_url not in processed_pages and full_url not in pages_to_process:
-                                # Check if it looks like an exam page
-                                if 'sujet' in full_url.lower() or 'doctorat' in full_url.lower() or 'concour' in full_url.lower():
-                                    pages_to_process.append(full_url)
-                                    new_links_found += 1
-                        if new_links_found > 0:
-                            print(f"Found {new_links_found} new links to process.")
-                        else:
-                            print(f"No new sub-links found on {page_url}")
-                    else:
-                        print(f"Could not find content area on {page_url}")
-                except Exception as e:
-                    print(f"Error while looking for sub-links on {page_url}: {e}")
-
-            # Add a small delay to avoid overwhelming the server
-            time.sleep(1)
+                    done, _ = wait(in_flight, timeout=self.queue_poll, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        kind, page_url, depth = in_flight.pop(future)
+                        try:
+                            downloads, links = future.result()
+                        except Exception as e:
+                            print(f"Error processing page {page_url}: {e}")
+                            queue.release(self.worker_id, kind, page_url)
+                            continue
+                        new_links_found = queue.complete(self.worker_id, kind, page_url, depth, downloads, links)
+                        if new_links_found:
+                            print(f"Queued {new_links_found} new links found on {page_url}")
+                        if kind == 'page':
+                            processed_pages.add(page_url)
+                            successful_downloads += downloads
+        finally:
+            stop.set()
+        print(f"Shared crawl: {queue.summary()}")
+        return processed_pages, successful_downloads
+    
+    def _resumed_crawl(self):
+        """
+        Load the unfinished crawl to continue when resuming
+        
+        Returns:
+            tuple: (Frontier, number of successful downloads), or None to start a new crawl
+        """
+        if not (self.resume and self.checkpoint):
+            return None
+        resumed = self.checkpoint.load(self.base_url, self.max_depth, self.max_pages)
+        if resumed is None:
+            print("No unfinished crawl to resume; starting a new one")
+            return None
+        frontier, successful_downloads = resumed
+        print(f"Resuming crawl: {len(frontier.visited)} pages already processed, {len(frontier)} queued")
+        return resumed
+    
+    def _checkpoint(self, frontier, successful_downloads, in_flight=(), final=False):
+        """
+        Save the crawl state when a checkpoint is due, or unconditionally at the end of the crawl
+        
+        Args:
+            frontier (Frontier): Crawl frontier
+            successful_downloads (int): Successful downloads so far
+            in_flight (iterable): (url, depth) of pages being processed
+            final (bool): Whether the crawl loop has ended
+        """
+        if not self.checkpoint:
+            return
+        try:
+            if final:
+                # A crawl cut short by --max-pages can still be resumed with a higher limit
+                self.checkpoint.save(self.base_url, frontier, successful_downloads, finished=not len(frontier))
+            else:
+                self.checkpoint.page_done(self.base_url, frontier, successful_downloads, list(in_flight))
+        except OSError as e:
+            print(f"Could not save the crawl checkpoint: {e}")
+    
+    def _end_crawl(self, frontier, successful_downloads):
+        """
+        Save the final crawl state and tell why the crawl stopped when a limit cut it short
+        """
+        self._checkpoint(frontier, successful_downloads, final=True)
+        if frontier.limit_reached() and len(frontier):
+            print(f"Stopped after {frontier.max_pages} pages (--max-pages); {len(frontier)} queued pages were not processed")
+        if frontier.stats['too_deep']:
+            print(f"Skipped {frontier.stats['too_deep']} links deeper than {frontier.max_depth} (--max-depth)")
+    
+    def run(self):
+        """
+        Main method to run the downloader
+        """
+        if self.work_queue:
+            processed_pages, successful_downloads = self._run_worker()
+            self._finish_run(processed_pages, successful_downloads)
+            return
+        
+        if self.backend == 'async':
+            print(f"Processing pages with the async backend ({self.workers} pages in flight)")
+            crawl_result = AsyncBackend(self).run()
+            if crawl_result is None:
+                print("No exam page links found. Exiting.")
+                return
+            processed_pages, successful_downloads = crawl_result
+            self._finish_run(processed_pages, successful_downloads)
+            return
+        
+        # A resumed crawl continues from its saved frontier instead of the listing page
+        resumed = self._resumed_crawl()
+        initial_links = None
+        if resumed is None:
+            # Get initial links to exam pages
+            with self.metrics.stage('discover'):
+                initial_links = self.get_exam_page_links()
+            
+            if not initial_links:
+                print("No exam page links found. Exiting.")
+                return
+        
+        if self.workers > 1:
+            print(f"Processing pages with {self.workers} concurrent workers")
+            processed_pages, successful_downloads = self._run_concurrent(initial_links, resumed)
+        else:
+            processed_pages, successful_downloads = self._run_serial(initial_links, resumed)
+        
+        self._finish_run(processed_pages, successful_downloads)
+    
+    def _restore_intact_blob(self, entry):
+        """
+        Replace a broken file by its stored copy when that copy is itself sound
         
+        Returns:
+            bool: True if the file was restored
+        """
+        sha256 = entry['sha256']
+        if not (self.blob_store and sha256 and self.blob_store.has(sha256)):
+            return False
+        blob = self.blob_store.blob_path(sha256)
+        if os.path.exists(entry['path']) and os.path.samefile(entry['path'], blob):
+            return False  # The broken file is the stored copy
+        if check_file(blob, entry['size'], sha256, kind=file_kind(entry['path'])):
+            return False
+        return self.blob_store.restore(sha256, entry['path'], entry['size'])
+    
+    def _discard_download(self, entry):
+        """
+        Delete a broken download and forget it, so the next visit of its page fetches it again
+        """
+        try:
+            os.remove(entry['path'])
+        except FileNotFoundError:
+            pass
+        if self.blob_store and entry['sha256'] and self.blob_store.has(entry['sha256']):
+            blob = self.blob_store.blob_path(entry['sha256'])
+            if file_sha256(blob) != entry['sha256'] or check_file(blob, kind=file_kind(entry['path'])):
+                self.blob_store.discard(entry['sha256'])
+        self.manifest.remove(entry['url'])
+    
+    def verify_downloads(self):
+        """
+        Check every downloaded file and undo the broken ones
+        
+        Files recorded in the manifest are checked against the size (the
+        Content-Length, when the server sent one) and SHA-256 recorded for
+        them; every PDF and image in the destination folder is checked for
+        the structure of its format. A broken or missing file whose content is
+        still sound in the content store is restored from it. Otherwise it is
+        deleted and removed from the manifest. Broken files the manifest does
+        not know are reported and left in place, as their source is unknown.
+        
+        Returns:
+            list: Exam pages whose downloads must be fetched again
+        """
+        entries = self.manifest.entries() if self.manifest else []
+        print(f"Verifying the downloads in {self.destination_folder}")
+        with self.metrics.stage('verify'):
+            checked, problems = scan_downloads(self.destination_folder, entries)
+        
+        pages = set()
+        restored = unknown = 0
+        for problem in problems:
+            self.metrics.inc('verify_problems_total', kind=problem['kind'])
+            entry = problem['entry']
+            if entry is None:
+                print(f"{problem['path']}: {problem['detail']}; not in the manifest, left in place")
+                unknown += 1
+                continue
+            if self._restore_intact_blob(entry):
+                print(f"{problem['path']}: {problem['detail']}; restored from the content store")
+                restored += 1
+                continue
+            print(f"{problem['path']}: {problem['detail']}; queued for download")
+            self._discard_download(entry)
+            pages.add(entry['page_url'])
+        
+        print(f"Verified {checked} files: {len(problems)} broken or missing, {restored} restored from the "
+              f"content store, {unknown} of unknown source, {len(pages)} page(s) to download again")
+        return sorted(page for page in pages if page)
+    
+    def repair(self):
+        """
+        Verify the downloads and fetch again only the broken ones
+        
+        Instead of the listing page, the crawl starts from the exam pages of
+        the broken files; their intact downloads are skipped as usual. The
+        crawl checkpoint is left alone, so an interrupted crawl can still be
+        resumed afterwards.
+        """
+        if not self.manifest:
+            print("Without the manifest broken files cannot be traced to their pages; they are only reported")
+        pages = self.verify_downloads()
+        self.checkpoint = None
+        processed_pages, successful_downloads = set(), 0
+        if pages:
+            frontier = self._new_frontier(pages)
+            if self.workers > 1:
+                processed_pages, successful_downloads = self._run_concurrent(None, (frontier, 0))
+            else:
+                processed_pages, successful_downloads = self._run_serial(None, (frontier, 0))
+        self._finish_run(processed_pages, successful_downloads)
+    
+    def _finish_run(self, processed_pages, successful_downloads):
+        """
+        Print the crawl summary and release resources
+        """
         print(f"\nDownload complete. Processed {len(processed_pages)} pages and successfully downloaded content from {successful_downloads} of them.")
         
+        print(f"Pages served per extraction tier: {self.tiers.summary()}")
+        
+        if self.image_set_stats:
+            print("Image sets:")
+            for stats in self.image_set_stats:
+                rate = stats['bytes'] / stats['seconds'] / 1024 / 1024 if stats['seconds'] else 0
+                print(f"  {stats['page_url']}: {stats['fetched']} of {stats['images']} images, "
+                      f"{stats['bytes'] / 1024 / 1024:.1f} MB in {stats['seconds']:.1f}s ({rate:.2f} MB/s)")
+        
+        if self.assembler:
+            self.assembler.wait()
+            print(f"PDF assembly: {self.assembler.summary()}")
+        
+        if self.blob_store:
+            print(f"Deduplication: {self.blob_store.summary()}")
+        
+        if self.http_cache:
+            self.http_cache.evict()
+            print(f"HTTP cache: {self.http_cache.summary()}")
+        
+        render_summary = self.browser_pool.render_summary() if self.browser_pool else None
+        if render_summary:
+            reasons = ', '.join(f"{reason}: {count}" for reason, count in sorted(render_summary['reasons'].items()))
+            print(f"Selenium rendered {render_summary['pages']} pages in {render_summary['total']:.1f}s "
+                  f"(mean {render_summary['mean']:.2f}s, median {render_summary['median']:.2f}s, "
+                  f"p95 {render_summary['p95']:.2f}s; {reasons})")
+        
+        if self.recorder:
+            self.recorder.close()
+            print(f"Recorded {self.recorder.records} records to {self.recorder.path}")
+        if self.replay:
+            print(f"Replay: {self.replay.summary()}")
+        if self.work_queue:
+            self.work_queue.close()
+        
+        self._write_metrics()
+        
         # Clean up Selenium WebDriver
         if self.use_selenium:
             self._close_selenium_driver()
+    
+    def _write_metrics(self):
+        """
+        Write the JSON run report and, if requested, the Prometheus text file
+        """
+        extra = {'pages_per_tier': dict(self.tiers.served)}
+        if self.http_cache:
+            stats = dict(self.http_cache.stats)
+            requests_made = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / requests_made if requests_made else None
+            extra['http_cache'] = stats
+        if self.blob_store:
+            extra['deduplication'] = dict(self.blob_store.stats)
+        try:
+            self.metrics.write_report(self.report_path, extra)
+            print(f"Run report written to {self.report_path}")
+            if self.prometheus_path:
+                self.metrics.write_prometheus(self.prometheus_path)
+                print(f"Prometheus metrics written to {self.prometheus_path}")
+        except OSError as e:
+            print(f"Error writing the run report: {e}")
 
 
 def main():
@@ -588,4 +1764,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,124 @@
+import re
+from html import unescape
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+# A PDF starts with this marker, possibly after some leading junk
+PDF_MAGIC = b'%PDF'
+PDF_MAGIC_WINDOW = 1024
+
+FORM = re.compile(r'<form\b([^>]*)>(.*?)</form>', re.IGNORECASE | re.DOTALL)
+INPUT = re.compile(r'<input\b([^>]*)>', re.IGNORECASE)
+ATTRIBUTE = re.compile(r'([\w-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+CONFIRM_LINK = re.compile(r'href\s*=\s*"([^"]*[?&](?:amp;)?confirm=[^"]*)"', re.IGNORECASE)
+QUOTA_EXCEEDED = re.compile(r'Too many users have viewed or downloaded this file|quota', re.IGNORECASE)
+
+
+class DriveDownloadError(IOError):
+    """
+    Raised when Google Drive answers with a page that does not lead to the file
+    """
+
+
+def _attributes(markup):
+    return {name.lower(): unescape(double if double is not None else single)
+            for name, double, single in ATTRIBUTE.findall(markup)}
+
+
+def is_html(headers):
+    return 'text/html' in (headers.get('Content-Type') or '').lower()
+
+
+def confirm_url(html, url, cookies=None):
+    """
+    Find where Google Drive's "can't scan this file for viruses" page leads
+
+    Three generations of the page are understood: the `download-form` form
+    posting to drive.usercontent.google.com, the "Download anyway" link
+    carrying a `confirm=` token, and the `download_warning_*` cookie whose
+    value is the token.
+
+    Args:
+        html (str): Body of the HTML answer
+        url (str): URL that returned it
+        cookies (Mapping): Cookies set by the answer
+
+    Returns:
+        str: URL of the file, or None if the page is not a confirmation page
+    """
+    for form_attributes, body in FORM.findall(html):
+        form = _attributes(form_attributes)
+        if form.get('id') != 'download-form' or not form.get('action'):
+            continue
+        fields = []
+        for input_attributes in INPUT.findall(body):
+            field = _attributes(input_attributes)
+            if field.get('name') and field.get('type', 'hidden').lower() == 'hidden':
+                fields.append((field['name'], field.get('value', '')))
+        return f"{urljoin(url, form['action'])}?{urlencode(fields)}"
+
+    link = CONFIRM_LINK.search(html)
+    if link:
+        return urljoin(url, unescape(link.group(1)))
+
+    for name, value in (cookies or {}).items():
+        if name.startswith('download_warning'):
+            parts = urlsplit(url)
+            query = [(key, val) for key, val in parse_qsl(parts.query) if key != 'confirm']
+            query.append(('confirm', value))
+            return urlunsplit(parts._replace(query=urlencode(query)))
+    return None
+
+
+def describe_refusal(html, url):
+    """
+    Returns:
+        str: Why an HTML answer stands in for the requested file
+    """
+    if 'google.com' not in urlsplit(url).netloc.lower():
+        return "The server returned an HTML page instead of the file"
+    if QUOTA_EXCEEDED.search(html):
+        return "Google Drive download quota exceeded for this file; try again later"
+    return "Google Drive returned an HTML page instead of the file"
+
+
+def open_download(get, url, max_confirmations=2):
+    """
+    Request a file, following Google Drive's virus-scan confirmation when it appears
+
+    Args:
+        get (callable): Function fetching a URL, returning a `requests.Response`
+        url (str): URL of the file
+        max_confirmations (int): Confirmation pages followed before giving up
+
+    Returns:
+        requests.Response: Streamed response of the file itself
+
+    Raises:
+        DriveDownloadError: If an HTML page stands in for the file and cannot be confirmed
+    """
+    response = get(url, stream=True)
+    confirmations = 0
+    while response.status_code == 200 and is_html(response.headers):
+        html = response.text
+        response.close()
+        next_url = confirm_url(html, response.url or url, response.cookies)
+        if next_url is None or confirmations == max_confirmations:
+            raise DriveDownloadError(describe_refusal(html, url))
+        confirmations += 1
+        print(f"Following Google Drive download confirmation for {url}")
+        response = get(next_url, stream=True)
+    return response
+
+
+def has_pdf_magic(path):
+    """
+    Check that a downloaded file is a PDF and not an error page saved in its place
+
+    Args:
+        path (str): Downloaded file
+
+    Returns:
+        bool: True if the `%PDF` marker appears in the first kilobyte
+    """
+    with open(path, 'rb') as f:
+        return PDF_MAGIC in f.read(PDF_MAGIC_WINDOW)
@@ -0,0 +1,198 @@
+import re
+from urllib.parse import unquote, urljoin
+
+DRIVE_DOWNLOAD_URL = 'https://drive.google.com/uc?export=download&id={}'
+# Host and path prefix of the Google viewer embeds (gview, viewer, viewerng/viewer, any Drive page).
+# Written so it is also a JavaScript regular expression: the browser tier's readiness probe uses it too.
+VIEWER_EMBED = r'(?:docs\.google\.com/(?:gview|viewer)|drive\.google\.com/)'
+
+
+class Rule:
+    """
+    One way of finding content URLs in a PageScan.
+
+    Rules are grouped into stages. The engine runs the stages in order and the
+    first stage whose rules find anything provides the page's content, so a
+    page with a viewer iframe is not mistaken for an image set because of its
+    thumbnails. Subclasses implement `find`.
+    """
+
+    #: Content type of the URLs found, 'pdf' or 'images'
+    kind = 'pdf'
+    #: Stage of the rule; lower stages run first
+    stage = 0
+
+    def __init__(self, name):
+        self.name = name
+
+    def find(self, scan, page_url):
+        """
+        Args:
+            scan (PageScan): Scanned page
+            page_url (str): URL of the page, for relative links
+
+        Returns:
+            iterable: Content URLs, in page order
+        """
+        raise NotImplementedError
+
+
+class IframeRule(Rule):
+    """
+    Turns the src (or lazy-load data-src) of embedded viewer iframes into PDF URLs
+    """
+
+    stage = 0
+
+    def __init__(self, name, pattern, to_url):
+        """
+        Args:
+            name (str): Rule name
+            pattern (str): Regular expression matched at the start of the iframe URL, compiled once
+            to_url (callable): Builds the PDF URL from the match
+        """
+        super().__init__(name)
+        self.pattern = re.compile(pattern)
+        self.to_url = to_url
+
+    def find(self, scan, page_url):
+        for iframe in scan.iframes:
+            for attribute in ('src', 'data-src'):
+                match = self.pattern.match((iframe.get(attribute) or '').strip())
+                if match:
+                    yield self.to_url(match)
+                    break
+
+
+class ImageRule(Rule):
+    """
+    Collects the page images of Google viewer containers and the large images of the page
+    """
+
+    kind = 'images'
+    stage = 1
+
+    def __init__(self, name='images', min_size=200):
+        """
+        Args:
+            name (str): Rule name
+            min_size (int): Width or height in pixels above which a standalone image counts as content
+        """
+        super().__init__(name)
+        self.min_size = min_size
+
+    def _large(self, img):
+        sizes = [img.get('width'), img.get('height')]
+        try:
+            return any(size and int(size) > self.min_size for size in sizes)
+        except (ValueError, TypeError):
+            # Sizes like "100%" give no hint; keep the image
+            return True
+
+    def find(self, scan, page_url):
+        # Viewer images are also in scan.images; each src is resolved once
+        srcs = [img['src'] for img in scan.viewer_images]
+        srcs.extend(img['src'] for img in scan.images if self._large(img))
+        return [urljoin(page_url, src) for src in dict.fromkeys(srcs)]
+
+
+class DownloadButtonRule(Rule):
+    """
+    Follows the first link wrapping a "Download" button
+    """
+
+    stage = 2
+
+    def find(self, scan, page_url):
+        return [urljoin(page_url, href) for href in scan.download_links[:1]]
+
+
+class PdfLinkRule(Rule):
+    """
+    Follows the first link to a .pdf file
+    """
+
+    stage = 3
+    PDF_HREF = re.compile(r'\.pdf$', re.IGNORECASE)
+
+    def find(self, scan, page_url):
+        for href in scan.links:
+            if self.PDF_HREF.search(href):
+                return [urljoin(page_url, href)]
+        return []
+
+
+# Patterns are anchored on the embed's host, so a viewer wrapping a Drive link is matched once
+DEFAULT_RULES = (
+    IframeRule('viewer-url', r'(?:https?:)?//' + VIEWER_EMBED + r'[^?#]*\?[^#]*?\burl=([^&#]+)',
+               lambda match: unquote(match.group(1))),
+    IframeRule('viewer-srcid', r'(?:https?:)?//docs\.google\.com/viewer[^?#]*\?(?![^#]*\burl=)[^#]*?\bsrcid=([^&#]+)',
+               lambda match: DRIVE_DOWNLOAD_URL.format(match.group(1))),
+    IframeRule('drive', r'(?:https?:)?//drive\.google\.com/(?:file/d/|open\?id=)([a-zA-Z0-9_-]+)',
+               lambda match: DRIVE_DOWNLOAD_URL.format(match.group(1))),
+    ImageRule(),
+    DownloadButtonRule('download-button'),
+    PdfLinkRule('pdf-link'),
+)
+
+
+class RuleEngine:
+    """
+    Runs extraction rules over scanned pages.
+
+    The static and browser tiers share one engine, so both recognise the
+    same embeds. Extra rules can be added with `register`.
+    """
+
+    def __init__(self, rules=DEFAULT_RULES):
+        """
+        Args:
+            rules (iterable): Rules to run
+        """
+        self._stages = []
+        for rule in rules:
+            self.register(rule)
+
+    def register(self, rule):
+        """
+        Add a rule; within a stage, rules run in registration order
+
+        Args:
+            rule (Rule): Rule to add
+        """
+        for stage in self._stages:
+            if stage[0] == rule.stage:
+                stage[1].append(rule)
+                break
+        else:
+            self._stages.append((rule.stage, [rule]))
+            self._stages.sort(key=lambda stage: stage[0])
+
+    @property
+    def rules(self):
+        return [rule for _, rules in self._stages for rule in rules]
+
+    def extract(self, scan, page_url):
+        """
+        Find the content of a page
+
+        Args:
+            scan (PageScan): Scanned page
+            page_url (str): URL of the page, for relative links
+
+        Returns:
+            dict: Dictionary with 'type' (pdf or images) and 'urls' (list of URLs), or None
+        """
+        for _, rules in self._stages:
+            urls = []
+            seen = set()
+            kind = None
+            for rule in rules:
+                for url in rule.find(scan, page_url):
+                    if url not in seen:
+                        seen.add(url)
+                        urls.append(url)
+                        kind = kind or rule.kind
+            if urls:
+                return {'type': kind, 'urls': urls}
+        return None
@@ -0,0 +1,147 @@
+import re
+import threading
+from urllib.parse import urlparse
+
+# Traces that content on a page is injected by JavaScript after load
+LAZY_LOAD_MARKERS = re.compile(
+    r'class=["\'][^"\']*\blazy(?:load|loaded|loading)?\b'
+    r'|data-lazy-src'
+    r'|data-lazy-type'
+    r'|rocket-lazyload'
+    r'|jetpack-lazy'
+    r'|ndfHFb-c4YZDc'
+    r'|<iframe[^>]*\sdata-src=',
+    re.IGNORECASE,
+)
+
+
+def has_lazy_load_markers(html):
+    """
+    Check whether static HTML shows signs of lazy-loaded content
+
+    Args:
+        html (str): Static HTML of a page
+
+    Returns:
+        bool: True if a headless browser may find content the static HTML does not show
+    """
+    return bool(html and LAZY_LOAD_MARKERS.search(html))
+
+
+def url_pattern(url):
+    """
+    Reduce a URL to a pattern shared by similar pages
+
+    The pattern keeps the host, the path depth and the first two words of the
+    first path segment, with digits removed, e.g.
+    https://lmd.sahla-dz.com/2sujets-des-concours-x/ -> lmd.sahla-dz.com/sujets-des/1
+
+    Args:
+        url (str): Page URL
+
+    Returns:
+        str: URL pattern
+    """
+    parsed = urlparse(url)
+    segments = [segment for segment in parsed.path.split('/') if segment]
+    head = ''
+    if segments:
+        words = [word for word in re.sub(r'\d+', '', segments[0].lower()).split('-') if word]
+        head = '-'.join(words[:2])
+    return f"{parsed.netloc.lower()}/{head}/{len(segments)}"
+
+
+class TierPlanner:
+    """
+    Decides which extraction tier a page needs and counts which tier served it.
+
+    Tiers are 'static' (requests + HTML parsing) and 'browser' (Selenium).
+    Pages that neither tier could extract are counted as 'none'. Once enough
+    pages of a URL pattern have needed the browser, later pages of that
+    pattern skip the static attempt. Every `probe_every` such pages, one is
+    tried statically again; if the static tier serves it, the pattern's
+    history is reset and it goes back to static-first.
+    """
+
+    TIERS = ('static', 'browser', 'none')
+
+    def __init__(self, min_samples=3, browser_ratio=0.8, probe_every=10):
+        """
+        Args:
+            min_samples (int): Pages of a pattern seen before its history is trusted
+            browser_ratio (float): Share of browser-served pages above which a pattern goes browser-first
+            probe_every (int): Browser-first pages of a pattern after which one is tried statically again
+        """
+        self.min_samples = min_samples
+        self.browser_ratio = browser_ratio
+        self.probe_every = probe_every
+        self.served = {tier: 0 for tier in self.TIERS}
+        self._patterns = {}
+        self._lock = threading.Lock()
+
+    def prefers_browser(self, url):
+        """
+        Check whether pages like `url` have so far needed the browser
+
+        Args:
+            url (str): Page URL
+
+        Returns:
+            bool: True if the static tier should be skipped
+        """
+        with self._lock:
+            stats = self._patterns.get(url_pattern(url))
+            return bool(stats) and self._browser_first(stats)
+
+    def probe_static(self, url):
+        """
+        Check whether a page of a browser-first pattern should be tried statically anyway
+
+        Called once per browser-first page; returns True for every `probe_every`-th
+        one, so a pattern whose pages no longer need the browser can go back to
+        static-first (see `record`).
+
+        Args:
+            url (str): Page URL
+
+        Returns:
+            bool: True if the static tier should be tried first
+        """
+        with self._lock:
+            stats = self._patterns.get(url_pattern(url))
+            if not stats:
+                return False
+            stats['skipped'] += 1
+            if stats['skipped'] < self.probe_every:
+                return False
+            stats['skipped'] = 0
+            return True
+
+    def record(self, url, tier):
+        """
+        Record which tier served a page
+
+        Args:
+            url (str): Page URL
+            tier (str): 'static', 'browser' or 'none'
+        """
+        with self._lock:
+            self.served[tier] += 1
+            stats = self._patterns.setdefault(url_pattern(url), dict.fromkeys(self.TIERS + ('skipped',), 0))
+            if tier == 'static' and self._browser_first(stats):
+                # The static tier serves this pattern again: forget that it needed the browser
+                stats['browser'] = 0
+                stats['skipped'] = 0
+            stats[tier] += 1
+
+    def _browser_first(self, stats):
+        seen = stats['static'] + stats['browser']
+        return seen >= self.min_samples and stats['browser'] / seen >= self.browser_ratio
+
+    def summary(self):
+        """
+        Returns:
+            str: Human readable counts of pages served per tier
+        """
+        with self._lock:
+            return ', '.join(f"{tier}: {self.served[tier]}" for tier in self.TIERS)
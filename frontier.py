@@ -0,0 +1,160 @@
+import heapq
+import itertools
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that identify a referrer or a share button, not a page
+TRACKING_PARAMS = re.compile(r'^(utm_\w+|fbclid|gclid|dclid|msclkid|mc_cid|mc_eid|_ga|ref|share|replytocom|amp)$',
+                             re.IGNORECASE)
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+# Words that mark a URL as likely to lead to an exam
+EXAM_KEYWORDS = ('sujet', 'doctorat', 'concour')
+
+
+def canonicalize(url):
+    """
+    Reduce a URL to the form used to recognise pages already seen
+
+    The scheme and host are lowercased, default ports, fragments and tracking
+    parameters are dropped and the remaining query parameters are sorted.
+
+    Args:
+        url (str): Absolute URL
+
+    Returns:
+        str: Canonical URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or '').lower()
+    if parts.port and parts.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                   if not TRACKING_PARAMS.match(key))
+    return urlunsplit((scheme, host, parts.path or '/', urlencode(query), ''))
+
+
+def keyword_score(url):
+    """
+    Count the exam keywords in the path of a URL
+
+    Args:
+        url (str): URL to score
+
+    Returns:
+        int: Number of keywords of EXAM_KEYWORDS found
+    """
+    path = urlsplit(url).path.lower()
+    return sum(1 for keyword in EXAM_KEYWORDS if keyword in path)
+
+
+class Frontier:
+    """
+    Priority queue of the pages left to crawl.
+
+    Pages are served shallowest first, and among pages of the same depth the
+    ones whose URL holds more exam keywords come first; ties keep discovery
+    order. Every URL is canonicalized and checked against a set of the URLs
+    already queued or processed, so membership tests are O(1) and push/pop
+    are O(log n).
+    """
+
+    def __init__(self, max_depth=None, max_pages=None):
+        """
+        Args:
+            max_depth (int): Deepest link depth queued (the listing's links are depth 0), None for no limit
+            max_pages (int): Maximum number of pages handed out, None for no limit
+        """
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.visited = set()
+        self.stats = {'queued': 0, 'duplicates': 0, 'too_deep': 0}
+        self._seen = set()
+        self._heap = []
+        self._counter = itertools.count()
+
+    def add(self, url, depth=0):
+        """
+        Queue a page unless it was already seen or is too deep
+
+        Args:
+            url (str): Page URL
+            depth (int): Number of links followed from the listing page
+
+        Returns:
+            bool: True if the page was queued
+        """
+        url = canonicalize(url)
+        if url in self._seen:
+            self.stats['duplicates'] += 1
+            return False
+        if self.max_depth is not None and depth > self.max_depth:
+            self.stats['too_deep'] += 1
+            return False
+        self._seen.add(url)
+        heapq.heappush(self._heap, (depth, -keyword_score(url), next(self._counter), url))
+        self.stats['queued'] += 1
+        return True
+
+    def pop(self):
+        """
+        Take the next page to process
+
+        Returns:
+            tuple: (url, depth), or None if the frontier is empty or the page limit is reached
+        """
+        if not self:
+            return None
+        depth, _, _, url = heapq.heappop(self._heap)
+        self.visited.add(url)
+        return url, depth
+
+    def to_state(self, in_flight=()):
+        """
+        Snapshot the frontier as JSON-serializable data
+
+        Args:
+            in_flight (iterable): (url, depth) of pages handed out but not finished;
+                                  they are saved as queued so a resumed crawl redoes them
+
+        Returns:
+            dict: State accepted by `from_state`
+        """
+        in_flight = {canonicalize(url): depth for url, depth in in_flight}
+        queue = [[url, depth] for depth, _, _, url in sorted(self._heap)]
+        queue = [[url, depth] for url, depth in in_flight.items()] + queue
+        return {
+            'queue': queue,
+            'visited': sorted(self.visited - set(in_flight)),
+            'stats': dict(self.stats),
+        }
+
+    @classmethod
+    def from_state(cls, state, max_depth=None, max_pages=None):
+        """
+        Rebuild a frontier saved with `to_state`
+
+        Args:
+            state (dict): Saved state
+            max_depth (int): Depth limit of the new run
+            max_pages (int): Page limit of the new run
+
+        Returns:
+            Frontier: The restored frontier
+        """
+        frontier = cls(max_depth, max_pages)
+        frontier.visited = set(state['visited'])
+        frontier._seen = set(frontier.visited)
+        for url, depth in state['queue']:
+            frontier.add(url, depth)
+        frontier.stats = dict(state['stats'])
+        return frontier
+
+    def limit_reached(self):
+        return self.max_pages is not None and len(self.visited) >= self.max_pages
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __bool__(self):
+        return bool(self._heap) and not self.limit_reached()
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class HttpCache:
+    """
+    On-disk cache of page bodies with conditional revalidation.
+
+    Only responses carrying an ETag or Last-Modified header are stored. On the
+    next crawl the stored validators are sent as If-None-Match /
+    If-Modified-Since, and a 304 answer is served from disk. Rendered DOMs
+    from the browser tier are stored next to the static body and reused while
+    the static body is unchanged. Entries are evicted when older than
+    `max_age` seconds, and least recently used entries are evicted when the
+    cache grows past `max_bytes`.
+    """
+
+    def __init__(self, folder, max_bytes=200 * 1024 * 1024, max_age=30 * 24 * 3600):
+        """
+        Args:
+            folder (str): Directory holding the cache files
+            max_bytes (int): Maximum total size of cached bodies
+            max_age (float): Maximum age in seconds of a cached entry
+        """
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0, 'render_hits': 0}
+        self._lock = threading.Lock()
+        # Validators of the bodies confirmed unchanged during this run
+        self._revalidated = {}
+        os.makedirs(self.folder, exist_ok=True)
+        self._size = sum(meta.get('size', 0) for _, meta in self._entries())
+
+    def _key(self, url, kind):
+        return hashlib.sha256(f"{kind}:{url}".encode('utf-8')).hexdigest()
+
+    def _paths(self, key):
+        base = os.path.join(self.folder, key)
+        return base + '.json', base + '.body'
+
+    def _entries(self):
+        for name in os.listdir(self.folder):
+            if not name.endswith('.json'):
+                continue
+            key = name[:-len('.json')]
+            try:
+                with open(os.path.join(self.folder, name), 'r', encoding='utf-8') as f:
+                    yield key, json.load(f)
+            except (OSError, ValueError):
+                continue
+
+    def _write_atomic(self, path, data):
+        # Processes sharing a work queue may share the cache folder, and thread ids repeat across them
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _read_meta(self, key):
+        meta_path, body_path = self._paths(key)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(body_path):
+            return None
+        if time.time() - meta.get('stored_at', 0) > self.max_age:
+            self._remove(key, meta)
+            return None
+        return meta
+
+    def _remove(self, key, meta):
+        for path in self._paths(key):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._size -= meta.get('size', 0)
+            self.stats['evictions'] += 1
+
+    def _read_body(self, key, meta):
+        _, body_path = self._paths(key)
+        with open(body_path, 'rb') as f:
+            body = f.read()
+        meta['last_used'] = time.time()
+        self._write_atomic(self._paths(key)[0], json.dumps(meta).encode('utf-8'))
+        return body.decode(meta.get('encoding') or 'utf-8', errors='replace')
+
+    def _write_entry(self, key, meta, body):
+        meta_path, body_path = self._paths(key)
+        old = self._read_meta(key)
+        self._write_atomic(body_path, body)
+        self._write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+        with self._lock:
+            self._size += meta['size'] - (old.get('size', 0) if old else 0)
+            self.stats['stores'] += 1
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def conditional_headers(self, url):
+        """
+        Build the revalidation headers for a cached URL
+
+        Args:
+            url (str): URL about to be requested
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers (empty if the URL is not cached)
+        """
+        meta = self._read_meta(self._key(url, 'page'))
+        headers = {}
+        if meta:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def not_modified(self, url):
+        """
+        Serve a cached body after the server answered 304 Not Modified
+
+        Args:
+            url (str): URL that was revalidated
+
+        Returns:
+            str: Cached body, or None if it disappeared from the cache
+        """
+        key = self._key(url, 'page')
+        meta = self._read_meta(key)
+        if meta is None:
+            return None
+        with self._lock:
+            self.stats['hits'] += 1
+            self._revalidated[url] = meta.get('etag') or meta.get('last_modified')
+        return self._read_body(key, meta)
+
+    def store(self, url, headers, body, encoding=None):
+        """
+        Store a 200 response that carries a validator
+
+        Args:
+            url (str): Requested URL
+            headers (Mapping): Response headers
+            body (bytes): Raw response body
+            encoding (str): Text encoding of the body
+        """
+        with self._lock:
+            self.stats['misses'] += 1
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        now = time.time()
+        meta = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'encoding': encoding,
+            'size': len(body),
+            'stored_at': now,
+            'last_used': now,
+        }
+        self._write_entry(self._key(url, 'page'), meta, body)
+
+    def rendered(self, url):
+        """
+        Return the cached rendered DOM of a page whose static body was revalidated unchanged in this run
+
+        Args:
+            url (str): Page URL
+
+        Returns:
+            str: Rendered HTML, or None
+        """
+        with self._lock:
+            validator = self._revalidated.get(url)
+        if not validator:
+            return None
+        key = self._key(url, 'render')
+        meta = self._read_meta(key)
+        if meta is None or meta.get('validator') != validator:
+            return None
+        with self._lock:
+            self.stats['render_hits'] += 1
+        return self._read_body(key, meta)
+
+    def store_rendered(self, url, html):
+        """
+        Store the rendered DOM of a page, tied to the validator of its static body
+
+        Args:
+            url (str): Page URL
+            html (str): Rendered HTML
+        """
+        page_meta = self._read_meta(self._key(url, 'page'))
+        validator = page_meta and (page_meta.get('etag') or page_meta.get('last_modified'))
+        if not validator:
+            return
+        body = html.encode('utf-8')
+        now = time.time()
+        meta = {'url': url, 'validator': validator, 'encoding': 'utf-8', 'size': len(body),
+                'stored_at': now, 'last_used': now}
+        self._write_entry(self._key(url, 'render'), meta, body)
+
+    def evict(self):
+        """
+        Remove expired entries, then least recently used ones until the cache fits in `max_bytes`
+        """
+        now = time.time()
+        entries = []
+        for key, meta in self._entries():
+            if now - meta.get('stored_at', 0) > self.max_age:
+                self._remove(key, meta)
+            else:
+                entries.append((meta.get('last_used', 0), key, meta))
+        entries.sort()
+        target = self.max_bytes * 0.9
+        for _, key, meta in entries:
+            if self._size <= target:
+                break
+            self._remove(key, meta)
+
+    def summary(self):
+        """
+        Returns:
+            str: Human readable cache statistics
+        """
+        with self._lock:
+            stats = dict(self.stats)
+            size = self._size
+        return (f"{stats['hits']} revalidated (304), {stats['misses']} fetched, "
+                f"{stats['render_hits']} rendered pages reused, {size / 1024 / 1024:.1f} MB on disk")
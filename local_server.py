@@ -0,0 +1,66 @@
+"""
+Throwaway HTTP server on a free local port, for the tests and benchmarks that
+need a real socket.
+
+Handlers derive from `QuietHandler` and only implement `do_GET`:
+
+    server = LocalServer(ExamHandler).start()
+    self.addCleanup(server.stop)
+    url = server.base_url + '/sujet/'
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    """
+    Request handler that keeps access logs out of the test output
+    """
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    quiet_errors = False
+
+    def handle_error(self, request, client_address):
+        if not self.quiet_errors:
+            super().handle_error(request, client_address)
+
+
+class LocalServer:
+    def __init__(self, handler, quiet_errors=False):
+        """
+        Args:
+            handler (type): Request handler class
+            quiet_errors (bool): Hide the tracebacks of connections the client resets,
+                                 e.g. when a handler truncates transfers on purpose
+        """
+        self.handler = handler
+        self.quiet_errors = quiet_errors
+        self._server = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._server = _Server(('127.0.0.1', 0), self.handler)
+        self._server.quiet_errors = self.quiet_errors
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
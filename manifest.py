@@ -0,0 +1,196 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class DownloadManifest:
+    """
+    Persistent record of completed downloads, keyed by source URL.
+
+    Each entry stores where the file was saved, its size and SHA-256, and the
+    ETag/Last-Modified validators the server sent. A URL whose file is still
+    on disk with the recorded size is considered complete; when validators
+    were recorded, later runs confirm it with a conditional request (like
+    `HttpCache`) before skipping it. Exam pages listed by bulk discovery are recorded with their
+    modification timestamp, so unchanged pages need not be crawled again.
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the SQLite database file
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS downloads (
+                    url TEXT PRIMARY KEY,
+                    page_url TEXT,
+                    path TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    sha256 TEXT,
+                    etag TEXT,
+                    last_modified TEXT,
+                    completed_at REAL NOT NULL,
+                    download_url TEXT
+                )
+            ''')
+            columns = [row['name'] for row in self._conn.execute('PRAGMA table_info(downloads)')]
+            if 'download_url' not in columns:  # Manifests written before download URLs were kept
+                self._conn.execute('ALTER TABLE downloads ADD COLUMN download_url TEXT')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    modified TEXT NOT NULL,
+                    crawled_at REAL NOT NULL
+                )
+            ''')
+
+    def get(self, url):
+        """
+        Args:
+            url (str): Source URL
+
+        Returns:
+            dict: The manifest entry, or None
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT * FROM downloads WHERE url = ?', (url,)).fetchone()
+        return dict(row) if row else None
+
+    def entries(self):
+        """
+        Returns:
+            list: Every recorded download, as dicts
+        """
+        with self._lock:
+            rows = self._conn.execute('SELECT * FROM downloads ORDER BY url').fetchall()
+        return [dict(row) for row in rows]
+
+    def complete_entry(self, url):
+        """
+        Return the entry of a URL whose file is still on disk, intact
+
+        Args:
+            url (str): Source URL
+
+        Returns:
+            dict: The manifest entry, or None if the URL must be downloaded
+        """
+        entry = self.get(url)
+        if not entry:
+            return None
+        try:
+            if os.path.getsize(entry['path']) != entry['size']:
+                return None
+        except OSError:
+            return None
+        return entry
+
+    def conditional_headers(self, entry):
+        """
+        Build the revalidation headers of a recorded download
+
+        Args:
+            entry (dict): Manifest entry
+
+        Returns:
+            dict: If-None-Match / If-Modified-Since headers (empty if no validator was recorded)
+        """
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def changed(self, entry, status_code, headers):
+        """
+        Tell from the answer to a conditional request whether a recorded download changed on the server
+
+        Only a 200 answer means a new version: 304 confirms the file, and an
+        error leaves the downloaded file as it is. So does an HTML page, such
+        as Google Drive's virus-scan warning, standing in for the file. A
+        server ignoring the conditional headers is recognised by sending the
+        recorded validators again.
+
+        Args:
+            entry (dict): Manifest entry
+            status_code (int): HTTP status of the answer
+            headers (Mapping): Its headers
+
+        Returns:
+            bool: True if the URL must be downloaded again
+        """
+        if status_code != 200 or 'text/html' in headers.get('Content-Type', '').lower():
+            return False
+        if entry.get('etag') and headers.get('ETag'):
+            return headers['ETag'] != entry['etag']
+        if entry.get('last_modified') and headers.get('Last-Modified'):
+            return headers['Last-Modified'] != entry['last_modified']
+        return True
+
+    def record(self, url, page_url, path, size, sha256=None, etag=None, last_modified=None, download_url=None):
+        """
+        Record a completed download
+
+        Args:
+            url (str): Source URL
+            page_url (str): Exam page the URL was found on
+            path (str): Where the file was saved
+            size (int): File size in bytes
+            sha256 (str): Hex SHA-256 of the file
+            etag (str): ETag response header
+            last_modified (str): Last-Modified response header
+            download_url (str): URL the file was served from, when it differs from `url`
+                                (a confirmed Google Drive download); the validators belong to it
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO downloads '
+                '(url, page_url, path, size, sha256, etag, last_modified, completed_at, download_url) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, page_url, path, size, sha256, etag, last_modified, time.time(), download_url),
+            )
+
+    def remove(self, url):
+        """
+        Forget a download so the next run fetches it again
+
+        Args:
+            url (str): Source URL
+        """
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM downloads WHERE url = ?', (url,))
+
+    def page_modified(self, url):
+        """
+        Args:
+            url (str): Exam page URL
+
+        Returns:
+            str: Modification timestamp the page had when it was last crawled, or None
+        """
+        with self._lock:
+            row = self._conn.execute('SELECT modified FROM pages WHERE url = ?', (url,)).fetchone()
+        return row['modified'] if row else None
+
+    def record_page(self, url, modified):
+        """
+        Record that an exam page was crawled at a given modification timestamp
+
+        Args:
+            url (str): Exam page URL
+            modified (str): Modification timestamp announced by the site
+        """
+        with self._lock, self._conn:
+            self._conn.execute('INSERT OR REPLACE INTO pages (url, modified, crawled_at) VALUES (?, ?, ?)',
+                               (url, modified, time.time()))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
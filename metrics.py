@@ -0,0 +1,217 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Upper bounds of the latency histogram buckets, in seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PROMETHEUS_PREFIX = 'phd_exams_'
+
+
+def _key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def _prometheus_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+class Metrics:
+    """
+    Counters and latency histograms of a crawl, shared by all worker threads.
+
+    Stages are timed with `stage`, which also counts the errors they raise.
+    Bytes transferred by a stage are counted with
+    `inc('bytes_total', size, stage=...)` so the report can give its
+    throughput. Samples are kept in full; a crawl makes a few thousand at most.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self.started = time.time()
+
+    def inc(self, name, value=1, **labels):
+        """
+        Add to a counter
+
+        Args:
+            name (str): Counter name
+            value (float): Amount added
+            **labels: Labels of the series
+        """
+        key = _key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """
+        Add a sample to a histogram
+
+        Args:
+            name (str): Histogram name
+            value (float): Sample, in seconds for latencies
+            **labels: Labels of the series
+        """
+        key = _key(labels)
+        with self._lock:
+            self._histograms.setdefault(name, {}).setdefault(key, []).append(value)
+
+    def counter(self, name, **labels):
+        """
+        Returns:
+            float: Current value of a counter series
+        """
+        with self._lock:
+            return self._counters.get(name, {}).get(_key(labels), 0)
+
+    @contextmanager
+    def stage(self, stage, **labels):
+        """
+        Time a block as one run of a stage; an exception escaping it is counted as an error of the stage
+
+        Args:
+            stage (str): Stage name, e.g. 'fetch_page' or 'render'
+            **labels: Extra labels of the series
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.inc('errors_total', stage=stage, **labels)
+            raise
+        finally:
+            self.observe('stage_seconds', time.perf_counter() - start, stage=stage, **labels)
+
+    def _stages(self, counters, histograms):
+        latencies = {}
+        for key, samples in histograms.get('stage_seconds', {}).items():
+            latencies.setdefault(dict(key)['stage'], []).extend(samples)
+        stages = {}
+        for name, samples in latencies.items():
+            samples.sort()
+            seconds = sum(samples)
+            stages[name] = {
+                'count': len(samples),
+                'seconds': seconds,
+                'mean': seconds / len(samples),
+                'median': _percentile(samples, 0.5),
+                'p95': _percentile(samples, 0.95),
+                'max': samples[-1],
+                'errors': 0,
+                'bytes': 0,
+            }
+        for counter, field in (('errors_total', 'errors'), ('bytes_total', 'bytes')):
+            for key, value in counters.get(counter, {}).items():
+                name = dict(key).get('stage')
+                if name in stages:
+                    stages[name][field] += value
+        for entry in stages.values():
+            if entry['bytes']:
+                entry['bytes_per_second'] = entry['bytes'] / entry['seconds'] if entry['seconds'] else None
+        return stages
+
+    def report(self, extra=None):
+        """
+        Build the run report
+
+        Args:
+            extra (dict): Additional sections, e.g. cache or deduplication statistics
+
+        Returns:
+            dict: JSON-serialisable report with per-stage timings and throughput, counters and histograms
+        """
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: list(samples) for key, samples in series.items()}
+                          for name, series in self._histograms.items()}
+        report = {
+            'started': datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+            'duration_seconds': time.time() - self.started,
+            'stages': self._stages(counters, histograms),
+            'counters': {name: [{'labels': dict(key), 'value': value} for key, value in series.items()]
+                         for name, series in counters.items()},
+            'histograms': {},
+        }
+        for name, series in histograms.items():
+            report['histograms'][name] = []
+            for key, samples in series.items():
+                ordered = sorted(samples)
+                report['histograms'][name].append({
+                    'labels': dict(key),
+                    'count': len(ordered),
+                    'sum': sum(ordered),
+                    'median': _percentile(ordered, 0.5),
+                    'p95': _percentile(ordered, 0.95),
+                    'max': ordered[-1],
+                })
+        report.update(extra or {})
+        return report
+
+    def prometheus_text(self):
+        """
+        Render the counters and histograms in the Prometheus text exposition format
+
+        Returns:
+            str: Metrics text, e.g. for the node exporter's textfile collector
+        """
+        with self._lock:
+            counters = {name: dict(series) for name, series in self._counters.items()}
+            histograms = {name: {key: sorted(samples) for key, samples in series.items()}
+                          for name, series in self._histograms.items()}
+        lines = []
+        for name, series in sorted(counters.items()):
+            metric = PROMETHEUS_PREFIX + name
+            lines.append(f"# TYPE {metric} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{metric}{_prometheus_labels(key)} {value}")
+        for name, series in sorted(histograms.items()):
+            metric = PROMETHEUS_PREFIX + name
+            lines.append(f"# TYPE {metric} histogram")
+            for key, samples in sorted(series.items()):
+                index = 0
+                for bound in LATENCY_BUCKETS:
+                    while index < len(samples) and samples[index] <= bound:
+                        index += 1
+                    lines.append(f"{metric}_bucket{_prometheus_labels(key, [('le', str(bound))])} {index}")
+                lines.append(f"{metric}_bucket{_prometheus_labels(key, [('le', '+Inf')])} {len(samples)}")
+                lines.append(f"{metric}_sum{_prometheus_labels(key)} {sum(samples)}")
+                lines.append(f"{metric}_count{_prometheus_labels(key)} {len(samples)}")
+        return '\n'.join(lines) + '\n'
+
+    def write_report(self, path, extra=None):
+        """
+        Write the JSON run report, atomically
+
+        Args:
+            path (str): Report file
+            extra (dict): Additional sections of the report
+        """
+        self._write(path, json.dumps(self.report(extra), indent=2, sort_keys=True))
+
+    def write_prometheus(self, path):
+        """
+        Write the Prometheus text file, atomically so a scraper never reads half of it
+
+        Args:
+            path (str): Metrics file, conventionally ending in `.prom`
+        """
+        self._write(path, self.prometheus_text())
+
+    def _write(self, path, text):
+        temp_path = f"{path}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
@@ -0,0 +1,35 @@
+from page_scan import scan_page
+
+
+class Page:
+    """
+    An exam page fetched once and parsed at most once.
+
+    Content extraction and sub-link discovery both read `scan`, so a page
+    costs one HTTP request and one parse however many passes run over it.
+    """
+
+    def __init__(self, url, html, status_code=200, headers=None, parser='fast'):
+        """
+        Args:
+            url (str): URL the page was fetched from
+            html (str): Page HTML
+            status_code (int): HTTP status of the response
+            headers (Mapping): Response headers
+            parser (str): Parser behind `scan` ('fast', 'html.parser' or 'lxml')
+        """
+        self.url = url
+        self.html = html
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.parser = parser
+        self._scan = None
+
+    @property
+    def scan(self):
+        """
+        PageScan of the page, built on first access with the page's parser
+        """
+        if self._scan is None:
+            self._scan = scan_page(self.html, self.parser)
+        return self._scan
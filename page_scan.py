@@ -0,0 +1,204 @@
+import re
+from html.parser import HTMLParser
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+try:
+    from lxml import etree
+except ImportError:  # lxml only speeds up the fast parser
+    etree = None
+
+PARSERS = ('fast', 'html.parser', 'lxml')
+CONTENT_AREA_CLASS = 'td-post-content'
+# Class of the Google viewer containers that hold page images
+VIEWER_CLASS = 'ndfHFb-c4YZDc-cYSp0e-DARUcf-PLDbbf'
+DOWNLOAD_TEXT = re.compile(r'Download', re.IGNORECASE)
+
+
+class PageScan:
+    """
+    The parts of a page that content extraction and link discovery read.
+
+    Attributes:
+        iframes (list): Attributes of every iframe
+        images (list): Attributes of every img with a src
+        viewer_images (list): Attributes of the imgs inside Google viewer containers
+        has_viewer (bool): Whether the page has a Google viewer container
+        links (list): href of every link
+        content_links (list): href of the links inside the main content area
+        has_content_area (bool): Whether the page has a main content area
+        download_links (list): href of the links wrapping a "Download" button
+    """
+
+    def __init__(self):
+        self.iframes = []
+        self.images = []
+        self.viewer_images = []
+        self.has_viewer = False
+        self.links = []
+        self.content_links = []
+        self.has_content_area = False
+        self.download_links = []
+
+
+def _classes(attrs):
+    value = attrs.get('class') or ''
+    return value if isinstance(value, str) else ' '.join(value)
+
+
+class _ScanBuilder:
+    """
+    Turns start/end/data events into a PageScan without building a tree.
+
+    Nesting is tracked with counters of the container's own tag, which
+    tolerates the unclosed void elements common in WordPress markup.
+    """
+
+    def __init__(self):
+        self.scan = PageScan()
+        self._content = None  # [tag, open count] of the content area being read
+        self._viewer = None
+        self._link = None  # href of the enclosing link
+        self._button = None  # text of the button being read
+
+    def _enter(self, state, tag):
+        if state and state[0] == tag:
+            state[1] += 1
+
+    def _leave(self, state, tag):
+        if state and state[0] == tag:
+            state[1] -= 1
+            return None if state[1] == 0 else state
+        return state
+
+    def start(self, tag, attrs):
+        self._enter(self._content, tag)
+        self._enter(self._viewer, tag)
+        if tag == 'iframe':
+            self.scan.iframes.append(attrs)
+        elif tag == 'img' and attrs.get('src'):
+            self.scan.images.append(attrs)
+            if self._viewer:
+                self.scan.viewer_images.append(attrs)
+        elif tag == 'a':
+            href = attrs.get('href')
+            self._link = href
+            if href is not None:
+                self.scan.links.append(href)
+                if self._content:
+                    self.scan.content_links.append(href)
+        elif tag == 'button':
+            self._button = []
+        if tag in ('div', 'iframe') and self._viewer is None and VIEWER_CLASS in _classes(attrs):
+            self.scan.has_viewer = True
+            self._viewer = [tag, 1]
+        if tag == 'div' and self._content is None and CONTENT_AREA_CLASS in _classes(attrs).split():
+            self.scan.has_content_area = True
+            self._content = [tag, 1]
+
+    def end(self, tag):
+        self._content = self._leave(self._content, tag)
+        self._viewer = self._leave(self._viewer, tag)
+        if tag == 'a':
+            self._link = None
+        elif tag == 'button' and self._button is not None:
+            if self._link is not None and DOWNLOAD_TEXT.search(''.join(self._button)):
+                self.scan.download_links.append(self._link)
+            self._button = None
+
+    def data(self, text):
+        if self._button is not None:
+            self._button.append(text)
+
+    def close(self):
+        return self.scan
+
+
+class _StdlibScanner(HTMLParser):
+
+    VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+    def __init__(self, builder):
+        super().__init__(convert_charrefs=True)
+        self.builder = builder
+
+    def handle_starttag(self, tag, attrs):
+        self.builder.start(tag, {name: value or '' for name, value in attrs})
+        if tag in self.VOID_TAGS:
+            self.builder.end(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.builder.start(tag, {name: value or '' for name, value in attrs})
+        self.builder.end(tag)
+
+    def handle_endtag(self, tag):
+        if tag not in self.VOID_TAGS:
+            self.builder.end(tag)
+
+    def handle_data(self, data):
+        self.builder.data(data)
+
+
+def scan_html(html):
+    """
+    Scan a page in one streaming pass, without building a tree
+
+    Uses lxml's event parser when lxml is installed, the standard library
+    tokenizer otherwise.
+
+    Args:
+        html (str): Page HTML
+
+    Returns:
+        PageScan: The parts of the page extraction needs
+    """
+    builder = _ScanBuilder()
+    if etree is not None:
+        parser = etree.HTMLParser(target=builder)
+        parser.feed(html)
+        return parser.close()
+    scanner = _StdlibScanner(builder)
+    scanner.feed(html)
+    scanner.close()
+    return builder.scan
+
+
+def _walk(node, builder):
+    for child in node.children:
+        if isinstance(child, Tag):
+            builder.start(child.name, child.attrs)
+            _walk(child, builder)
+            builder.end(child.name)
+        elif isinstance(child, NavigableString):
+            builder.data(str(child))
+
+
+def scan_soup(soup):
+    """
+    Scan a BeautifulSoup tree, giving the same result as `scan_html` on its markup
+
+    Args:
+        soup (BeautifulSoup): Parsed page
+
+    Returns:
+        PageScan: The parts of the page extraction needs
+    """
+    builder = _ScanBuilder()
+    _walk(soup, builder)
+    return builder.scan
+
+
+def scan_page(html, parser='fast'):
+    """
+    Scan a page with the selected parser
+
+    Args:
+        html (str): Page HTML
+        parser (str): 'fast' for the streaming scan, 'html.parser' or 'lxml' for a full BeautifulSoup tree
+
+    Returns:
+        PageScan: The parts of the page extraction needs
+    """
+    if parser == 'fast':
+        return scan_html(html)
+    return scan_soup(BeautifulSoup(html, parser))
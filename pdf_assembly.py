@@ -0,0 +1,241 @@
+import io
+import multiprocessing
+import os
+import struct
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is only needed for non-JPEG pages
+    Image = None
+
+# JPEG start-of-frame markers (baseline, extended, progressive, lossless...)
+SOF_MARKERS = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+COLOR_SPACES = {1: '/DeviceGray', 3: '/DeviceRGB', 4: '/DeviceCMYK'}
+
+
+def jpeg_info(path):
+    """
+    Read the dimensions and component count of a JPEG without decoding it
+
+    Args:
+        path (str): JPEG file
+
+    Returns:
+        tuple: (width, height, components), or None if the file is not a JPEG
+    """
+    with open(path, 'rb') as f:
+        if f.read(2) != b'\xff\xd8':
+            return None
+        while True:
+            byte = f.read(1)
+            if not byte:
+                return None
+            if byte != b'\xff':
+                continue
+            marker = f.read(1)
+            while marker == b'\xff':
+                marker = f.read(1)
+            if not marker:
+                return None
+            code = marker[0]
+            # Markers without a length field
+            if code == 0x01 or 0xD0 <= code <= 0xD9:
+                continue
+            length_bytes = f.read(2)
+            if len(length_bytes) < 2:
+                return None
+            length = struct.unpack('>H', length_bytes)[0]
+            if code in SOF_MARKERS:
+                header = f.read(6)
+                if len(header) < 6:
+                    return None
+                _, height, width, components = struct.unpack('>BHHB', header)
+                return width, height, components
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+def _as_jpeg(path):
+    """
+    Return the JPEG bytes and properties of an image, converting it with Pillow if needed
+
+    Returns:
+        tuple: (data, width, height, components), or None if the image cannot be embedded
+    """
+    info = jpeg_info(path)
+    if info:
+        with open(path, 'rb') as f:
+            return (f.read(),) + info
+    if Image is None:
+        return None
+    with Image.open(path) as image:
+        if image.mode not in ('L', 'RGB', 'CMYK'):
+            image = image.convert('RGB')
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=90)
+        width, height = image.size
+        components = {'L': 1, 'RGB': 3, 'CMYK': 4}[image.mode]
+    return buffer.getvalue(), width, height, components
+
+
+class _PdfWriter:
+    """
+    Minimal PDF writer that streams one object at a time to disk.
+
+    Only the byte offset of each object stays in memory, so the memory used
+    by a 100-page scan is that of its largest page.
+    """
+
+    def __init__(self, f):
+        self.f = f
+        self.offsets = {}
+        self.f.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def write_object(self, number, dictionary, stream=None):
+        self.offsets[number] = self.f.tell()
+        self.f.write(f"{number} 0 obj\n".encode('ascii'))
+        if stream is None:
+            self.f.write(dictionary.encode('ascii'))
+        else:
+            self.f.write(dictionary[:-2].encode('ascii'))
+            self.f.write(f" /Length {len(stream)} >>\nstream\n".encode('ascii'))
+            self.f.write(stream)
+            self.f.write(b'\nendstream')
+        self.f.write(b'\nendobj\n')
+
+    def finish(self, root):
+        xref_offset = self.f.tell()
+        count = max(self.offsets) + 1
+        self.f.write(f"xref\n0 {count}\n0000000000 65535 f \n".encode('ascii'))
+        for number in range(1, count):
+            self.f.write(f"{self.offsets[number]:010d} 00000 n \n".encode('ascii'))
+        self.f.write(f"trailer\n<< /Size {count} /Root {root} 0 R >>\n"
+                     f"startxref\n{xref_offset}\n%%EOF\n".encode('ascii'))
+
+
+def assemble_pdf(image_paths, output_path):
+    """
+    Assemble images into a PDF with one page per image, in the given order
+
+    JPEG pages are embedded as they are (DCTDecode), without re-encoding.
+    Other formats are converted to JPEG when Pillow is installed. Pages are
+    sized at 72 dpi, one point per pixel.
+
+    Args:
+        image_paths (list): Image files in page order
+        output_path (str): Path of the PDF to create
+
+    Returns:
+        int: Number of pages written
+
+    Raises:
+        ValueError: If an image can neither be embedded nor converted
+    """
+    tmp_path = output_path + '.part'
+    # Objects 1 and 2 are the catalog and the page tree, written last once all pages are known
+    kids = []
+    with open(tmp_path, 'wb') as f:
+        writer = _PdfWriter(f)
+        number = 3
+        for path in image_paths:
+            jpeg = _as_jpeg(path)
+            if jpeg is None:
+                raise ValueError(f"{path} is not a JPEG and Pillow is not installed to convert it")
+            data, width, height, components = jpeg
+            image_number, contents_number, page_number = number, number + 1, number + 2
+            number += 3
+            decode = ' /Decode [1 0 1 0 1 0 1 0]' if components == 4 else ''
+            writer.write_object(image_number, (
+                f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                f"/ColorSpace {COLOR_SPACES.get(components, '/DeviceRGB')} /BitsPerComponent 8"
+                f"{decode} /Filter /DCTDecode >>"), data)
+            del data
+            drawing = zlib.compress(f"q {width} 0 0 {height} 0 0 cm /Im0 Do Q".encode('ascii'))
+            writer.write_object(contents_number, "<< /Filter /FlateDecode >>", drawing)
+            writer.write_object(page_number, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] "
+                f"/Resources << /XObject << /Im0 {image_number} 0 R >> >> "
+                f"/Contents {contents_number} 0 R >>"))
+            kids.append(f"{page_number} 0 R")
+        writer.write_object(2, f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {len(kids)} >>")
+        writer.write_object(1, "<< /Type /Catalog /Pages 2 0 R >>")
+        writer.finish(1)
+    os.replace(tmp_path, output_path)
+    return len(kids)
+
+
+def _is_up_to_date(image_paths, output_path):
+    try:
+        built = os.path.getmtime(output_path)
+        return all(os.path.getmtime(path) <= built for path in image_paths)
+    except OSError:
+        return False
+
+
+class PdfAssembler:
+    """
+    Assembles downloaded image sets into PDFs in a pool of worker processes.
+
+    Sets are submitted as soon as they are complete, so assembly runs while
+    the crawl continues. A PDF newer than all of its images is not rebuilt.
+    """
+
+    def __init__(self, workers=None):
+        """
+        Args:
+            workers (int): Number of worker processes (defaults to the CPU count)
+        """
+        self.workers = workers
+        self.stats = {'assembled': 0, 'pages': 0, 'skipped': 0, 'failed': 0}
+        self._executor = None
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def submit(self, image_paths, output_path):
+        """
+        Queue the assembly of an image set
+
+        Args:
+            image_paths (list): Image files in page order
+            output_path (str): Path of the PDF to create
+        """
+        if _is_up_to_date(image_paths, output_path):
+            with self._lock:
+                self.stats['skipped'] += 1
+            return
+        with self._lock:
+            if self._executor is None:
+                # Spawned rather than forked, the crawl holds threads and browser sessions
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context('spawn'))
+            future = self._executor.submit(assemble_pdf, list(image_paths), output_path)
+            self._futures.append((output_path, future))
+
+    def wait(self):
+        """
+        Wait for every queued assembly to finish and shut the pool down
+        """
+        with self._lock:
+            futures, self._futures = self._futures, []
+            executor, self._executor = self._executor, None
+        for output_path, future in futures:
+            try:
+                pages = future.result()
+                print(f"Assembled {pages} page(s) into {output_path}")
+                self.stats['assembled'] += 1
+                self.stats['pages'] += pages
+            except Exception as e:
+                print(f"Error assembling {output_path}: {e}")
+                self.stats['failed'] += 1
+        if executor is not None:
+            executor.shutdown()
+
+    def summary(self):
+        """
+        Returns:
+            str: Human readable assembly statistics
+        """
+        return (f"{self.stats['assembled']} PDF(s) assembled ({self.stats['pages']} pages), "
+                f"{self.stats['skipped']} up to date, {self.stats['failed']} failed")
@@ -0,0 +1,282 @@
+import contextlib
+import ctypes
+import ctypes.util
+import hashlib
+import io
+import os
+import socket
+import sys
+import threading
+import time
+
+BLOCK_SIZE = 1024 * 1024
+FALLOC_FL_KEEP_SIZE = 0x01
+# A claim on a partial file older than this is taken over, whoever holds it
+CLAIM_STALE_SECONDS = 3600
+
+_libc = None
+if sys.platform.startswith('linux'):
+    try:
+        _libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        _libc.fallocate.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_longlong, ctypes.c_longlong]
+    except (OSError, AttributeError):  # Preallocation is only an optimisation
+        _libc = None
+
+
+def preallocate(fd, offset, length):
+    """
+    Reserve disk space for the rest of a file without changing its size
+
+    The size is kept so a download interrupted even by a crash leaves a
+    `.part` file exactly as long as the bytes received, ready to be resumed.
+    Only Linux offers this; elsewhere nothing is reserved.
+
+    Args:
+        fd (int): File descriptor
+        offset (int): Start of the range to reserve
+        length (int): Length of the range to reserve
+
+    Returns:
+        bool: True if the space was reserved
+    """
+    if _libc is None or length <= 0:
+        return False
+    return _libc.fallocate(fd, FALLOC_FL_KEEP_SIZE, offset, length) == 0
+
+
+class BlockWriter:
+    """
+    Writes a download to disk through one reusable buffer, hashing it inline.
+
+    The body is read straight into the buffer (`fill`) or copied into it
+    (`write`), and only whole blocks of `block_size` bytes are hashed and
+    written, through an unbuffered file. A body of N bytes costs about
+    N / block_size Python iterations and write syscalls instead of one per
+    small chunk.
+    """
+
+    def __init__(self, filepath, offset=0, expected_size=None, block_size=BLOCK_SIZE, reserve=False):
+        """
+        Args:
+            filepath (str): Destination path
+            offset (int): Size of the partial file the body continues (0 to start a new file)
+            expected_size (int): Final size of the file, if known
+            block_size (int): Size of the buffer and of each write
+            reserve (bool): Whether to reserve the disk space of the rest of the file up front
+        """
+        self.filepath = filepath
+        self.offset = offset
+        self.expected_size = expected_size
+        self.reserve = reserve
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self._buffer = bytearray(block_size)
+        self._view = memoryview(self._buffer)
+        self._fill = 0
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.filepath, 'r+b' if self.offset else 'wb', buffering=0)
+        if self.offset:
+            # Hash the bytes kept from the previous attempt so the digest covers the whole file
+            while True:
+                read = self._file.readinto(self._view)
+                if not read:
+                    break
+                self.digest.update(self._view[:read])
+                self.size += read
+            self._file.seek(self.size)
+            self._file.truncate()
+        if self.reserve and self.expected_size:
+            preallocate(self._file.fileno(), self.size, self.expected_size - self.size)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            self._flush()
+        finally:
+            self._file.close()
+
+    def _flush(self):
+        if not self._fill:
+            return
+        block = self._view[:self._fill]
+        self._file.write(block)
+        self.digest.update(block)
+        self.size += self._fill
+        self._fill = 0
+
+    def fill(self, readinto):
+        """
+        Copy a stream to the file by reading it straight into the buffer
+
+        Args:
+            readinto (callable): `readinto` of the stream; returns 0 at the end
+        """
+        block_size = len(self._buffer)
+        while True:
+            read = readinto(self._view[self._fill:])
+            if not read:
+                break
+            self._fill += read
+            if self._fill == block_size:
+                self._flush()
+
+    def write(self, data):
+        """
+        Append a chunk of the body
+
+        Args:
+            data (bytes): Chunk, of any size
+        """
+        data = memoryview(data)
+        block_size = len(self._buffer)
+        while data:
+            taken = min(len(data), block_size - self._fill)
+            self._view[self._fill:self._fill + taken] = data[:taken]
+            self._fill += taken
+            data = data[taken:]
+            if self._fill == block_size:
+                self._flush()
+
+    def result(self):
+        """
+        Returns:
+            tuple: (size of the file in bytes, hex SHA-256 of the file)
+        """
+        self._flush()
+        return self.size, self.digest.hexdigest()
+
+
+def write_response(response, filepath, offset=0, expected_size=None, reserve=False):
+    """
+    Stream a `requests` response body to `filepath`, hashing it on the way
+
+    Identity-encoded bodies are read with `readinto` from the connection;
+    compressed bodies, and bodies already loaded, go through `iter_content`
+    in blocks.
+
+    Args:
+        response (requests.Response): Streamed response
+        filepath (str): Destination path
+        offset (int): Size of the partial file the body continues (0 to start a new file)
+        expected_size (int): Final size of the file, if known
+        reserve (bool): Whether to reserve the disk space of the file up front
+
+    Returns:
+        tuple: (size of the file in bytes, hex SHA-256 of the file)
+    """
+    raw = response.raw
+    encoding = response.headers.get('Content-Encoding', 'identity').lower()
+    direct = (isinstance(raw, io.IOBase) and encoding == 'identity'
+              and not getattr(response, '_content_consumed', False))
+    with BlockWriter(filepath, offset, expected_size, reserve=reserve) as writer:
+        if direct:
+            writer.fill(raw.readinto)
+        else:
+            for chunk in response.iter_content(chunk_size=BLOCK_SIZE):
+                writer.write(chunk)
+        return writer.result()
+
+
+class KeyedLock:
+    """
+    One lock per key (a URL or a destination path), created on demand and dropped once unused.
+
+    `hold` serves threads; `hold_async` serves coroutines of one event loop
+    when the locks are created with `asyncio.Lock`.
+    """
+
+    def __init__(self, factory=threading.Lock):
+        """
+        Args:
+            factory (callable): Creates the lock of a key
+        """
+        self._factory = factory
+        self._guard = threading.Lock()
+        self._locks = {}
+
+    def _enter(self, key):
+        with self._guard:
+            entry = self._locks.setdefault(key, [self._factory(), 0])
+            entry[1] += 1
+        return entry
+
+    def _leave(self, key, entry):
+        with self._guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del self._locks[key]
+
+    @contextlib.contextmanager
+    def hold(self, key):
+        entry = self._enter(key)
+        try:
+            with entry[0]:
+                yield
+        finally:
+            self._leave(key, entry)
+
+    @contextlib.asynccontextmanager
+    async def hold_async(self, key):
+        entry = self._enter(key)
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            self._leave(key, entry)
+
+
+def _claim_is_stale(claim_path):
+    try:
+        with open(claim_path, 'r', encoding='utf-8') as f:
+            host, _, pid = f.read().partition(':')
+        if time.time() - os.path.getmtime(claim_path) > CLAIM_STALE_SECONDS:
+            return True
+    except (OSError, ValueError):
+        return True  # Gone or half written
+    if host != socket.gethostname() or not pid.isdigit():
+        return False
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+@contextlib.contextmanager
+def claim(part_path):
+    """
+    Own a partial file for the time of a download, against other processes sharing the folder
+
+    The claim is a `<part>.claim` file created with O_EXCL and holding the
+    host and process id of its owner. A claim left by a process that died on
+    this host, or older than CLAIM_STALE_SECONDS, is taken over. Threads of
+    one process must also serialize on the path (see `KeyedLock`).
+
+    Args:
+        part_path (str): Partial file about to be written
+
+    Raises:
+        FileExistsError: If another live process is writing the file
+    """
+    claim_path = f"{part_path}.claim"
+    owner = f"{socket.gethostname()}:{os.getpid()}"
+    for attempt in range(2):
+        try:
+            fd = os.open(claim_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o644)
+            break
+        except FileExistsError:
+            if attempt or not _claim_is_stale(claim_path):
+                raise FileExistsError(f"{part_path} is being downloaded by another process")
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(claim_path)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        f.write(owner)
+    try:
+        yield
+    finally:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(claim_path)
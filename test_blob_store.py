@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from blob_store import BlobStore
+from download_exams import PhDExamDownloader
+
+
+def pdf_response(body):
+    response = MagicMock(status_code=200, url=None, headers={'Content-Type': 'application/pdf'})
+    response.iter_content.return_value = [body]
+    return response
+
+
+class TestBlobStore(unittest.TestCase):
+    
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+    
+    def _write(self, name, body):
+        path = os.path.join(self.folder.name, name)
+        with open(path, 'wb') as f:
+            f.write(body)
+        return path
+    
+    def test_duplicates_share_one_blob(self):
+        store = BlobStore(os.path.join(self.folder.name, '.blobs'))
+        first = self._write('a.pdf', b'same exam')
+        second = self._write('b.pdf', b'same exam')
+        self.assertFalse(store.add(first, 'ab' * 32, 9))
+        self.assertTrue(store.add(second, 'ab' * 32, 9))
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertEqual(store.stats['disk_bytes_saved'], 9)
+    
+    def test_deleted_file_restored_without_transfer(self):
+        downloader = PhDExamDownloader("https://lmd.sahla-dz.com/", self.folder.name, use_selenium=False)
+        self.addCleanup(downloader.manifest.close)
+        downloader._get = MagicMock(return_value=pdf_response(b'%PDF exam'))
+        self.assertTrue(downloader.download_pdf("https://x/exam.pdf", "https://x/page"))
+        path = os.path.join(self.folder.name, 'exam.pdf')
+        os.remove(path)
+        
+        self.assertTrue(downloader.download_pdf("https://x/exam.pdf", "https://x/page"))
+        self.assertEqual(downloader._get.call_count, 1)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), b'%PDF exam')
+        self.assertEqual(downloader.blob_store.stats['transfer_bytes_saved'], len(b'%PDF exam'))
+
+if __name__ == '__main__':
+    unittest.main()
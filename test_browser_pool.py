@@ -0,0 +1,102 @@
+import threading
+import unittest
+from unittest.mock import MagicMock
+from selenium.common.exceptions import WebDriverException
+from browser_pool import AdaptiveTimeout, BrowserPool, ReadinessLoader
+
+
+class FakeDriver:
+    def __init__(self, crash_on=None):
+        self.crash_on = crash_on
+        self.page_source = ''
+        self.quit = MagicMock()
+    
+    def get(self, url):
+        if url == self.crash_on:
+            raise WebDriverException("chrome not reachable")
+        self.page_source = f"<html>{url}</html>"
+
+
+class TestBrowserPool(unittest.TestCase):
+    
+    def _pool(self, size=2, max_pages=50, crash_on=None):
+        self.drivers = []
+        def factory():
+            driver = FakeDriver(crash_on if not self.drivers else None)
+            self.drivers.append(driver)
+            return driver
+        return BrowserPool(factory, size=size, max_pages_per_driver=max_pages,
+                           page_loader=lambda driver, url: driver.get(url))
+    
+    def test_render_returns_page_source(self):
+        pool = self._pool()
+        self.assertEqual(pool.render("https://example.com/a"), "<html>https://example.com/a</html>")
+        self.assertEqual(len(self.drivers), 1)
+    
+    def test_driver_recycled_after_max_pages(self):
+        pool = self._pool(size=1, max_pages=2)
+        for i in range(5):
+            pool.render(f"https://example.com/{i}")
+        self.assertEqual(len(self.drivers), 3)
+        self.assertTrue(self.drivers[0].quit.called)
+        self.assertTrue(self.drivers[1].quit.called)
+    
+    def test_crashed_driver_replaced(self):
+        pool = self._pool(size=1, crash_on="https://example.com/crash")
+        self.assertEqual(pool.render("https://example.com/crash"), "<html>https://example.com/crash</html>")
+        self.assertEqual(len(self.drivers), 2)
+        self.assertTrue(self.drivers[0].quit.called)
+    
+    def test_concurrent_renders_bounded_by_size(self):
+        pool = self._pool(size=3, max_pages=4)
+        threads = [threading.Thread(target=pool.render, args=(f"https://example.com/{i}",)) for i in range(30)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=5)
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+        live = [d for d in self.drivers if not d.quit.called]
+        self.assertLessEqual(len(live), 3)
+        pool.close()
+        self.assertTrue(all(d.quit.called for d in self.drivers))
+
+
+
+class ScriptedDriver:
+    def __init__(self, states):
+        self.states = list(states)
+        self.page_source = ''
+    
+    def get(self, url):
+        pass
+    
+    def execute_script(self, script):
+        return self.states.pop(0) if len(self.states) > 1 else self.states[0]
+
+
+class TestReadinessLoader(unittest.TestCase):
+    
+    LOADING = {'readyState': 'loading', 'sinceMutation': 0, 'sinceResource': 0, 'viewer': False}
+    
+    def test_viewer_iframe_ends_wait(self):
+        loader = ReadinessLoader(poll_interval=0)
+        driver = ScriptedDriver([self.LOADING, self.LOADING, dict(self.LOADING, viewer=True)])
+        self.assertEqual(loader(driver, "https://example.com/a"), 'viewer')
+    
+    def test_quiescent_page_ends_wait(self):
+        loader = ReadinessLoader(quiet_period=0.5, poll_interval=0)
+        busy = {'readyState': 'complete', 'sinceMutation': 100, 'sinceResource': 900, 'viewer': False}
+        idle = {'readyState': 'complete', 'sinceMutation': 600, 'sinceResource': 900, 'viewer': False}
+        self.assertEqual(loader(ScriptedDriver([busy, idle]), "https://example.com/a"), 'quiescent')
+        self.assertEqual(loader.summary()['reasons'], {'quiescent': 1})
+    
+    def test_timeout_adapts_to_observed_latency(self):
+        timeout = AdaptiveTimeout(min_timeout=0.05, max_timeout=0.2, multiplier=2)
+        loader = ReadinessLoader(poll_interval=0.01, timeout=timeout)
+        self.assertEqual(timeout.timeout_for("https://example.com/a"), 0.2)
+        self.assertEqual(loader(ScriptedDriver([self.LOADING]), "https://example.com/a"), 'timeout')
+        timeout.observe("https://fast.example.com/b", 0.01)
+        self.assertEqual(timeout.timeout_for("https://fast.example.com/c"), 0.05)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import requests
+from capture import CaptureReader, CaptureWriter, ReplayMiss
+from download_exams import PhDExamDownloader
+from local_server import LocalServer, QuietHandler
+from stream_writer import write_response
+
+
+class SiteHandler(QuietHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        base = f"http://{self.headers['Host']}"
+        if self.path == '/sujets-concours-doctorat/':
+            body = b'<a href="/sujets-doctorat-1/">1</a><a href="/sujets-doctorat-hub/">hub</a>'
+            content_type = 'text/html'
+        elif self.path == '/sujets-doctorat-hub/':
+            body = f'<div class="td-post-content"><a href="{base}/sujets-doctorat-2/">2</a></div>'.encode()
+            content_type = 'text/html'
+        elif self.path.startswith('/sujets-doctorat-'):
+            number = self.path.strip('/').rsplit('-', 1)[1]
+            body = f'<div class="td-post-content"><a href="/files/Sujet-{number}.pdf">PDF</a></div>'.encode()
+            content_type = 'text/html'
+        else:
+            body = b'%PDF-1.4\n' + self.path.encode() * 500
+            content_type = 'application/pdf'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def saved_files(folder):
+    files = {}
+    for name in sorted(os.listdir(folder)):
+        if name.endswith('.pdf'):
+            with open(os.path.join(folder, name), 'rb') as f:
+                files[name] = f.read()
+    return files
+
+
+class TestCapture(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.archive = os.path.join(self.folder.name, 'crawl.warc.gz')
+
+    def _run(self, url, output, **kwargs):
+        downloader = PhDExamDownloader(url, os.path.join(self.folder.name, output), use_selenium=False,
+                                       politeness_delay=0, **kwargs)
+        downloader.run()
+        downloader.manifest.close()
+        return saved_files(downloader.destination_folder)
+
+    def test_replayed_crawl_matches_recorded_one(self):
+        with LocalServer(SiteHandler) as server:
+            url = f"{server.base_url}/sujets-concours-doctorat/"
+            recorded = self._run(url, 'recorded', record=self.archive)
+        self.assertEqual(sorted(recorded), ['Sujet-1.pdf', 'Sujet-2.pdf'])
+
+        # The server is gone: everything comes from the archive
+        replayed = self._run(url, 'replayed', replay=self.archive, retries=0)
+        self.assertEqual(replayed, recorded)
+
+    def test_rendered_pages_and_archive_without_index(self):
+        writer = CaptureWriter(self.archive)
+        writer.add_rendered('https://lmd.sahla-dz.com/sujet/', '<html><iframe src="x"></iframe></html>')
+        writer.close()
+        os.remove(self.archive + '.idx')
+
+        reader = CaptureReader(self.archive)
+        self.assertEqual(reader.rendered('https://lmd.sahla-dz.com/sujet/'), '<html><iframe src="x"></iframe></html>')
+        self.assertIsNone(reader.rendered('https://lmd.sahla-dz.com/other/'))
+        with self.assertRaises(ReplayMiss):
+            reader.response('https://lmd.sahla-dz.com/sujet/')
+
+    @patch('capture.SPOOL_LIMIT', 1024)
+    def test_streamed_body_is_recorded_without_loading_it(self):
+        server = LocalServer(SiteHandler).start()
+        self.addCleanup(server.stop)
+        url = f"{server.base_url}/files/Sujet-1.pdf"
+
+        writer = CaptureWriter(self.archive)
+        response = requests.get(url, stream=True)
+        writer.add_response(url, response)
+        # Nothing is recorded before the caller reads the body, and it is never loaded in memory
+        self.assertEqual(writer.records, 0)
+        path = os.path.join(self.folder.name, 'Sujet-1.pdf')
+        size, _ = write_response(response, path)
+        self.assertIs(response._content, False)
+        response.close()
+        writer.close()
+
+        os.remove(self.archive + '.idx')
+        replayed = CaptureReader(self.archive).response(url)
+        with open(path, 'rb') as f:
+            self.assertEqual(f.read(), replayed.content)
+        self.assertEqual(size, len(b'%PDF-1.4\n' + b'/files/Sujet-1.pdf' * 500))
+        self.assertEqual(replayed.headers['Content-Length'], str(size))
+
+    def test_response_closed_before_its_end_is_not_recorded(self):
+        server = LocalServer(SiteHandler).start()
+        self.addCleanup(server.stop)
+        url = f"{server.base_url}/files/Sujet-1.pdf"
+
+        # Like the full answer a download drops to resume with a Range request
+        writer = CaptureWriter(self.archive)
+        response = requests.get(url, stream=True)
+        writer.add_response(url, response)
+        response.raw.read(100)
+        response.close()
+        writer.close()
+        self.assertEqual(writer.records, 0)
+        with self.assertRaises(ReplayMiss):
+            CaptureReader(self.archive).response(url)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from download_exams import PhDExamDownloader
+from frontier import Frontier
+
+SITE = {
+    "https://lmd.sahla-dz.com/a": (0, ["https://lmd.sahla-dz.com/sujet-1", "https://lmd.sahla-dz.com/sujet-2"]),
+    "https://lmd.sahla-dz.com/b": (1, None),
+    "https://lmd.sahla-dz.com/sujet-1": (1, None),
+    "https://lmd.sahla-dz.com/sujet-2": (1, None),
+}
+
+
+class TestCrawlCheckpoint(unittest.TestCase):
+    
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+    
+    def _downloader(self, **kwargs):
+        downloader = PhDExamDownloader("https://lmd.sahla-dz.com/", self.folder.name, use_selenium=False,
+                                       checkpoint_every=1, **kwargs)
+        self.addCleanup(downloader.manifest.close)
+        return downloader
+    
+    def test_in_flight_pages_are_saved_as_queued(self):
+        frontier = Frontier()
+        frontier.add("https://lmd.sahla-dz.com/a", 0)
+        frontier.add("https://lmd.sahla-dz.com/b", 0)
+        frontier.pop()
+        restored = Frontier.from_state(frontier.to_state([("https://lmd.sahla-dz.com/a", 0)]))
+        self.assertEqual(restored.visited, set())
+        self.assertEqual(len(restored), 2)
+        self.assertFalse(restored.add("https://lmd.sahla-dz.com/b", 1))
+    
+    def test_interrupted_crawl_resumes_where_it_stopped(self):
+        def crash_on_third_page(url):
+            if crash_on_third_page.calls == 2:
+                raise KeyboardInterrupt
+            crash_on_third_page.calls += 1
+            return SITE[url]
+        crash_on_third_page.calls = 0
+        
+        first = self._downloader()
+        first.process_page = MagicMock(side_effect=crash_on_third_page)
+        with patch('time.sleep'), self.assertRaises(KeyboardInterrupt):
+            first._run_serial(["https://lmd.sahla-dz.com/a", "https://lmd.sahla-dz.com/b"])
+        done_before = [c.args[0] for c in first.process_page.call_args_list][:2]
+        
+        second = self._downloader(resume=True)
+        second.get_exam_page_links = MagicMock()
+        second.process_page = MagicMock(side_effect=lambda url: SITE[url])
+        with patch('time.sleep'):
+            second.run()
+        second.get_exam_page_links.assert_not_called()
+        done_after = [c.args[0] for c in second.process_page.call_args_list]
+        self.assertEqual(sorted(done_before + done_after), sorted(SITE))
+        
+        # A finished crawl leaves nothing to resume
+        self.assertIsNone(second.checkpoint.load(second.base_url))
+
+if __name__ == '__main__':
+    unittest.main()
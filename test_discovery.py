@@ -0,0 +1,121 @@
+import json
+import tempfile
+import unittest
+from urllib.parse import parse_qs, urlsplit
+import requests
+from discovery import WordPressDiscovery
+from download_exams import PhDExamDownloader
+from local_server import LocalServer, QuietHandler
+
+
+class WordPressHandler(QuietHandler):
+    requested = []
+    
+    def _send(self, status, body, content_type, headers=None):
+        body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def do_GET(self):
+        WordPressHandler.requested.append(self.path)
+        root = f"http://{self.headers['Host']}"
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        if parts.path == '/wp-json/wp/v2/categories':
+            known = {'sujets-concours-doctorat-informatique': [{'id': 7}]}
+            self._send(200, json.dumps(known.get(query['slug'][0], [])), 'application/json')
+        elif parts.path == '/wp-json/wp/v2/posts' and query.get('categories') == ['7']:
+            posts = [{'link': f"{root}/sujets-doctorat-info-2021/", 'modified_gmt': '2023-01-01T10:00:00'}]
+            self._send(200, json.dumps(posts), 'application/json', {'X-WP-TotalPages': '1'})
+        elif parts.path == '/wp-json/wp/v2/posts':
+            posts = {
+                '1': [{'link': f"{root}/sujets-doctorat-info-2021/", 'modified_gmt': '2023-01-01T10:00:00'},
+                      {'link': f"{root}/concours-doctorat-math/", 'modified_gmt': '2023-02-01T10:00:00'}],
+                '2': [{'link': f"{root}/sujet-doctorat-physique/", 'modified_gmt': '2023-03-01T10:00:00'},
+                      {'link': f"{root}/cours-algebre/", 'modified_gmt': '2023-03-02T10:00:00'},
+                      {'link': "https://elsewhere.example/sujet-doctorat/", 'modified_gmt': '2023-03-03T10:00:00'}],
+            }
+            page = query['page'][0]
+            if page in posts:
+                self._send(200, json.dumps(posts[page]), 'application/json', {'X-WP-TotalPages': '2'})
+            else:
+                self._send(400, '{"code": "rest_post_invalid_page_number"}', 'application/json')
+        elif parts.path == '/wp-sitemap.xml':
+            self._send(200, f"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<sitemap><loc>{root}/wp-sitemap-posts-post-1.xml</loc></sitemap>
+<sitemap><loc>{root}/wp-sitemap-taxonomies-category-1.xml</loc></sitemap>
+</sitemapindex>""", 'application/xml')
+        elif parts.path == '/wp-sitemap-posts-post-1.xml':
+            self._send(200, f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+<url><loc>{root}/sujets-doctorat-info-2021/</loc><lastmod>2023-01-01T10:00:00+00:00</lastmod></url>
+<url><loc>{root}/sujets-doctorat-informatique-2022/</loc><lastmod>2023-04-01T10:00:00+00:00</lastmod></url>
+<url><loc>{root}/cours-algebre/</loc><lastmod>2023-03-02T10:00:00+00:00</lastmod></url>
+</urlset>""", 'application/xml')
+        else:
+            self._send(404, 'Not found', 'text/html')
+
+
+class TestWordPressDiscovery(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.server = LocalServer(WordPressHandler).start()
+        cls.addClassCleanup(cls.server.stop)
+        cls.root = cls.server.base_url
+    
+    def setUp(self):
+        WordPressHandler.requested = []
+    
+    def test_rest_listing_follows_pagination(self):
+        discovery = WordPressDiscovery(requests.get, f"{self.root}/")
+        entries = discovery.discover('rest')
+        self.assertEqual(entries, [
+            (f"{self.root}/sujets-doctorat-info-2021/", '2023-01-01T10:00:00'),
+            (f"{self.root}/concours-doctorat-math/", '2023-02-01T10:00:00'),
+            (f"{self.root}/sujet-doctorat-physique/", '2023-03-01T10:00:00'),
+        ])
+        posts = [path for path in WordPressHandler.requested if path.startswith('/wp-json/wp/v2/posts')]
+        self.assertEqual(len(posts), 2)
+    
+    def test_sitemap_skips_archive_sitemaps(self):
+        discovery = WordPressDiscovery(requests.get, self.root)
+        self.assertEqual(discovery.discover('sitemap'),
+                         [(f"{self.root}/sujets-doctorat-info-2021/", '2023-01-01T10:00:00+00:00'),
+                          (f"{self.root}/sujets-doctorat-informatique-2022/", '2023-04-01T10:00:00+00:00')])
+        self.assertNotIn('/wp-sitemap-taxonomies-category-1.xml', WordPressHandler.requested)
+    
+    def test_discovery_is_scoped_to_the_category_of_the_url(self):
+        discovery = WordPressDiscovery(requests.get, f"{self.root}/sujets-concours-doctorat-informatique/")
+        self.assertEqual(discovery.discover('rest'), [(f"{self.root}/sujets-doctorat-info-2021/", '2023-01-01T10:00:00')])
+        self.assertIn('/wp-json/wp/v2/categories?slug=sujets-concours-doctorat-informatique&_fields=id',
+                      WordPressHandler.requested)
+        self.assertFalse([path for path in WordPressHandler.requested if path.startswith('/wp-json/wp/v2/pages')])
+        # Sitemaps carry no categories: entries are matched on the words of the slug
+        self.assertEqual(discovery.discover('sitemap'),
+                         [(f"{self.root}/sujets-doctorat-informatique-2022/", '2023-04-01T10:00:00+00:00')])
+        # A slug WordPress does not know as a category filters the whole site's posts the same way
+        discovery = WordPressDiscovery(requests.get, f"{self.root}/sujets-concours-doctorat-physique/")
+        self.assertEqual(discovery.discover('rest'), [(f"{self.root}/sujet-doctorat-physique/", '2023-03-01T10:00:00')])
+    
+    def test_unchanged_pages_are_not_crawled_again(self):
+        with tempfile.TemporaryDirectory() as folder:
+            downloader = PhDExamDownloader(f"{self.root}/", folder,
+                                           use_selenium=False, politeness_delay=0, discovery='auto')
+            links = downloader.discover_exam_page_links()
+            self.assertEqual(len(links), 3)
+            downloader._record_page(f"{self.root}/concours-doctorat-math/", 1)
+            
+            links = downloader.discover_exam_page_links()
+            self.assertNotIn(f"{self.root}/concours-doctorat-math/", links)
+            self.assertEqual(len(links), 2)
+            downloader.manifest.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,13 +2,17 @@ import unittest
 from unittest.mock import patch, MagicMock
 from download_exams import PhDExamDownloader
 import os
+import tempfile
 
 class TestPhDExamDownloader(unittest.TestCase):
     
     def setUp(self):
         self.base_url = "https://lmd.sahla-dz.com/sujets-concours-doctorat-informatique/"
-        self.destination_folder = "test_downloads"
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.destination_folder = self.folder.name
         self.downloader = PhDExamDownloader(self.base_url, self.destination_folder)
+        self.addCleanup(self.downloader.manifest.close)
     
     @patch('requests.Session')
     def test_get_exam_page_links(self, mock_session):
@@ -76,5 +80,55 @@ class TestPhDExamDownloader(unittest.TestCase):
         mock_open.assert_called_once_with(os.path.join(self.destination_folder, "example.pdf"), 'wb')
         mock_open().write.assert_called_once_with(b'PDF content')
 
+
+class TestConcurrentCrawl(unittest.TestCase):
+    
+    SITE = {
+        "https://lmd.sahla-dz.com/a": (0, ["https://lmd.sahla-dz.com/sujet-1", "https://lmd.sahla-dz.com/sujet-2"]),
+        "https://lmd.sahla-dz.com/b": (0, ["https://lmd.sahla-dz.com/sujet-2", "https://lmd.sahla-dz.com/a"]),
+        "https://lmd.sahla-dz.com/sujet-1": (1, None),
+        "https://lmd.sahla-dz.com/sujet-2": (2, None),
+    }
+    
+    def _crawl(self, workers):
+        with tempfile.TemporaryDirectory() as folder:
+            downloader = PhDExamDownloader("https://lmd.sahla-dz.com/", folder,
+                                           use_selenium=False, workers=workers)
+            downloader.process_page = MagicMock(side_effect=lambda url: self.SITE[url])
+            if workers > 1:
+                processed, downloads = downloader._run_concurrent(["https://lmd.sahla-dz.com/a", "https://lmd.sahla-dz.com/b"])
+            else:
+                with patch('time.sleep'):
+                    processed, downloads = downloader._run_serial(["https://lmd.sahla-dz.com/a", "https://lmd.sahla-dz.com/b"])
+            calls = [c.args[0] for c in downloader.process_page.call_args_list]
+        return processed, downloads, calls
+    
+    def test_concurrent_matches_serial(self):
+        serial = self._crawl(1)
+        concurrent = self._crawl(4)
+        self.assertEqual(serial[0], set(self.SITE))
+        self.assertEqual(concurrent[0], serial[0])
+        self.assertEqual(concurrent[1], serial[1])
+        # Every page is processed exactly once
+        self.assertEqual(sorted(concurrent[2]), sorted(self.SITE))
+
+
+class TestSinglePageFetch(unittest.TestCase):
+    
+    def test_page_without_content_is_fetched_once(self):
+        html = '''
+        <div class="td-post-content">
+            <a href="https://lmd.sahla-dz.com/sujets-doctorat-2023/">Sujets 2023</a>
+            <a href="https://example.com/sujets-elsewhere/">Elsewhere</a>
+        </div>
+        '''
+        with tempfile.TemporaryDirectory() as folder:
+            downloader = PhDExamDownloader("https://lmd.sahla-dz.com/", folder, use_selenium=False)
+            downloader._get = MagicMock(return_value=MagicMock(text=html, status_code=200, headers={}))
+            downloads, sub_pages = downloader.process_page("https://lmd.sahla-dz.com/listing/")
+        self.assertEqual(downloads, 0)
+        self.assertEqual(sub_pages, ["https://lmd.sahla-dz.com/sujets-doctorat-2023/"])
+        downloader._get.assert_called_once_with("https://lmd.sahla-dz.com/listing/")
+
 if __name__ == '__main__':
-    unittest.main()
\ No newline at end of file
+    unittest.main()
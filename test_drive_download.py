@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from urllib.parse import parse_qs, urlsplit
+from download_exams import PhDExamDownloader
+from drive import confirm_url
+from local_server import LocalServer, QuietHandler
+
+BODY = b'%PDF-1.5\n' + bytes(range(256)) * 200
+
+WARNING_PAGE = '''<html><body><p>Google Drive can't scan this file for viruses.</p>
+<form id="download-form" action="/download" method="get">
+<input type="submit" value="Download anyway">
+<input type="hidden" name="id" value="big">
+<input type="hidden" name="export" value="download">
+<input type="hidden" name="confirm" value="t">
+<input type="hidden" name="uuid" value="a1&amp;b2">
+</form></body></html>'''
+
+QUOTA_PAGE = '''<html><body><p>Sorry, you can't view or download this file at this time.</p>
+<p>Too many users have viewed or downloaded this file recently.</p></body></html>'''
+
+
+class DriveHandler(QuietHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def _send(self, body, content_type, headers=()):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        DriveHandler.requests.append(self.path)
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        if parts.path == '/uc' and query.get('id') == ['big']:
+            self._send(WARNING_PAGE.encode('utf-8'), 'text/html; charset=utf-8')
+        elif parts.path == '/download' and query.get('confirm') == ['t'] and query.get('uuid') == ['a1&b2']:
+            if self.headers.get('If-None-Match') == '"big-v1"':
+                self.send_response(304)
+                self.end_headers()
+                return
+            self._send(BODY, 'application/octet-stream',
+                       [('Content-Disposition', 'attachment; filename="Sujet-doctorat.pdf"'), ('ETag', '"big-v1"')])
+        elif parts.path == '/uc' and query.get('id') == ['busy']:
+            self._send(QUOTA_PAGE.encode('utf-8'), 'text/html; charset=utf-8')
+        else:
+            self._send(b'<html><body>Not a PDF</body></html>', 'application/octet-stream')
+
+
+class TestDriveDownload(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = LocalServer(DriveHandler).start()
+        cls.addClassCleanup(cls.server.stop)
+        cls.base = cls.server.base_url
+
+    def setUp(self):
+        DriveHandler.requests = []
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.downloader = PhDExamDownloader(self.base, self.folder.name, use_selenium=False, politeness_delay=0)
+        self.addCleanup(self.downloader.manifest.close)
+
+    def test_confirmation_form_is_followed(self):
+        url = f"{self.base}/uc?export=download&id=big"
+        self.assertTrue(self.downloader.download_pdf(url, url))
+        self.assertEqual(len(DriveHandler.requests), 2)
+        with open(os.path.join(self.folder.name, 'Sujet-doctorat.pdf'), 'rb') as f:
+            self.assertEqual(f.read(), BODY)
+
+    def test_confirmed_download_is_revalidated_where_it_was_served(self):
+        url = f"{self.base}/uc?export=download&id=big"
+        self.assertTrue(self.downloader.download_pdf(url, url))
+        DriveHandler.requests = []
+        self.assertTrue(self.downloader.download_pdf(url, url))
+        self.assertEqual([urlsplit(path).path for path in DriveHandler.requests], ['/download'])
+
+        # Without the served URL, the warning page answering the original URL is not a new version
+        entry = self.downloader.manifest.get(url)
+        self.assertFalse(self.downloader.manifest.changed(
+            dict(entry, download_url=None), 200, {'Content-Type': 'text/html; charset=utf-8'}))
+
+    def test_quota_page_is_not_saved(self):
+        url = f"{self.base}/uc?export=download&id=busy"
+        self.assertFalse(self.downloader.download_pdf(url, url))
+        self.assertFalse([name for name in os.listdir(self.folder.name) if not name.startswith('.')])
+        self.assertIsNone(self.downloader.manifest.get(url))
+
+    def test_non_pdf_body_is_rejected(self):
+        url = f"{self.base}/files/exam.pdf"
+        self.assertFalse(self.downloader.download_pdf(url, url))
+        self.assertFalse(any(name.startswith('exam') for name in os.listdir(self.folder.name)))
+
+    def test_confirm_url_from_link_and_cookie(self):
+        link = '<a id="uc-download-link" href="/uc?export=download&amp;confirm=AbCd&amp;id=xyz">Download anyway</a>'
+        self.assertEqual(confirm_url(link, 'https://drive.google.com/uc?export=download&id=xyz'),
+                         'https://drive.google.com/uc?export=download&confirm=AbCd&id=xyz')
+        self.assertEqual(confirm_url('<html></html>', 'https://drive.google.com/uc?export=download&id=xyz',
+                                     {'download_warning_123_xyz': 'T0k'}),
+                         'https://drive.google.com/uc?export=download&id=xyz&confirm=T0k')
+        self.assertIsNone(confirm_url(QUOTA_PAGE, 'https://drive.google.com/uc?id=xyz'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import json
+import re
+import unittest
+from browser_pool import READINESS_PROBE
+from extraction_rules import VIEWER_EMBED, Rule, RuleEngine
+from page_scan import scan_html
+
+PAGE_URL = "https://lmd.sahla-dz.com/sujets-doctorat-2023/"
+
+
+def extract(html, engine=None):
+    return (engine or RuleEngine()).extract(scan_html(html), PAGE_URL)
+
+
+class TestRuleEngine(unittest.TestCase):
+    
+    def test_viewer_srcid_is_handled_on_static_pages(self):
+        result = extract('<iframe src="https://docs.google.com/viewer?srcid=1AbC_d-9&amp;pid=explorer"></iframe>')
+        self.assertEqual(result, {'type': 'pdf', 'urls': ['https://drive.google.com/uc?export=download&id=1AbC_d-9']})
+    
+    def test_each_embed_yields_one_url(self):
+        result = extract(
+            '<iframe src="https://docs.google.com/gview?embedded=true&amp;url=https://drive.google.com/file/d/XYZ/view"></iframe>'
+            '<iframe data-src="//docs.google.com/gview?url=https%3A%2F%2Fx.com%2Fa.pdf"></iframe>'
+            '<iframe src="https://docs.google.com/gview?url=https%3A%2F%2Fx.com%2Fa.pdf"></iframe>'
+        )
+        self.assertEqual(result['urls'], ['https://drive.google.com/file/d/XYZ/view', 'https://x.com/a.pdf'])
+    
+    def test_viewerng_embeds_carrying_a_url(self):
+        result = extract(
+            '<iframe src="https://docs.google.com/viewerng/viewer?url=https%3A%2F%2Fx.com%2Fa.pdf&amp;embedded=true"></iframe>'
+            '<iframe data-src="https://drive.google.com/viewerng/viewer?embedded=true&amp;url=https://x.com/b.pdf"></iframe>'
+        )
+        self.assertEqual(result, {'type': 'pdf', 'urls': ['https://x.com/a.pdf', 'https://x.com/b.pdf']})
+    
+    def test_readiness_probe_waits_for_the_same_embeds(self):
+        probe = re.compile(VIEWER_EMBED)
+        for src in ('https://docs.google.com/viewerng/viewer?url=x', 'https://drive.google.com/file/d/XYZ/preview',
+                    'https://docs.google.com/gview?url=x'):
+            self.assertTrue(probe.search(src), src)
+        self.assertIn(json.dumps(VIEWER_EMBED), READINESS_PROBE)
+    
+    def test_earlier_stage_wins(self):
+        result = extract('<img src="/scan.jpg" width="900"><a href="/exam.pdf">PDF</a>')
+        self.assertEqual(result, {'type': 'images', 'urls': ['https://lmd.sahla-dz.com/scan.jpg']})
+        result = extract('<img src="/icon.png" width="32"><a href="/exam.pdf">PDF</a>')
+        self.assertEqual(result, {'type': 'pdf', 'urls': ['https://lmd.sahla-dz.com/exam.pdf']})
+    
+    def test_images_with_unparsable_size_are_kept(self):
+        result = extract('<img src="/a.jpg" width="100%"><img src="/b.jpg" width="40">')
+        self.assertEqual(result['urls'], ['https://lmd.sahla-dz.com/a.jpg'])
+    
+    def test_registered_rule_runs_in_its_stage(self):
+        class MediafireRule(Rule):
+            stage = 0
+            
+            def find(self, scan, page_url):
+                return [href for href in scan.links if 'mediafire.com/file/' in href]
+        
+        engine = RuleEngine()
+        engine.register(MediafireRule('mediafire'))
+        result = extract('<img src="/scan.jpg" width="900"><a href="https://www.mediafire.com/file/abc/exam.pdf">x</a>',
+                         engine)
+        self.assertEqual(result, {'type': 'pdf', 'urls': ['https://www.mediafire.com/file/abc/exam.pdf']})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from download_exams import PhDExamDownloader
+from extraction_tiers import TierPlanner, has_lazy_load_markers, url_pattern
+
+
+class TestTierPlanner(unittest.TestCase):
+    
+    def test_lazy_load_markers(self):
+        self.assertTrue(has_lazy_load_markers('<img class="lazyload" data-src="/a.jpg">'))
+        self.assertTrue(has_lazy_load_markers('<iframe data-src="https://example.com/embed"></iframe>'))
+        self.assertFalse(has_lazy_load_markers('<p>Plain article</p><img src="/a.jpg">'))
+    
+    def test_url_pattern_groups_similar_pages(self):
+        self.assertEqual(
+            url_pattern("https://lmd.sahla-dz.com/2sujets-des-concours-informatique/"),
+            url_pattern("https://lmd.sahla-dz.com/02sujets-des-concours-mathematiques-2023/"),
+        )
+    
+    def test_pattern_goes_browser_first_after_enough_samples(self):
+        planner = TierPlanner(min_samples=3, browser_ratio=0.8)
+        for i in range(3):
+            self.assertFalse(planner.prefers_browser(f"https://lmd.sahla-dz.com/sujets-doctorat-{i}/"))
+            planner.record(f"https://lmd.sahla-dz.com/sujets-doctorat-{i}/", 'browser')
+        self.assertTrue(planner.prefers_browser("https://lmd.sahla-dz.com/sujets-doctorat-9/"))
+        self.assertFalse(planner.prefers_browser("https://lmd.sahla-dz.com/other-page/"))
+        self.assertEqual(planner.served, {'static': 0, 'browser': 3, 'none': 0})
+    
+    def test_browser_first_pattern_returns_to_static(self):
+        planner = TierPlanner(min_samples=3, browser_ratio=0.8, probe_every=4)
+        for i in range(3):
+            planner.record(f"https://lmd.sahla-dz.com/sujets-doctorat-{i}/", 'browser')
+        url = "https://lmd.sahla-dz.com/sujets-doctorat-9/"
+        self.assertTrue(planner.prefers_browser(url))
+        self.assertEqual([planner.probe_static(url) for _ in range(8)], [False, False, False, True] * 2)
+        
+        # The probed page is served statically: the pattern is static-first again
+        planner.record(url, 'static')
+        self.assertFalse(planner.prefers_browser(url))
+
+
+class TestTieredExtraction(unittest.TestCase):
+    
+    def _downloader(self, html):
+        folder = tempfile.TemporaryDirectory()
+        self.addCleanup(folder.cleanup)
+        downloader = PhDExamDownloader("https://lmd.sahla-dz.com/", folder.name, use_selenium=False)
+        downloader.use_selenium = True
+        downloader.browser_pool = MagicMock()
+        downloader._get = MagicMock(return_value=MagicMock(text=html, status_code=200, headers={}))
+        downloader.extract_content_with_selenium = MagicMock(return_value={'type': 'pdf', 'urls': ['https://x/a.pdf']})
+        return downloader
+    
+    def test_static_tier_serves_static_pages(self):
+        downloader = self._downloader('<iframe data-src="//docs.google.com/gview?url=https://x/a.pdf"></iframe>')
+        result, page = downloader.extract_content("https://lmd.sahla-dz.com/sujets-1/")
+        self.assertEqual(result['urls'], ['https://x/a.pdf'])
+        downloader.extract_content_with_selenium.assert_not_called()
+        self.assertEqual(downloader.tiers.served['static'], 1)
+    
+    def test_lazy_pages_escalate_to_browser(self):
+        downloader = self._downloader('<div class="lazyload"></div>')
+        downloader.extract_content("https://lmd.sahla-dz.com/sujets-1/")
+        downloader.extract_content_with_selenium.assert_called_once()
+        self.assertEqual(downloader.tiers.served['browser'], 1)
+    
+    def test_plain_pages_do_not_escalate(self):
+        downloader = self._downloader('<p>Nothing here</p>')
+        result, page = downloader.extract_content("https://lmd.sahla-dz.com/sujets-1/")
+        self.assertIsNone(result)
+        self.assertEqual(page.html, '<p>Nothing here</p>')
+        downloader.extract_content_with_selenium.assert_not_called()
+        self.assertEqual(downloader.tiers.served['none'], 1)
+    
+    def test_probed_pages_still_fall_back_to_browser(self):
+        downloader = self._downloader('<p>Nothing here</p>')
+        downloader.tiers = TierPlanner(min_samples=1, probe_every=1)
+        downloader.tiers.record("https://lmd.sahla-dz.com/sujets-0/", 'browser')
+        result, page = downloader.extract_content("https://lmd.sahla-dz.com/sujets-1/")
+        self.assertEqual(result['urls'], ['https://x/a.pdf'])
+        self.assertEqual(page.html, '<p>Nothing here</p>')
+        downloader.extract_content_with_selenium.assert_called_once()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+import unittest
+from frontier import Frontier, canonicalize
+
+
+class TestCanonicalize(unittest.TestCase):
+    
+    def test_tracking_params_and_fragment_are_dropped(self):
+        self.assertEqual(canonicalize("HTTPS://LMD.sahla-dz.com:443/sujet-1/?utm_source=fb&b=2&a=1#comments"),
+                         "https://lmd.sahla-dz.com/sujet-1/?a=1&b=2")
+    
+    def test_meaningful_query_and_port_are_kept(self):
+        self.assertEqual(canonicalize("http://127.0.0.1:8000/?p=42"), "http://127.0.0.1:8000/?p=42")
+
+
+class TestFrontier(unittest.TestCase):
+    
+    def test_duplicates_are_queued_once(self):
+        frontier = Frontier()
+        self.assertTrue(frontier.add("https://lmd.sahla-dz.com/sujet-1/", 0))
+        self.assertFalse(frontier.add("https://lmd.sahla-dz.com/sujet-1/#respond", 1))
+        frontier.pop()
+        self.assertFalse(frontier.add("https://lmd.sahla-dz.com/sujet-1/?fbclid=x", 2))
+        self.assertEqual(frontier.stats['duplicates'], 2)
+        self.assertFalse(frontier)
+    
+    def test_pages_come_by_depth_then_keyword_score(self):
+        frontier = Frontier()
+        frontier.add("https://lmd.sahla-dz.com/deep-sujet-doctorat/", 1)
+        frontier.add("https://lmd.sahla-dz.com/contact/", 0)
+        frontier.add("https://lmd.sahla-dz.com/sujets-concours-doctorat/", 0)
+        frontier.add("https://lmd.sahla-dz.com/about/", 0)
+        order = [frontier.pop() for _ in range(4)]
+        self.assertEqual(order, [
+            ("https://lmd.sahla-dz.com/sujets-concours-doctorat/", 0),
+            ("https://lmd.sahla-dz.com/contact/", 0),
+            ("https://lmd.sahla-dz.com/about/", 0),
+            ("https://lmd.sahla-dz.com/deep-sujet-doctorat/", 1),
+        ])
+    
+    def test_depth_and_page_limits(self):
+        frontier = Frontier(max_depth=1, max_pages=2)
+        self.assertFalse(frontier.add("https://lmd.sahla-dz.com/c", 2))
+        for name in 'ab':
+            frontier.add(f"https://lmd.sahla-dz.com/{name}", 1)
+        frontier.add("https://lmd.sahla-dz.com/d", 0)
+        self.assertEqual(frontier.pop()[0], "https://lmd.sahla-dz.com/d")
+        self.assertEqual(frontier.pop()[0], "https://lmd.sahla-dz.com/a")
+        self.assertIsNone(frontier.pop())
+        self.assertTrue(frontier.limit_reached())
+        self.assertEqual(len(frontier), 1)
+
+if __name__ == '__main__':
+    unittest.main()
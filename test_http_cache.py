@@ -0,0 +1,73 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import MagicMock
+from download_exams import PhDExamDownloader
+from http_cache import HttpCache
+
+
+class TestHttpCache(unittest.TestCase):
+    
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+    
+    def test_revalidation_headers_and_304_body(self):
+        cache = HttpCache(self.folder.name)
+        url = "https://lmd.sahla-dz.com/sujets-1/"
+        self.assertEqual(cache.conditional_headers(url), {})
+        cache.store(url, {'ETag': '"v1"', 'Last-Modified': 'Mon, 01 May 2023 10:00:00 GMT'}, b'<html>v1</html>', 'utf-8')
+        self.assertEqual(cache.conditional_headers(url), {
+            'If-None-Match': '"v1"',
+            'If-Modified-Since': 'Mon, 01 May 2023 10:00:00 GMT',
+        })
+        self.assertEqual(cache.not_modified(url), '<html>v1</html>')
+    
+    def test_responses_without_validators_are_not_stored(self):
+        cache = HttpCache(self.folder.name)
+        cache.store("https://example.com/", {}, b'body')
+        self.assertEqual(os.listdir(self.folder.name), [])
+    
+    def test_rendered_dom_reused_only_after_revalidation(self):
+        cache = HttpCache(self.folder.name)
+        url = "https://lmd.sahla-dz.com/sujets-1/"
+        cache.store(url, {'ETag': '"v1"'}, b'<html>static</html>')
+        cache.store_rendered(url, '<html>rendered</html>')
+        self.assertIsNone(cache.rendered(url))
+        cache.not_modified(url)
+        self.assertEqual(cache.rendered(url), '<html>rendered</html>')
+    
+    def test_eviction_by_size_and_age(self):
+        cache = HttpCache(self.folder.name, max_bytes=25)
+        for i in range(3):
+            cache.store(f"https://example.com/{i}", {'ETag': str(i)}, b'x' * 10)
+            time.sleep(0.01)
+        self.assertLessEqual(cache._size, 25)
+        self.assertEqual(cache.conditional_headers("https://example.com/0"), {})
+        self.assertEqual(cache.conditional_headers("https://example.com/2"), {'If-None-Match': '2'})
+        
+        cache.max_age = 0
+        time.sleep(0.01)
+        cache.evict()
+        self.assertEqual(cache._size, 0)
+
+
+class TestCachedFetch(unittest.TestCase):
+    
+    def test_second_crawl_costs_a_304(self):
+        url = "https://lmd.sahla-dz.com/sujets-1/"
+        with tempfile.TemporaryDirectory() as folder:
+            downloader = PhDExamDownloader("https://lmd.sahla-dz.com/", folder, use_selenium=False)
+            fresh = MagicMock(status_code=200, headers={'ETag': '"v1"'}, content=b'<p>exam</p>',
+                              text='<p>exam</p>', encoding='utf-8')
+            downloader._get = MagicMock(return_value=fresh)
+            self.assertEqual(downloader.fetch_page(url).html, '<p>exam</p>')
+            
+            downloader._get = MagicMock(return_value=MagicMock(status_code=304, headers={}))
+            page = downloader.fetch_page(url)
+            self.assertEqual(page.html, '<p>exam</p>')
+            downloader._get.assert_called_once_with(url, headers={'If-None-Match': '"v1"'})
+
+if __name__ == '__main__':
+    unittest.main()
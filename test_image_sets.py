@@ -0,0 +1,111 @@
+import asyncio
+import os
+import tempfile
+import time
+import unittest
+from async_backend import AsyncBackend
+from download_exams import PhDExamDownloader
+from local_server import LocalServer, QuietHandler
+
+IMAGES = 5
+
+
+class ImageHandler(QuietHandler):
+    protocol_version = 'HTTP/1.1'
+    failures = {}
+    # Wrong answers given once per image: 'html' for an error page, 'short' for a cut body
+    broken = {}
+
+    def do_GET(self):
+        index = int(self.path.rsplit('-', 1)[1].split('.')[0])
+        if ImageHandler.failures.get(index, 0) > 0:
+            ImageHandler.failures[index] -= 1
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        # Later images answer first, so completion order is the reverse of the set order
+        time.sleep((IMAGES - index) * 0.05)
+        body = f"image {index}".encode('ascii') * 100
+        length = len(body)
+        broken = ImageHandler.broken.pop(index, None)
+        if broken == 'html':
+            body = b'<html><body>Too many requests</body></html>'
+            length = len(body)
+        elif broken == 'short':
+            body = body[:length // 2]
+            self.close_connection = True
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(length))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestImageSets(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = LocalServer(ImageHandler).start()
+        cls.addClassCleanup(cls.server.stop)
+        base = cls.server.base_url
+        cls.urls = [f"{base}/scan-{i}.jpg" for i in range(1, IMAGES + 1)]
+        cls.page_url = f"{base}/sujets-doctorat-exam"
+
+    def setUp(self):
+        ImageHandler.failures = {}
+        ImageHandler.broken = {}
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.downloader = PhDExamDownloader(self.page_url, self.folder.name, use_selenium=False,
+                                            politeness_delay=0, max_per_host=IMAGES, image_workers=IMAGES)
+        self.downloader.retry_policy.base_delay = 0.01
+        self.addCleanup(self.downloader.manifest.close)
+
+    def _download_async(self):
+        backend = AsyncBackend(self.downloader)
+
+        async def download():
+            backend.session = backend._create_session()
+            try:
+                return await backend.download_images(self.urls, self.page_url)
+            finally:
+                await backend.session.close()
+        return asyncio.run(download())
+
+    def _assert_images(self):
+        folder = os.path.join(self.folder.name, 'sujets-doctorat-exam')
+        for i in range(1, IMAGES + 1):
+            with open(os.path.join(folder, f"image_{i}.jpg"), 'rb') as f:
+                self.assertEqual(f.read(), f"image {i}".encode('ascii') * 100)
+
+    def test_images_keep_set_order_and_failed_image_is_retried(self):
+        ImageHandler.failures = {2: 1}
+        self.assertTrue(self.downloader.download_images(self.urls, self.page_url))
+        self._assert_images()
+
+        stats, = self.downloader.image_set_stats
+        self.assertEqual((stats['images'], stats['fetched']), (IMAGES, IMAGES))
+        # Fetched in parallel: far less than the sum of the per-image delays
+        self.assertLess(stats['seconds'], sum(range(1, IMAGES + 1)) * 0.05)
+
+    def _check_rejected_images(self, download):
+        ImageHandler.broken = {1: 'html', 3: 'short'}
+        self.downloader.image_retries = 0
+        download()
+        # The rejected images are neither kept nor recorded as complete
+        folder = os.path.join(self.folder.name, 'sujets-doctorat-exam')
+        self.assertEqual(sorted(os.listdir(folder)), ['image_2.jpg', 'image_4.jpg', 'image_5.jpg'])
+        self.assertIsNone(self.downloader._completed_download(self.urls[0]))
+        # The next run fetches only them
+        download()
+        self._assert_images()
+
+    def test_error_pages_and_cut_images_are_rejected(self):
+        self._check_rejected_images(lambda: self.downloader.download_images(self.urls, self.page_url))
+
+    def test_async_backend_rejects_error_pages_and_cut_images(self):
+        self._check_rejected_images(self._download_async)
+
+if __name__ == '__main__':
+    unittest.main()
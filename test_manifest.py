@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from download_exams import PhDExamDownloader
+from manifest import DownloadManifest
+
+
+def pdf_response(body=b'%PDF-1.4 exam', etag='"e1"'):
+    response = MagicMock(status_code=200, url=None, headers={'Content-Type': 'application/pdf', 'ETag': etag})
+    response.iter_content.return_value = [body]
+    return response
+
+
+def not_modified(*args, **kwargs):
+    return MagicMock(status_code=304, headers={})
+
+
+class TestDownloadManifest(unittest.TestCase):
+    
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+    
+    def test_entry_complete_only_while_file_intact(self):
+        manifest = DownloadManifest(os.path.join(self.folder.name, 'manifest.sqlite'))
+        self.addCleanup(manifest.close)
+        path = os.path.join(self.folder.name, 'exam.pdf')
+        with open(path, 'wb') as f:
+            f.write(b'12345')
+        manifest.record("https://x/exam.pdf", "https://x/page", path, 5, 'abc', '"e1"')
+        self.assertEqual(manifest.complete_entry("https://x/exam.pdf")['etag'], '"e1"')
+        
+        with open(path, 'wb') as f:
+            f.write(b'123')
+        self.assertIsNone(manifest.complete_entry("https://x/exam.pdf"))
+        os.remove(path)
+        self.assertIsNone(manifest.complete_entry("https://x/exam.pdf"))
+    
+    def test_rerun_skips_completed_pdf(self):
+        downloader = PhDExamDownloader("https://lmd.sahla-dz.com/", self.folder.name, use_selenium=False)
+        self.addCleanup(downloader.manifest.close)
+        downloader._get = MagicMock(return_value=pdf_response())
+        self.assertTrue(downloader.download_pdf("https://x/exam.pdf", "https://x/page"))
+        entry = downloader.manifest.get("https://x/exam.pdf")
+        self.assertEqual(entry['size'], len(b'%PDF-1.4 exam'))
+        self.assertEqual(entry['path'], os.path.join(self.folder.name, 'exam.pdf'))
+        
+        # Confirmed by a conditional request carrying the recorded ETag
+        downloader._get = MagicMock(side_effect=not_modified)
+        self.assertTrue(downloader.download_pdf("https://x/exam.pdf", "https://x/page"))
+        downloader._get.assert_called_once_with("https://x/exam.pdf", headers={'If-None-Match': '"e1"'}, stream=True)
+    
+    def test_changed_pdf_is_downloaded_again(self):
+        downloader = PhDExamDownloader("https://lmd.sahla-dz.com/", self.folder.name, use_selenium=False)
+        self.addCleanup(downloader.manifest.close)
+        downloader._get = MagicMock(return_value=pdf_response())
+        self.assertTrue(downloader.download_pdf("https://x/exam.pdf", "https://x/page"))
+        
+        # A server ignoring conditional requests but sending the same ETag does not cause a download
+        self.assertTrue(downloader.download_pdf("https://x/exam.pdf", "https://x/page"))
+        self.assertEqual(downloader._get.call_count, 2)
+        
+        downloader._get = MagicMock(side_effect=lambda *a, **k: pdf_response(b'%PDF-1.4 corrected', '"e2"'))
+        self.assertTrue(downloader.download_pdf("https://x/exam.pdf", "https://x/page"))
+        self.assertEqual(downloader._get.call_count, 2)
+        entry = downloader.manifest.get("https://x/exam.pdf")
+        self.assertEqual((entry['etag'], entry['size']), ('"e2"', len(b'%PDF-1.4 corrected')))
+    
+    def test_rerun_does_not_duplicate_image_sets(self):
+        downloader = PhDExamDownloader("https://lmd.sahla-dz.com/", self.folder.name, use_selenium=False)
+        self.addCleanup(downloader.manifest.close)
+        downloader._get = MagicMock(side_effect=lambda *a, **k: pdf_response(b'\xff\xd8 image'))
+        urls = ["https://x/1.jpg", "https://x/2.jpg"]
+        self.assertTrue(downloader.download_images(urls, "https://x/sujet-images"))
+        downloader._get = MagicMock(side_effect=not_modified)
+        self.assertTrue(downloader.download_images(urls, "https://x/sujet-images"))
+        self.assertEqual(downloader._get.call_count, 2)
+        self.assertEqual(sorted(os.listdir(os.path.join(self.folder.name, 'sujet-images'))),
+                         ['image_1.jpg', 'image_2.jpg'])
+
+if __name__ == '__main__':
+    unittest.main()
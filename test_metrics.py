@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from download_exams import PhDExamDownloader
+from local_server import LocalServer, QuietHandler
+from metrics import Metrics
+
+BODY = b'%PDF-1.4\n' + b'0' * 50000
+
+
+class PdfHandler(QuietHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if self.path.startswith('/missing'):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_stage_timings_errors_and_throughput(self):
+        metrics = Metrics()
+        with metrics.stage('download_pdf'):
+            metrics.inc('bytes_total', 1000, stage='download_pdf')
+        with self.assertRaises(ValueError):
+            with metrics.stage('parse', tier='static'):
+                raise ValueError('broken page')
+        stages = metrics.report()['stages']
+        self.assertEqual(stages['download_pdf']['count'], 1)
+        self.assertEqual(stages['download_pdf']['bytes'], 1000)
+        self.assertGreater(stages['download_pdf']['bytes_per_second'], 0)
+        self.assertEqual(stages['parse']['errors'], 1)
+
+    def test_prometheus_text(self):
+        metrics = Metrics()
+        metrics.inc('http_requests_total', status=200)
+        metrics.inc('http_requests_total', status=200)
+        metrics.observe('stage_seconds', 0.2, stage='render')
+        metrics.observe('stage_seconds', 3, stage='render')
+        lines = metrics.prometheus_text().splitlines()
+        self.assertIn('# TYPE phd_exams_http_requests_total counter', lines)
+        self.assertIn('phd_exams_http_requests_total{status="200"} 2', lines)
+        self.assertIn('phd_exams_stage_seconds_bucket{stage="render",le="0.25"} 1', lines)
+        self.assertIn('phd_exams_stage_seconds_bucket{stage="render",le="+Inf"} 2', lines)
+        self.assertIn('phd_exams_stage_seconds_count{stage="render"} 2', lines)
+
+
+class TestRunReport(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = LocalServer(PdfHandler).start()
+        cls.addClassCleanup(cls.server.stop)
+        cls.base = cls.server.base_url
+
+    def test_downloads_are_reported(self):
+        with tempfile.TemporaryDirectory() as folder:
+            prometheus_path = os.path.join(folder, 'crawl.prom')
+            downloader = PhDExamDownloader(self.base, folder, use_selenium=False, politeness_delay=0,
+                                           retries=0, prometheus_path=prometheus_path)
+            self.addCleanup(downloader.manifest.close)
+            urls = [f"{self.base}/exam.pdf", f"{self.base}/missing.pdf"]
+            downloader.extract_content = MagicMock(return_value=({'type': 'pdf', 'urls': urls}, None))
+            self.assertEqual(downloader.process_page(f"{self.base}/sujet/")[0], 1)
+            downloader._finish_run({f"{self.base}/sujet/"}, 1)
+
+            with open(os.path.join(folder, '.run_report.json')) as f:
+                report = json.load(f)
+            stage = report['stages']['download_pdf']
+            self.assertEqual((stage['count'], stage['errors'], stage['bytes']), (2, 1, len(BODY)))
+            statuses = {entry['labels']['status']: entry['value'] for entry in report['counters']['http_requests_total']}
+            self.assertEqual(statuses, {'200': 1, '404': 1})
+            self.assertIn('http_cache', report)
+            self.assertTrue(os.path.exists(prometheus_path))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+from page_scan import scan_page
+
+HTML = """<html><body>
+<div class="menu"><a href="/category/news/">News</a></div>
+<div class="td-post-content tagdiv-type">
+  <p>Sujets<br>du concours<img src="/icon.png" width="16"></p>
+  <div class="inner"><a href="/sujet-1/">Sujet 1</a></div>
+  <a href="/files/exam.pdf"><button>Download PDF</button></a>
+  <iframe data-src="//docs.google.com/gview?url=https://x.com/a.pdf&amp;embedded=true"></iframe>
+</div>
+<div class="ndfHFb-c4YZDc-cYSp0e-DARUcf-PLDbbf"><img src="/p1.jpg"><div><img src="/p2.jpg"/></div></div>
+<img src="/footer.jpg" width="300">
+<a href="/after-content/">After</a>
+</body></html>"""
+
+
+class TestPageScan(unittest.TestCase):
+    
+    def test_fast_scan_matches_full_tree(self):
+        fast = scan_page(HTML, 'fast')
+        tree = scan_page(HTML, 'html.parser')
+        self.assertEqual(vars(fast), vars(tree))
+    
+    def test_scan_tracks_content_area_and_viewer(self):
+        scan = scan_page(HTML, 'fast')
+        self.assertTrue(scan.has_content_area)
+        self.assertEqual(scan.content_links, ['/sujet-1/', '/files/exam.pdf'])
+        self.assertEqual(scan.links[-1], '/after-content/')
+        self.assertEqual([img['src'] for img in scan.viewer_images], ['/p1.jpg', '/p2.jpg'])
+        self.assertEqual(len(scan.images), 4)
+        self.assertEqual(scan.download_links, ['/files/exam.pdf'])
+        self.assertEqual(scan.iframes[0]['data-src'], '//docs.google.com/gview?url=https://x.com/a.pdf&embedded=true')
+    
+    def test_page_without_content_area(self):
+        scan = scan_page('<html><body><a href="/x">x</a></body></html>', 'fast')
+        self.assertFalse(scan.has_content_area)
+        self.assertEqual(scan.content_links, [])
+
+if __name__ == '__main__':
+    unittest.main()
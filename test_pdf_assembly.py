@@ -0,0 +1,67 @@
+import os
+import re
+import struct
+import tempfile
+import unittest
+from pdf_assembly import PdfAssembler, assemble_pdf, jpeg_info
+
+
+def fake_jpeg(width, height, payload):
+    """
+    Build a JPEG-shaped file: the assembler reads its headers but never decodes the scan data
+    """
+    app0 = b'\xff\xe0' + struct.pack('>H', 16) + b'JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00'
+    sof0 = b'\xff\xc0' + struct.pack('>HBHHB', 17, 8, height, width, 3) + b'\x01\x22\x00\x02\x11\x01\x03\x11\x01'
+    return b'\xff\xd8' + app0 + sof0 + payload + b'\xff\xd9'
+
+
+class TestPdfAssembly(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.images = []
+        for i, (width, height) in enumerate([(800, 1100), (1100, 800), (640, 480)], start=1):
+            path = os.path.join(self.folder.name, f"image_{i}.jpg")
+            with open(path, 'wb') as f:
+                f.write(fake_jpeg(width, height, f"page {i}".encode('ascii')))
+            self.images.append(path)
+        self.output = os.path.join(self.folder.name, 'exam.pdf')
+
+    def test_jpeg_info_reads_frame_header(self):
+        self.assertEqual(jpeg_info(self.images[1]), (1100, 800, 3))
+        with open(self.output, 'wb') as f:
+            f.write(b'%PDF-1.4')
+        self.assertIsNone(jpeg_info(self.output))
+
+    def test_pages_follow_set_order_and_xref_is_valid(self):
+        self.assertEqual(assemble_pdf(self.images, self.output), 3)
+        with open(self.output, 'rb') as f:
+            pdf = f.read()
+
+        self.assertTrue(pdf.startswith(b'%PDF-1.4'))
+        self.assertIn(b'/Count 3', pdf)
+        # Each JPEG is embedded unchanged, in the order of the set
+        positions = [pdf.index(f"page {i}".encode('ascii')) for i in (1, 2, 3)]
+        self.assertEqual(positions, sorted(positions))
+        self.assertIn(b'/MediaBox [0 0 1100 800]', pdf)
+
+        xref = int(re.search(rb'startxref\n(\d+)', pdf).group(1))
+        entries = pdf[xref:].split(b'\n')[3:]
+        for number, entry in enumerate(entries[:11], start=1):
+            offset = int(entry[:10])
+            self.assertTrue(pdf[offset:].startswith(f"{number} 0 obj".encode('ascii')))
+
+    def test_assembler_skips_up_to_date_pdf(self):
+        assembler = PdfAssembler(workers=1)
+        assembler.submit(self.images, self.output)
+        assembler.wait()
+        self.assertEqual(assembler.stats['assembled'], 1)
+        self.assertTrue(os.path.exists(self.output))
+
+        assembler.submit(self.images, self.output)
+        assembler.wait()
+        self.assertEqual(assembler.stats['skipped'], 1)
+
+if __name__ == '__main__':
+    unittest.main()
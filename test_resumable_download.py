@@ -0,0 +1,105 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from download_exams import PhDExamDownloader
+from local_server import LocalServer, QuietHandler
+from stream_writer import claim
+
+BODY = b'%PDF-1.4\n' + bytes(range(256)) * 400
+
+
+class RangeHandler(QuietHandler):
+    protocol_version = 'HTTP/1.1'
+    ranges = []
+    revalidations = 0
+    truncate = False
+    
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == '"exam-v1"':
+            RangeHandler.revalidations += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        requested = self.headers.get('Range')
+        RangeHandler.ranges.append(requested)
+        if requested:
+            start = int(requested.split('=')[1].rstrip('-'))
+            self.send_response(206)
+            self.send_header('Content-Range', f"bytes {start}-{len(BODY) - 1}/{len(BODY)}")
+            body = BODY[start:]
+        else:
+            self.send_response(200)
+            body = BODY
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', '"exam-v1"')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body[:len(body) // 2] if RangeHandler.truncate else body)
+        if RangeHandler.truncate:
+            self.close_connection = True
+
+
+class TestResumableDownload(unittest.TestCase):
+    
+    @classmethod
+    def setUpClass(cls):
+        # Truncated transfers make the client reset the connection on purpose
+        cls.server = LocalServer(RangeHandler, quiet_errors=True).start()
+        cls.addClassCleanup(cls.server.stop)
+        cls.url = f"{cls.server.base_url}/files/exam.pdf"
+    
+    def setUp(self):
+        RangeHandler.ranges = []
+        RangeHandler.revalidations = 0
+        RangeHandler.truncate = False
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.downloader = PhDExamDownloader(self.url, self.folder.name, use_selenium=False, politeness_delay=0)
+        self.addCleanup(self.downloader.manifest.close)
+        self.path = os.path.join(self.folder.name, 'exam.pdf')
+    
+    def test_partial_file_is_resumed_with_range(self):
+        with open(self.path + '.part', 'wb') as f:
+            f.write(BODY[:1000])
+        self.assertTrue(self.downloader.download_pdf(self.url, self.url))
+        self.assertEqual(RangeHandler.ranges, [None, 'bytes=1000-'])
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), BODY)
+        self.assertFalse(os.path.exists(self.path + '.part'))
+    
+    def test_truncated_transfer_is_not_committed(self):
+        RangeHandler.truncate = True
+        self.assertFalse(self.downloader.download_pdf(self.url, self.url))
+        self.assertFalse(os.path.exists(self.path))
+        self.assertIsNone(self.downloader.manifest.get(self.url))
+        kept = os.path.getsize(self.path + '.part')
+        self.assertGreater(kept, 0)
+        
+        RangeHandler.truncate = False
+        self.assertTrue(self.downloader.download_pdf(self.url, self.url))
+        self.assertEqual(RangeHandler.ranges[-1], f"bytes={kept}-")
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), BODY)
+    
+    def test_pages_sharing_a_pdf_download_it_once(self):
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda i: self.downloader.download_pdf(self.url, f"{self.url}/page-{i}"), range(4)))
+        self.assertEqual(results, [True] * 4)
+        self.assertEqual(RangeHandler.ranges, [None])
+        # The pages that waited only confirm the download
+        self.assertEqual(RangeHandler.revalidations, 3)
+        with open(self.path, 'rb') as f:
+            self.assertEqual(f.read(), BODY)
+    
+    def test_part_claimed_by_another_process_is_left_alone(self):
+        with claim(self.path + '.part'):
+            with open(self.path + '.part.claim', 'w') as f:
+                f.write(f"elsewhere:{os.getpid()}")
+            self.assertFalse(self.downloader.download_pdf(self.url, self.url))
+        self.assertFalse(os.path.exists(self.path + '.part.claim'))
+        self.assertTrue(self.downloader.download_pdf(self.url, self.url))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import hashlib
+import io
+import os
+import tempfile
+import unittest
+from stream_writer import BlockWriter, write_response
+
+
+class FakeResponse:
+    def __init__(self, body, encoding=None):
+        self.raw = io.BytesIO(body)
+        self.headers = {'Content-Encoding': encoding} if encoding else {}
+        self._body = body
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self._body), 1000):
+            yield self._body[start:start + 1000]
+
+
+class TestBlockWriter(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = os.path.join(self.folder.name, 'exam.pdf.part')
+        self.body = os.urandom(10000)
+
+    def _read(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+    def test_chunks_of_any_size_are_written_in_order(self):
+        with BlockWriter(self.path, block_size=4096) as writer:
+            for start, end in ((0, 1), (1, 4097), (4097, 4100), (4100, 10000)):
+                writer.write(self.body[start:end])
+            size, sha256 = writer.result()
+        self.assertEqual(size, len(self.body))
+        self.assertEqual(sha256, hashlib.sha256(self.body).hexdigest())
+        self.assertEqual(self._read(), self.body)
+
+    def test_resume_hashes_the_whole_file(self):
+        with open(self.path, 'wb') as f:
+            f.write(self.body[:3000])
+        with BlockWriter(self.path, offset=3000, block_size=4096) as writer:
+            writer.fill(io.BytesIO(self.body[3000:]).readinto)
+            size, sha256 = writer.result()
+        self.assertEqual(size, len(self.body))
+        self.assertEqual(sha256, hashlib.sha256(self.body).hexdigest())
+        self.assertEqual(self._read(), self.body)
+
+    def test_reserve_keeps_the_file_size(self):
+        with BlockWriter(self.path, expected_size=1024 * 1024, reserve=True) as writer:
+            writer.write(self.body[:100])
+            self.assertEqual(os.path.getsize(self.path), 0)
+            size, _ = writer.result()
+        self.assertEqual(size, 100)
+        self.assertEqual(os.path.getsize(self.path), 100)
+
+    def test_write_response_reads_raw_or_decoded_body(self):
+        expected = (len(self.body), hashlib.sha256(self.body).hexdigest())
+        self.assertEqual(write_response(FakeResponse(self.body), self.path), expected)
+        self.assertEqual(write_response(FakeResponse(self.body, 'gzip'), self.path), expected)
+        self.assertEqual(self._read(), self.body)
+
+if __name__ == '__main__':
+    unittest.main()
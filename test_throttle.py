@@ -0,0 +1,121 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+import requests
+from download_exams import PhDExamDownloader
+from local_server import LocalServer, QuietHandler
+from throttle import HostThrottle, RetryPolicy, parse_retry_after
+
+
+class FlakyHandler(QuietHandler):
+    protocol_version = 'HTTP/1.1'
+    # Statuses answered before the page is served, consumed one per request
+    failures = []
+    hits = 0
+
+    def do_GET(self):
+        FlakyHandler.hits += 1
+        if FlakyHandler.failures:
+            self.send_response(FlakyHandler.failures.pop(0))
+            self.send_header('Retry-After', '0')
+            body = b'busy'
+        else:
+            self.send_response(200)
+            body = b'<html><body>ok</body></html>'
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestHostThrottle(unittest.TestCase):
+
+    def test_burst_then_interval(self):
+        throttle = HostThrottle(min_interval=0.2, burst=3)
+        state = throttle._state_for('https://lmd.sahla-dz.com/')
+        delays = [throttle._reserve(state) for _ in range(4)]
+        self.assertEqual(delays[:3], [0, 0, 0])
+        self.assertGreater(delays[3], 0.1)
+
+    def test_backoff_and_recovery(self):
+        throttle = HostThrottle(min_interval=0)
+        url = 'https://lmd.sahla-dz.com/page/'
+        throttle.backoff(url)
+        throttle.backoff(url)
+        self.assertEqual(throttle.interval(url), 2 * HostThrottle.BACKOFF_FLOOR)
+        self.assertEqual(throttle.interval('https://other.example/'), 0)
+        for _ in range(100):
+            throttle.recover(url)
+        self.assertLess(throttle.interval(url), 0.01)
+
+    def test_retry_after_closes_the_host(self):
+        throttle = HostThrottle(min_interval=0)
+        throttle.backoff('https://lmd.sahla-dz.com/a', retry_after=0.3)
+        state = throttle._state_for('https://lmd.sahla-dz.com/b')
+        self.assertGreater(throttle._reserve(state), 0.2)
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('7'), 7)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+
+    def test_jittered_delays_are_bounded(self):
+        policy = RetryPolicy(retries=2, base_delay=0.5, max_delay=4)
+        self.assertTrue(all(0 <= policy.delay(5) <= 4 for _ in range(50)))
+        self.assertEqual(policy.delay(0, retry_after=3), 3)
+        self.assertFalse(policy.should_retry(0, retry_after=3600))
+        self.assertFalse(policy.should_retry(2))
+
+
+class TestRetries(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = LocalServer(FlakyHandler).start()
+        cls.addClassCleanup(cls.server.stop)
+        cls.url = f"{cls.server.base_url}/exam/"
+
+    def setUp(self):
+        FlakyHandler.hits = 0
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def _downloader(self, retries):
+        downloader = PhDExamDownloader(self.url, self.folder.name, use_selenium=False, politeness_delay=0,
+                                       use_cache=False, use_manifest=False, retries=retries)
+        downloader.retry_policy.base_delay = 0.01
+        return downloader
+
+    def test_transient_errors_are_retried(self):
+        FlakyHandler.failures = [503, 429, 502]
+        downloader = self._downloader(retries=3)
+        response = downloader._get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(FlakyHandler.hits, 4)
+        # Two throttling answers doubled the host's interval twice from the floor
+        self.assertGreater(downloader.throttle.interval(self.url), 0)
+
+    def test_last_error_is_returned_when_retries_run_out(self):
+        FlakyHandler.failures = [500, 500]
+        response = self._downloader(retries=1)._get(self.url)
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(FlakyHandler.hits, 2)
+
+    def test_connection_errors_are_retried(self):
+        downloader = self._downloader(retries=2)
+        ok = MagicMock(status_code=200, headers={})
+        downloader.session.get = MagicMock(side_effect=[requests.ConnectionError('reset'), requests.Timeout(), ok])
+        self.assertIs(downloader._get(self.url), ok)
+        self.assertEqual(downloader.session.get.call_count, 3)
+
+    def test_requests_have_a_default_timeout(self):
+        downloader = self._downloader(retries=0)
+        downloader.timeout = (2, 5)
+        downloader.session.get = MagicMock(return_value=MagicMock(status_code=200, headers={}))
+        downloader._get(self.url)
+        downloader._get(self.url, timeout=1)
+        self.assertEqual([call.kwargs['timeout'] for call in downloader.session.get.call_args_list], [(2, 5), 1])
+
+if __name__ == '__main__':
+    unittest.main()
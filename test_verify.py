@@ -0,0 +1,135 @@
+import io
+import os
+import re
+import tempfile
+import unittest
+from unittest.mock import patch
+from download_exams import PhDExamDownloader
+from local_server import LocalServer, QuietHandler
+from pdf_assembly import _PdfWriter
+from verify import check_file, scan_downloads
+
+
+def pdf_bytes(text):
+    f = io.BytesIO()
+    writer = _PdfWriter(f)
+    writer.write_object(1, f"<< /Type /Catalog /Title ({text}) >>")
+    writer.finish(1)
+    return f.getvalue()
+
+
+JPEG = b'\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00' + b'\x00' * 200 + b'\xff\xd9'
+
+
+class ExamHandler(QuietHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = []
+
+    def do_GET(self):
+        ExamHandler.requests.append(self.path)
+        if self.path == '/sujets-concours-doctorat/':
+            body = b'<a href="/sujets-doctorat-1/">1</a><a href="/sujets-doctorat-2/">2</a>'
+            content_type = 'text/html'
+        elif self.path.startswith('/sujets-doctorat-'):
+            number = self.path.strip('/').rsplit('-', 1)[1]
+            body = f'<div class="td-post-content"><a href="/files/Sujet-{number}.pdf">PDF</a></div>'.encode()
+            content_type = 'text/html'
+        else:
+            body = pdf_bytes(self.path)
+            content_type = 'application/pdf'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestChecks(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+
+    def _write(self, name, body):
+        path = os.path.join(self.folder.name, name)
+        with open(path, 'wb') as f:
+            f.write(body)
+        return path
+
+    def test_pdf_structure(self):
+        body = pdf_bytes('exam')
+        self.assertIsNone(check_file(self._write('ok.pdf', body), len(body)))
+        self.assertEqual(check_file(self._write('cut.pdf', body[:-40]))[0], 'truncated')
+        self.assertEqual(check_file(self._write('short.pdf', body[:-40]), len(body))[0], 'size')
+        self.assertEqual(check_file(self._write('page.pdf', b'<!DOCTYPE html><p>Quota exceeded</p>'))[0], 'format')
+        moved = re.sub(rb'startxref\n\d+', b'startxref\n5', body)
+        self.assertEqual(check_file(self._write('moved.pdf', moved))[0], 'corrupt')
+        self.assertEqual(check_file(self._write('hash.pdf', body), sha256='0' * 64)[0], 'checksum')
+
+    @patch('verify.Image', None)
+    def test_image_trailers(self):
+        self.assertIsNone(check_file(self._write('ok.jpg', JPEG)))
+        self.assertEqual(check_file(self._write('cut.jpg', JPEG[:-20]))[0], 'truncated')
+        self.assertEqual(check_file(self._write('cut.png', b'\x89PNG\r\n\x1a\n' + b'\x00' * 40))[0], 'truncated')
+        self.assertEqual(check_file(self._write('page.jpg', b'  <html><body>Not found</body></html>'))[0], 'format')
+        self.assertEqual(check_file(os.path.join(self.folder.name, 'gone.jpg'))[0], 'missing')
+
+    def test_scan_skips_hidden_folders(self):
+        os.makedirs(os.path.join(self.folder.name, '.blobs'))
+        self._write(os.path.join('.blobs', 'broken.pdf'), b'x')
+        self._write('broken.pdf', b'x')
+        checked, problems = scan_downloads(self.folder.name)
+        self.assertEqual(checked, 1)
+        self.assertEqual([problem['entry'] for problem in problems], [None])
+
+
+class TestRepair(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = LocalServer(ExamHandler).start()
+        cls.addClassCleanup(cls.server.stop)
+        cls.url = f"{cls.server.base_url}/sujets-concours-doctorat/"
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.first = self._downloader()
+        self.first.run()
+        self.first.manifest.close()
+        ExamHandler.requests = []
+
+    def _downloader(self):
+        return PhDExamDownloader(self.url, self.folder.name, use_selenium=False, politeness_delay=0, use_cache=False)
+
+    def _path(self, name):
+        return os.path.join(self.folder.name, name)
+
+    def test_only_broken_files_are_fetched_again(self):
+        # Truncated in place: the stored copy shares the file and is broken too
+        with open(self._path('Sujet-1.pdf'), 'r+b') as f:
+            f.truncate(100)
+        # Replaced by an error page: the stored copy is still sound
+        with open(self._path('Sujet-2.pdf'), 'rb') as f:
+            original = f.read()
+        os.remove(self._path('Sujet-2.pdf'))
+        with open(self._path('Sujet-2.pdf'), 'wb') as f:
+            f.write(b'<html>Service Unavailable</html>')
+        with open(self._path('stray.pdf'), 'wb') as f:
+            f.write(b'<html></html>')
+
+        downloader = self._downloader()
+        self.addCleanup(downloader.manifest.close)
+        downloader.repair()
+
+        self.assertEqual(sorted(ExamHandler.requests), ['/files/Sujet-1.pdf', '/sujets-doctorat-1/'])
+        for name in ('Sujet-1.pdf', 'Sujet-2.pdf'):
+            self.assertIsNone(check_file(self._path(name)))
+        with open(self._path('Sujet-2.pdf'), 'rb') as f:
+            self.assertEqual(f.read(), original)
+        self.assertTrue(os.path.exists(self._path('stray.pdf')))
+        self.assertEqual(scan_downloads(self.folder.name, downloader.manifest.entries())[1][0]['path'],
+                         os.path.abspath(self._path('stray.pdf')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+import collections
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from download_exams import PhDExamDownloader
+from local_server import LocalServer, QuietHandler
+from work_queue import WorkQueue, coordinate
+
+CATEGORIES = ('informatique', 'mathematiques')
+
+
+class CategoryHandler(QuietHandler):
+    protocol_version = 'HTTP/1.1'
+    requests = collections.Counter()
+    lock = threading.Lock()
+    listing_failures = 0
+
+    def do_GET(self):
+        with CategoryHandler.lock:
+            CategoryHandler.requests[self.path] += 1
+            failing = CategoryHandler.listing_failures > 0 and 'concours' in self.path
+            if failing:
+                CategoryHandler.listing_failures -= 1
+        name = self.path.strip('/')
+        if failing:
+            body = 'Not found'
+            content_type = 'text/plain'
+            self.send_response(404)
+        elif name.startswith('sujets-concours-doctorat-'):
+            category = name.rsplit('-', 1)[1]
+            # Both categories link to the shared exam page
+            body = ''.join(f'<a href="/sujets-doctorat-{category}-{i}/">{i}</a>' for i in range(3))
+            body += '<a href="/sujets-doctorat-shared-0/">shared</a>'
+            content_type = 'text/html'
+        elif name.startswith('sujets-doctorat-'):
+            body = f'<div class="td-post-content"><a href="/files/{name}.pdf">PDF</a></div>'
+            content_type = 'text/html'
+        else:
+            time.sleep(0.02)
+            body = '%PDF-1.4\n' + self.path * 50
+            content_type = 'application/pdf'
+        body = body.encode()
+        if not failing:
+            self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class TestWorkQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.path = os.path.join(self.folder.name, 'queue.sqlite')
+
+    def _queue(self, **kwargs):
+        queue = WorkQueue(self.path, **kwargs)
+        self.addCleanup(queue.close)
+        return queue
+
+    def test_pages_are_leased_once_and_deduplicated(self):
+        first, second = self._queue(), self._queue()
+        self.assertFalse(first.finished())
+        first.seed(['https://lmd.sahla-dz.com/sujets-concours-doctorat-informatique/'], max_depth=1)
+        (kind, listing, depth), = first.lease('a', 5)
+        self.assertEqual((kind, depth), ('listing', -1))
+        added = first.complete('a', kind, listing, depth, 0, [
+            'https://lmd.sahla-dz.com/other/', 'https://lmd.sahla-dz.com/sujet-1/',
+            'https://lmd.sahla-dz.com/sujet-1/?utm_source=x'])
+        self.assertEqual(added, 2)
+
+        # Keyword-rich pages first, and never to two workers
+        self.assertEqual(first.lease('a'), [('page', 'https://lmd.sahla-dz.com/sujet-1/', 0)])
+        self.assertEqual(second.lease('b', 5), [('page', 'https://lmd.sahla-dz.com/other/', 0)])
+        self.assertEqual(second.lease('b'), [])
+        second.complete('b', 'page', 'https://lmd.sahla-dz.com/other/', 0, 0,
+                        ['https://lmd.sahla-dz.com/sujet-1/', 'https://lmd.sahla-dz.com/sujet-2/'])
+        # Depth 1 is the limit: links found there are not queued
+        first.complete('a', 'page', 'https://lmd.sahla-dz.com/sujet-1/', 0, 1, [])
+        (kind, url, depth), = first.lease('a')
+        self.assertEqual(first.complete('a', kind, url, depth, 1, ['https://lmd.sahla-dz.com/sujet-3/']), 0)
+
+        self.assertTrue(second.finished())
+        counts = second.counts()
+        self.assertEqual((counts['done'], counts['downloads']), (3, 2))
+
+    def test_expired_leases_are_requeued_then_given_up(self):
+        queue = self._queue(lease_seconds=0.05, max_attempts=2)
+        queue.seed(['https://lmd.sahla-dz.com/a/'])
+        self.assertEqual(len(queue.lease('dead')), 1)
+        self.assertEqual(queue.lease('alive'), [])
+        time.sleep(0.1)
+        # The dead worker's page goes to the next worker asking for work
+        (kind, url, _), = queue.lease('alive')
+        queue.renew('alive', [(kind, url)])
+        self.assertEqual(queue.counts()['workers'], 1)
+        time.sleep(0.1)
+        self.assertEqual(queue.requeue_expired(), 1)
+        self.assertEqual(queue.lease('other'), [])
+        self.assertTrue(queue.finished())
+
+    def test_renewals_are_per_page_and_capped(self):
+        queue = self._queue(lease_seconds=0.1, max_lease_seconds=0.25)
+        queue.seed(['https://lmd.sahla-dz.com/a/', 'https://lmd.sahla-dz.com/b/'])
+        (kind, hung, _), (_, idle, _) = queue.lease('a', 2)
+        for _ in range(3):
+            time.sleep(0.07)
+            queue.renew('a', [(kind, hung)])
+        # The page no longer being processed expired; the one still processed was kept
+        self.assertEqual(queue.lease('b'), [(kind, idle, -1)])
+        time.sleep(0.1)
+        queue.renew('a', [(kind, hung)])
+        # Renewing cannot keep the hung page past its maximum lease
+        self.assertEqual(queue.lease('b'), [(kind, hung, -1)])
+
+    def test_queue_file_uses_the_rollback_journal(self):
+        conn = sqlite3.connect(self.path)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.close()
+        queue = self._queue()
+        with queue._lock:
+            self.assertEqual(queue._conn.execute('PRAGMA journal_mode').fetchone()[0], 'delete')
+
+    def test_page_limit_is_shared(self):
+        queue = self._queue()
+        queue.seed([], max_pages=2)
+        queue.complete('a', 'listing', 'x', -1, 0, [f"https://lmd.sahla-dz.com/sujet-{i}/" for i in range(5)])
+        self.assertEqual(len(queue.lease('a', 5)), 2)
+        self.assertEqual(queue.lease('b', 5), [])
+
+
+class TestDistributedCrawl(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.TemporaryDirectory()
+        self.addCleanup(self.folder.cleanup)
+        self.server = LocalServer(CategoryHandler).start()
+        self.addCleanup(self.server.stop)
+        CategoryHandler.requests.clear()
+        CategoryHandler.listing_failures = 0
+        self.base = self.server.base_url
+        self.queue_path = os.path.join(self.folder.name, 'queue.sqlite')
+
+    def _worker(self, name):
+        downloader = PhDExamDownloader(f"{self.base}/", os.path.join(self.folder.name, name), use_selenium=False,
+                                       workers=2, politeness_delay=0, max_per_host=8, work_queue=self.queue_path,
+                                       lease_seconds=0.5)
+        downloader.worker_id = name
+        downloader.queue_poll = 0.05
+        return downloader
+
+    def test_workers_share_categories_without_duplicates(self):
+        coordinator = WorkQueue(self.queue_path, lease_seconds=0.5)
+        self.addCleanup(coordinator.close)
+        coordinator.seed([f"{self.base}/sujets-concours-doctorat-{category}/" for category in CATEGORIES])
+        # A worker that died holding a lease
+        self.assertEqual(len(coordinator.lease('dead', 2)), 2)
+
+        workers = [self._worker(name) for name in ('a', 'b', 'c')]
+        threads = [threading.Thread(target=worker.run) for worker in workers]
+        for thread in threads:
+            thread.start()
+        coordinate(coordinator, [], interval=0.05)
+        for thread in threads:
+            thread.join(30)
+        for worker in workers:
+            worker.manifest.close()
+
+        pdfs = [path for path in CategoryHandler.requests if path.startswith('/files/')]
+        self.assertEqual(len(pdfs), 7)
+        self.assertEqual({CategoryHandler.requests[path] for path in pdfs}, {1})
+        counts = coordinator.counts()
+        self.assertEqual((counts['done'], counts['downloads'], counts['failed']), (7, 7, 0))
+
+    def test_listing_that_fails_is_retried(self):
+        CategoryHandler.listing_failures = 1
+        coordinator = WorkQueue(self.queue_path)
+        self.addCleanup(coordinator.close)
+        coordinator.seed([f"{self.base}/sujets-concours-doctorat-informatique/"])
+        worker = self._worker('a')
+        worker.run()
+        worker.manifest.close()
+
+        self.assertEqual(CategoryHandler.requests['/sujets-concours-doctorat-informatique/'], 2)
+        counts = coordinator.counts()
+        self.assertEqual((counts['done'], counts['downloads'], counts['listings']), (4, 4, 0))
+
+if __name__ == '__main__':
+    unittest.main()
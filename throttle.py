@@ -0,0 +1,213 @@
+import asyncio
+import random
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlparse
+
+# Statuses that mean "try again later" rather than "this URL is broken"
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value):
+    """
+    Read a Retry-After header
+
+    Args:
+        value (str): Header value, either a number of seconds or an HTTP date
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class RetryPolicy:
+    """
+    When and how long to wait before retrying a failed request.
+
+    Delays grow exponentially with "full jitter" (a random delay between zero
+    and the exponential bound), so workers that failed together do not retry
+    together. A Retry-After sent by the server takes precedence.
+    """
+
+    def __init__(self, retries=3, base_delay=0.5, max_delay=30.0, max_retry_after=300.0):
+        """
+        Args:
+            retries (int): Extra attempts after the first one
+            base_delay (float): Bound of the first delay in seconds
+            max_delay (float): Largest computed delay in seconds
+            max_retry_after (float): Largest Retry-After honoured; longer ones give up instead of stalling the crawl
+        """
+        self.retries = max(0, int(retries))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+
+    def delay(self, attempt, retry_after=None):
+        """
+        Args:
+            attempt (int): Number of the attempt that failed, starting at 0
+            retry_after (float): Delay asked for by the server
+
+        Returns:
+            float: Seconds to wait before the next attempt
+        """
+        if retry_after is not None:
+            return retry_after
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    def should_retry(self, attempt, retry_after=None):
+        """
+        Args:
+            attempt (int): Number of the attempt that failed, starting at 0
+            retry_after (float): Delay asked for by the server
+
+        Returns:
+            bool: Whether another attempt is allowed
+        """
+        if retry_after is not None and retry_after > self.max_retry_after:
+            return False
+        return attempt < self.retries
+
+
+class HostThrottle:
+    """
+    Per-host rate limits shared by all worker threads of a crawl.
+
+    Each host gets a token bucket refilled at one token per `min_interval`
+    and holding up to `burst` tokens, plus a cap on the number of requests
+    that may be in flight at the same time. The bucket adapts to the server:
+    a 429 or 503 doubles the host's interval (and a Retry-After closes the
+    bucket until it expires), and every successful request brings the
+    interval back towards `min_interval`.
+    """
+
+    #: Interval a host backs off to when it is throttled while no interval is configured
+    BACKOFF_FLOOR = 0.5
+    #: Longest interval a host is slowed down to
+    MAX_INTERVAL = 30.0
+    #: Fraction of the extra interval kept after each successful request
+    RECOVERY = 0.9
+
+    def __init__(self, min_interval=0.5, max_concurrent=2, burst=1):
+        """
+        Args:
+            min_interval (float): Delay in seconds between two requests to the same host once the burst is spent
+            max_concurrent (int): Maximum number of simultaneous requests to the same host
+            burst (int): Requests to the same host allowed back to back before the interval applies
+        """
+        self.min_interval = max(0.0, float(min_interval))
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.burst = max(1, int(burst))
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host_state(self, host):
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = {
+                    'semaphore': threading.BoundedSemaphore(self.max_concurrent),
+                    # Time at which the bucket is full again when no request is made
+                    'next_time': 0.0,
+                    'interval': self.min_interval,
+                    # No request may start before this time (Retry-After)
+                    'closed_until': 0.0,
+                }
+                self._hosts[host] = state
+            return state
+
+    def _state_for(self, url):
+        return self._host_state(urlparse(url).netloc.lower())
+
+    def _reserve(self, state):
+        """
+        Take a token from a host's bucket and return how long to wait for it
+        """
+        with self._lock:
+            now = time.monotonic()
+            interval = state['interval']
+            next_time = max(now, state['next_time'])
+            # The bucket holds `burst` tokens: up to `burst - 1` intervals may be borrowed ahead
+            start = max(now, next_time - (self.burst - 1) * interval, state['closed_until'])
+            state['next_time'] = max(next_time, start) + interval
+            return start - now
+
+    def backoff(self, url, retry_after=None):
+        """
+        Slow down requests to a host that answered 429 or 503
+
+        Args:
+            url (str): URL that was throttled
+            retry_after (float): Delay asked for by the server, in seconds
+        """
+        state = self._state_for(url)
+        with self._lock:
+            state['interval'] = min(self.MAX_INTERVAL, max(state['interval'] * 2, self.BACKOFF_FLOOR))
+            if retry_after:
+                state['closed_until'] = max(state['closed_until'], time.monotonic() + retry_after)
+
+    def recover(self, url):
+        """
+        Bring a host's interval back towards `min_interval` after a successful request
+
+        Args:
+            url (str): URL that succeeded
+        """
+        state = self._state_for(url)
+        with self._lock:
+            extra = state['interval'] - self.min_interval
+            if extra > 0:
+                state['interval'] = self.min_interval + extra * self.RECOVERY
+
+    def interval(self, url):
+        """
+        Returns:
+            float: Current interval between two requests to the host of `url`
+        """
+        return self._state_for(url)['interval']
+
+    @contextmanager
+    def slot(self, url):
+        """
+        Block until a request to the host of `url` is allowed, then hold a slot for it
+
+        Args:
+            url (str): URL that is about to be requested
+        """
+        state = self._state_for(url)
+        state['semaphore'].acquire()
+        try:
+            delay = self._reserve(state)
+            if delay > 0:
+                time.sleep(delay)
+            yield
+        finally:
+            state['semaphore'].release()
+
+    async def async_wait(self, url):
+        """
+        Wait until a request to the host of `url` is allowed, without blocking the event loop
+
+        Concurrency caps are left to the connection pool of the async backend.
+
+        Args:
+            url (str): URL that is about to be requested
+        """
+        delay = self._reserve(self._state_for(url))
+        if delay > 0:
+            await asyncio.sleep(delay)
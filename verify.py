@@ -0,0 +1,215 @@
+import hashlib
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from drive import PDF_MAGIC, PDF_MAGIC_WINDOW
+
+try:
+    from PIL import Image
+except ImportError:  # Without Pillow images are only checked for their header and trailer
+    Image = None
+
+# Readers accept the %%EOF marker anywhere in the last kilobyte of a PDF
+PDF_TAIL_WINDOW = 1024
+STARTXREF = re.compile(rb'startxref\s+(\d+)\s+%%EOF')
+XREF_SECTION = re.compile(rb'\s*(?:xref|\d+\s+\d+\s+obj)\b')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.webp')
+HTML_START = re.compile(rb'\s*<(?:!doctype|html|head|body|\?xml)', re.IGNORECASE)
+HASH_BLOCK = 1024 * 1024
+
+
+def looks_like_html(head):
+    """
+    Args:
+        head (bytes): First bytes of a file
+
+    Returns:
+        bool: True if the file is an HTML page, such as an error or login page saved in place of a download
+    """
+    return bool(HTML_START.match(head))
+
+
+def is_html_file(path):
+    """
+    Args:
+        path (str): Downloaded file
+
+    Returns:
+        bool: True if the file holds an HTML page instead of the expected content
+    """
+    with open(path, 'rb') as f:
+        return looks_like_html(f.read(PDF_MAGIC_WINDOW))
+
+
+def image_format(head):
+    """
+    Recognise an image from its first bytes
+
+    Args:
+        head (bytes): At least the first 12 bytes of the file
+
+    Returns:
+        str: 'jpeg', 'png', 'gif' or 'webp', or None for anything else
+    """
+    if head.startswith(b'\xff\xd8\xff'):
+        return 'jpeg'
+    if head.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'png'
+    if head.startswith((b'GIF87a', b'GIF89a')):
+        return 'gif'
+    if head.startswith(b'RIFF') and head[8:12] == b'WEBP':
+        return 'webp'
+    return None
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def check_pdf(path, size):
+    """
+    Check that a file is a whole PDF: header, %%EOF trailer and a startxref pointing at a cross-reference section
+
+    Args:
+        path (str): File to check
+        size (int): Its size in bytes
+
+    Returns:
+        tuple: (problem kind, description), or None if the file is sound
+    """
+    with open(path, 'rb') as f:
+        head = f.read(PDF_MAGIC_WINDOW)
+        if PDF_MAGIC not in head:
+            if looks_like_html(head):
+                return 'format', "HTML page instead of a PDF"
+            return 'format', "no %PDF header"
+        f.seek(max(0, size - PDF_TAIL_WINDOW))
+        tail = f.read()
+        if b'%%EOF' not in tail:
+            return 'truncated', "no %%EOF marker at the end of the PDF"
+        matches = list(STARTXREF.finditer(tail))
+        if not matches:
+            return 'truncated', "no startxref before the %%EOF marker"
+        # Offsets count from the %PDF header, which may follow some leading junk
+        offset = int(matches[-1].group(1)) + head.index(PDF_MAGIC)
+        if offset >= size:
+            return 'truncated', f"startxref points past the end of the file ({offset} >= {size})"
+        f.seek(offset)
+        if not XREF_SECTION.match(f.read(32)):
+            return 'corrupt', f"startxref {offset} does not point at a cross-reference section"
+    return None
+
+
+def check_image(path, size):
+    """
+    Check that a file is a whole image: known header, end marker of its format and, with Pillow, a full decode
+
+    Formats Pillow is needed to recognise are only rejected when they are HTML pages.
+
+    Args:
+        path (str): File to check
+        size (int): Its size in bytes
+
+    Returns:
+        tuple: (problem kind, description), or None if the file is sound
+    """
+    with open(path, 'rb') as f:
+        head = f.read(PDF_MAGIC_WINDOW)
+        f.seek(max(0, size - 64))
+        tail = f.read()
+    if looks_like_html(head):
+        return 'format', "HTML page instead of an image"
+    kind = image_format(head)
+    if kind == 'jpeg' and not tail.rstrip(b'\x00\r\n ').endswith(b'\xff\xd9'):
+        return 'truncated', "no JPEG end-of-image marker"
+    if kind == 'png' and not tail.endswith(b'IEND\xaeB`\x82'):
+        return 'truncated', "no PNG IEND chunk"
+    if kind == 'gif' and not tail.rstrip(b'\x00').endswith(b';'):
+        return 'truncated', "no GIF trailer"
+    if kind == 'webp' and int.from_bytes(head[4:8], 'little') + 8 != size:
+        return 'truncated', "RIFF size does not match the file size"
+    if Image is not None:
+        try:
+            with Image.open(path) as image:
+                image.load()
+        except Exception as e:
+            return 'decode', f"cannot be decoded: {e}"
+    return None
+
+
+def file_kind(path):
+    return 'pdf' if path.lower().endswith('.pdf') else 'image'
+
+
+def check_file(path, expected_size=None, sha256=None, kind=None):
+    """
+    Check one downloaded file
+
+    The cheap checks run first: presence, size, then the structure of the
+    format. The SHA-256, which reads the whole file, comes last.
+
+    Args:
+        path (str): File to check
+        expected_size (int): Size the download had (its Content-Length when the server sent one), if known
+        sha256 (str): Hex SHA-256 the download had, if known
+        kind (str): 'pdf' or 'image' (defaults to guessing from the extension of `path`)
+
+    Returns:
+        tuple: (problem kind, description), or None if the file is sound
+    """
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return 'missing', "file is missing"
+    if size == 0:
+        return 'truncated', "file is empty"
+    if expected_size is not None and size != expected_size:
+        return 'size', f"{size} bytes instead of {expected_size}"
+    problem = check_pdf(path, size) if (kind or file_kind(path)) == 'pdf' else check_image(path, size)
+    if problem:
+        return problem
+    if sha256 and file_sha256(path) != sha256:
+        return 'checksum', "content differs from the downloaded file (SHA-256 mismatch)"
+    return None
+
+
+def scan_downloads(folder, entries=(), workers=None):
+    """
+    Check the downloads recorded in the manifest and every other PDF or image in a folder, in parallel
+
+    Hidden folders (the content store, the HTTP cache) are not scanned.
+
+    Args:
+        folder (str): Destination folder of the crawl
+        entries (iterable): Manifest entries; their files are checked against the recorded size and hash
+        workers (int): Number of files checked at once (defaults to the executor's default)
+
+    Returns:
+        tuple: (number of files checked, list of dicts with 'path', 'kind', 'detail' and the
+               manifest 'entry' or None, one per broken or missing file)
+    """
+    jobs = {}
+    for entry in entries:
+        jobs[os.path.abspath(entry['path'])] = entry
+    for root, dirs, names in os.walk(folder):
+        dirs[:] = [name for name in dirs if not name.startswith('.')]
+        for name in names:
+            if name.lower().endswith(('.pdf',) + IMAGE_EXTENSIONS):
+                jobs.setdefault(os.path.abspath(os.path.join(root, name)), None)
+
+    def check(item):
+        path, entry = item
+        if entry is None:
+            return path, None, check_file(path)
+        return entry['path'], entry, check_file(entry['path'], entry['size'], entry['sha256'])
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(check, jobs.items()))
+    problems = [{'path': path, 'kind': problem[0], 'detail': problem[1], 'entry': entry}
+                for path, entry, problem in results if problem]
+    return len(results), problems
@@ -0,0 +1,313 @@
+import os
+import socket
+import sqlite3
+import threading
+import time
+
+from frontier import canonicalize, keyword_score
+
+# A listing page is discovered before any exam page it links to
+LISTING_DEPTH = -1
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class WorkQueue:
+    """
+    Crawl frontier shared by several crawler processes, kept in a SQLite database.
+
+    Every listing page and exam page is one row, keyed by its canonical URL,
+    so a page is queued once however many workers find it; the rows marked
+    done are the shared set of processed pages. Workers lease a few rows at a
+    time and renew the leases of the pages they are working on. A lease that
+    is not renewed (the worker died or lost the database) expires and its
+    page is queued again, until it has been attempted `max_attempts` times.
+    Renewals stop extending a lease `max_lease_seconds` after it was taken,
+    so a page that hangs its worker is handed to another one as well.
+
+    Rows are handed out like the in-process frontier: listing pages first,
+    then shallowest pages, then pages whose URL holds more exam keywords.
+    The database uses SQLite's rollback journal, not WAL: WAL coordinates
+    through shared memory and only works between processes of one host. With
+    the rollback journal every transaction goes through POSIX file locks, so
+    the file may be shared by several machines on a network filesystem whose
+    locks are reliable (NFSv4 with locking enabled, SMB). SQLite's caveats
+    about network filesystems still apply; when in doubt keep the coordinator
+    and the workers on one host.
+    """
+
+    def __init__(self, path, lease_seconds=300, max_attempts=3, max_lease_seconds=None):
+        """
+        Args:
+            path (str): Path of the SQLite database file
+            lease_seconds (float): How long a leased page stays reserved without being renewed
+            max_attempts (int): Leases of a page before it is given up as failed
+            max_lease_seconds (float): Longest a lease can be kept by renewing it (defaults to 12 `lease_seconds`)
+        """
+        self.path = path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.max_lease_seconds = max_lease_seconds if max_lease_seconds is not None else 12 * lease_seconds
+        self._lock = threading.Lock()
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        # Transactions are explicit: leasing must read and update rows atomically across processes
+        self._conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock:
+            # A shared queue file must not use WAL, which needs memory shared on a single host
+            self._conn.execute('PRAGMA journal_mode=DELETE')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    depth INTEGER NOT NULL,
+                    score INTEGER NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    worker TEXT,
+                    lease_expires REAL,
+                    leased_at REAL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    downloads INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (kind, url)
+                )
+            ''')
+            columns = [row['name'] for row in self._conn.execute('PRAGMA table_info(pages)')]
+            if 'leased_at' not in columns:  # Queue files created before leases were capped
+                self._conn.execute('ALTER TABLE pages ADD COLUMN leased_at REAL')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS pages_order ON pages (state, depth, score)')
+            self._conn.execute('CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT)')
+
+    def _transaction(self, statements):
+        """
+        Run `statements(conn)` in a write transaction taken up front, so concurrent leases cannot interleave
+        """
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                result = statements(self._conn)
+            except BaseException:
+                self._conn.execute('ROLLBACK')
+                raise
+            self._conn.execute('COMMIT')
+            return result
+
+    def _setting(self, conn, name):
+        row = conn.execute('SELECT value FROM settings WHERE name = ?', (name,)).fetchone()
+        return None if row is None or row['value'] is None else int(row['value'])
+
+    def seed(self, listing_urls, max_depth=None, max_pages=None):
+        """
+        Queue the listing pages of a crawl and set its limits (the coordinator's job)
+
+        Args:
+            listing_urls (list): Listing pages, one per site category
+            max_depth (int): Deepest sub-link depth queued (links of the listing pages are depth 0), None for no limit
+            max_pages (int): Maximum number of exam pages handed out, None for no limit
+
+        Returns:
+            int: Number of listing pages that were not queued already
+        """
+        def statements(conn):
+            added = 0
+            for url in listing_urls:
+                cursor = conn.execute('INSERT OR IGNORE INTO pages (url, kind, depth, score) VALUES (?, ?, ?, 0)',
+                                      (canonicalize(url), 'listing', LISTING_DEPTH))
+                added += cursor.rowcount
+            for name, value in (('max_depth', max_depth), ('max_pages', max_pages), ('seeded', 1)):
+                conn.execute('INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)',
+                             (name, None if value is None else str(value)))
+            return added
+        return self._transaction(statements)
+
+    def _requeue_expired(self, conn, now):
+        expired = conn.execute("SELECT kind, url, attempts FROM pages WHERE state = 'leased' AND lease_expires < ?",
+                               (now,)).fetchall()
+        for row in expired:
+            state = 'failed' if row['attempts'] >= self.max_attempts else 'queued'
+            conn.execute('UPDATE pages SET state = ?, worker = NULL, lease_expires = NULL WHERE kind = ? AND url = ?',
+                         (state, row['kind'], row['url']))
+        return len(expired)
+
+    def requeue_expired(self):
+        """
+        Queue again the pages whose lease ran out
+
+        Returns:
+            int: Number of expired leases
+        """
+        return self._transaction(lambda conn: self._requeue_expired(conn, time.time()))
+
+    def lease(self, worker, count=1):
+        """
+        Reserve up to `count` queued pages for a worker
+
+        Expired leases are re-queued first, so a dead worker's pages go to the living ones.
+
+        Args:
+            worker (str): Identifier of the worker
+            count (int): Maximum number of pages to reserve
+
+        Returns:
+            list: (kind, url, depth) of the reserved pages, kind being 'listing' or 'page'
+        """
+        def statements(conn):
+            now = time.time()
+            self._requeue_expired(conn, now)
+            rows = conn.execute("SELECT kind, url, depth FROM pages WHERE state = 'queued' "
+                                "ORDER BY depth, score DESC, rowid LIMIT ?", (count,)).fetchall()
+            max_pages = self._setting(conn, 'max_pages')
+            if max_pages is not None:
+                handed_out = conn.execute("SELECT COUNT(*) FROM pages WHERE kind = 'page' AND state != 'queued'"
+                                          ).fetchone()[0]
+                room = max(0, max_pages - handed_out)
+                kept = []
+                for row in rows:
+                    if row['kind'] == 'page':
+                        if not room:
+                            continue
+                        room -= 1
+                    kept.append(row)
+                rows = kept
+            for row in rows:
+                conn.execute("UPDATE pages SET state = 'leased', worker = ?, lease_expires = ?, leased_at = ?, "
+                             "attempts = attempts + 1 WHERE kind = ? AND url = ?",
+                             (worker, now + self.lease_seconds, now, row['kind'], row['url']))
+            return [(row['kind'], row['url'], row['depth']) for row in rows]
+        return self._transaction(statements)
+
+    def renew(self, worker, pages):
+        """
+        Extend the leases of the pages a worker is still processing; called periodically while it works
+
+        A lease is never extended past `max_lease_seconds` after it was taken.
+
+        Args:
+            worker (str): Identifier of the worker
+            pages (iterable): (kind, url) of the pages being processed
+        """
+        def statements(conn):
+            now = time.time()
+            for kind, url in pages:
+                conn.execute("UPDATE pages SET lease_expires = MAX(lease_expires, MIN(?, leased_at + ?)) "
+                             "WHERE kind = ? AND url = ? AND worker = ? AND state = 'leased'",
+                             (now + self.lease_seconds, self.max_lease_seconds, kind, url, worker))
+        self._transaction(statements)
+
+    def complete(self, worker, kind, url, depth, downloads=0, links=None):
+        """
+        Mark a leased page as processed and queue the links found on it, in one transaction
+
+        Args:
+            worker (str): Identifier of the worker
+            kind (str): 'listing' or 'page'
+            url (str): URL of the page, as leased
+            depth (int): Depth of the page, as leased
+            downloads (int): Successful downloads from the page
+            links (list): Exam pages found on it, or None
+
+        Returns:
+            int: Number of links that were not queued already
+        """
+        def statements(conn):
+            conn.execute("UPDATE pages SET state = 'done', worker = ?, lease_expires = NULL, downloads = ? "
+                         "WHERE kind = ? AND url = ? AND state != 'done'", (worker, downloads, kind, url))
+            max_depth = self._setting(conn, 'max_depth')
+            added = 0
+            for link in links or ():
+                if max_depth is not None and depth + 1 > max_depth:
+                    break
+                link = canonicalize(link)
+                cursor = conn.execute("INSERT OR IGNORE INTO pages (url, kind, depth, score) VALUES (?, 'page', ?, ?)",
+                                      (link, depth + 1, keyword_score(link)))
+                added += cursor.rowcount
+            return added
+        return self._transaction(statements)
+
+    def release(self, worker, kind, url):
+        """
+        Give back a page a worker failed to process, so another attempt can be made
+
+        Args:
+            worker (str): Identifier of the worker
+            kind (str): 'listing' or 'page'
+            url (str): URL of the page, as leased
+        """
+        self._transaction(lambda conn: conn.execute(
+            "UPDATE pages SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, "
+            "worker = NULL, lease_expires = NULL WHERE kind = ? AND url = ? AND worker = ? AND state = 'leased'",
+            (self.max_attempts, kind, url, worker)))
+
+    def counts(self):
+        """
+        Returns:
+            dict: Number of exam pages per state ('queued', 'leased', 'done', 'failed'), listing pages
+                  not done yet ('listings'), successful downloads and live workers
+        """
+        with self._lock:
+            counts = {'queued': 0, 'leased': 0, 'done': 0, 'failed': 0}
+            for row in self._conn.execute("SELECT state, COUNT(*) AS n FROM pages WHERE kind = 'page' GROUP BY state"):
+                counts[row['state']] = row['n']
+            counts['listings'] = self._conn.execute(
+                "SELECT COUNT(*) FROM pages WHERE kind = 'listing' AND state IN ('queued', 'leased')").fetchone()[0]
+            counts['downloads'] = self._conn.execute('SELECT COALESCE(SUM(downloads), 0) FROM pages').fetchone()[0]
+            counts['workers'] = self._conn.execute(
+                "SELECT COUNT(DISTINCT worker) FROM pages WHERE state = 'leased'").fetchone()[0]
+        return counts
+
+    def seeded(self):
+        with self._lock:
+            return self._setting(self._conn, 'seeded') == 1
+
+    def finished(self):
+        """
+        Returns:
+            bool: True once the queue was seeded and no page is queued or leased,
+                  or the page limit is reached and no page is leased
+        """
+        if not self.seeded():
+            return False
+        with self._lock:
+            max_pages = self._setting(self._conn, 'max_pages')
+        counts = self.counts()
+        if counts['leased'] or counts['listings']:
+            return False
+        if max_pages is not None and counts['leased'] + counts['done'] + counts['failed'] >= max_pages:
+            return True
+        return not counts['queued']
+
+    def summary(self):
+        counts = self.counts()
+        return (f"{counts['done']} pages done, {counts['queued']} queued, {counts['leased']} leased by "
+                f"{counts['workers']} worker(s), {counts['failed']} failed; {counts['downloads']} successful downloads")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def coordinate(queue, listing_urls, max_depth=None, max_pages=None, interval=10):
+    """
+    Seed a shared crawl and watch it until the workers have finished it
+
+    The coordinator downloads nothing: it queues the listing pages, re-queues
+    expired leases even while no worker is asking for work, and reports progress.
+
+    Args:
+        queue (WorkQueue): Shared work queue
+        listing_urls (list): Listing pages to crawl
+        max_depth (int): Deepest sub-link depth queued, None for no limit
+        max_pages (int): Maximum number of exam pages processed, None for no limit
+        interval (float): Seconds between two progress reports
+    """
+    added = queue.seed(listing_urls, max_depth, max_pages)
+    print(f"Queued {added} new listing page(s) of {len(listing_urls)} in {queue.path}; waiting for workers")
+    while not queue.finished():
+        time.sleep(interval)
+        expired = queue.requeue_expired()
+        if expired:
+            print(f"Re-queued {expired} page(s) whose worker stopped renewing its lease")
+        print(f"Progress: {queue.summary()}")
+    print(f"Crawl finished: {queue.summary()}")